@@ -5,8 +5,9 @@ import matplotlib.pyplot as plt
 import streamlit as st
 from datetime import datetime, timedelta
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.model_selection import train_test_split, TimeSeriesSplit, ParameterSampler
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.pipeline import make_pipeline
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from statsmodels.tsa.arima.model import ARIMA
@@ -17,27 +18,538 @@ from plotly.subplots import make_subplots
 import matplotlib.dates as mdates
 import requests
 import io
+import hashlib
+import time
+import threading
+import uuid
+import pickle
+import sqlite3
+import json
+from urllib.parse import urlsplit, urlunsplit, urlencode, parse_qsl
+from collections import OrderedDict
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from joblib import Parallel, delayed
+from sklearn.inspection import permutation_importance
+
+# Utility function to fingerprint datasets (DataFrames, Series or arrays) by content
+def dataset_fingerprint(*datasets):
+    """
+    Compute a content hash for one or more datasets.
+
+    Returns:
+        Hex digest string that changes whenever values, columns or index change
+    """
+    digest = hashlib.sha1()
+    for data in datasets:
+        if data is None:
+            digest.update(b'none')
+        elif isinstance(data, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+            if isinstance(data, pd.DataFrame):
+                digest.update(repr(list(data.columns)).encode())
+        else:
+            array = np.ascontiguousarray(data)
+            digest.update(str((array.dtype, array.shape)).encode())
+            digest.update(array.tobytes())
+    return digest.hexdigest()
+
+# Utility function to fingerprint a fitted model by its type, hyperparameters and training data
+def model_fingerprint(model):
+    """
+    Describe a fitted model by class name, parameters and the training run it came from.
+
+    Models stored with store_trained_models carry their training key, so retrained models
+    with identical settings and data share cache entries while a model fitted on other
+    data never does. Models without a training key are told apart by object identity.
+    """
+    params = model.get_params() if hasattr(model, 'get_params') else {}
+    trained_on = getattr(model, '_training_key', None) or f"object:{id(model)}"
+    return f"{type(model).__name__}:{sorted(params.items())!r}:{trained_on}"
+
+# Session caches keep at most this many entries (least recently used go first)
+IMPORTANCE_CACHE_MAX_ENTRIES = 32
+TUNED_PARAMS_CACHE_MAX_ENTRIES = 64
+
+# Utility function to add an entry to a capped session cache
+def session_cache_put(cache, key, value, max_entries):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+# Process-wide content-addressed store for datasets and trained model bundles.
+# The byte limit is soft: entries still referenced by a live session are never evicted,
+# so the store can exceed it while many sessions hold different datasets or models.
+SHARED_STORE_MAX_BYTES = 512 * 1024 * 1024
+# Sessions that have not touched an entry for this long no longer keep it from eviction
+SHARED_REF_TTL_SECONDS = 30 * 60
+
+# Sessions share dataset frames (share_session_dataset); copy-on-write keeps one session's
+# column assignments out of the others. It is always on from pandas 3.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+@st.cache_resource
+def get_shared_store():
+    """
+    Return the store shared by all sessions of this process.
+
+    Entries are kept in least-recently-used order together with their estimated size
+    and the sessions referencing them.
+    """
+    return {'lock': threading.RLock(), 'entries': OrderedDict(), 'total_bytes': 0}
+
+# Utility function to identify the current browser session
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else 'local'
+
+# Utility function to estimate the memory held by a stored value (may pickle the value; call without the store lock)
+def estimate_nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+def _acquire_shared_entry(store, key, entry, slot):
+    """
+    Mark the entry as most recently used and referenced by this session under slot.
+
+    A session holds at most one key per slot ('data', 'models'); the key it held
+    before is released.
+    """
+    session_id = current_session_id()
+    store['entries'].move_to_end(key)
+    entry['refs'][session_id] = time.time()
+    
+    refs = st.session_state.setdefault('shared_store_refs', {})
+    previous = refs.get(slot)
+    refs[slot] = key
+    if previous is not None and previous != key and previous not in refs.values():
+        previous_entry = store['entries'].get(previous)
+        if previous_entry is not None:
+            previous_entry['refs'].pop(session_id, None)
+
+def evict_shared_store(store):
+    """
+    Evict least recently used entries without live references until the store fits
+    SHARED_STORE_MAX_BYTES. Referenced entries are never evicted, so the store stays
+    above the limit while they are in use (a soft limit).
+    """
+    now = time.time()
+    for key, entry in list(store['entries'].items()):
+        if store['total_bytes'] <= SHARED_STORE_MAX_BYTES:
+            break
+        # References of sessions that went quiet (closed tabs) expire
+        entry['refs'] = {
+            session_id: seen for session_id, seen in entry['refs'].items()
+            if now - seen < SHARED_REF_TTL_SECONDS
+        }
+        if not entry['refs']:
+            del store['entries'][key]
+            store['total_bytes'] -= entry['nbytes']
+
+def shared_store_put(slot, key, value):
+    """
+    Store value under a content key and reference it from this session.
+
+    If the key is already present the existing value is returned instead, so all
+    sessions share one copy. Stored values must be treated as read-only.
+
+    Args:
+        slot: Name of the session's reference ('data' or 'models')
+        key: Content-derived key (e.g. a dataset fingerprint)
+        value: Value to store
+
+    Returns:
+        The shared value for key
+    """
+    store = get_shared_store()
+    with store['lock']:
+        present = key in store['entries']
+    # Sizing can pickle a whole model bundle, so it runs outside the lock
+    nbytes = None if present else estimate_nbytes(value)
+    with store['lock']:
+        entry = store['entries'].get(key)
+        if entry is None:
+            if nbytes is None:
+                # Evicted in between (rare): size it here
+                nbytes = estimate_nbytes(value)
+            entry = {'value': value, 'nbytes': nbytes, 'refs': {}}
+            store['entries'][key] = entry
+            store['total_bytes'] += entry['nbytes']
+        _acquire_shared_entry(store, key, entry, slot)
+        evict_shared_store(store)
+        return entry['value']
+
+def shared_store_get(slot, key):
+    """
+    Return the shared value for key (referencing it from this session), or None.
+    """
+    if key is None:
+        return None
+    store = get_shared_store()
+    with store['lock']:
+        entry = store['entries'].get(key)
+        if entry is None:
+            return None
+        _acquire_shared_entry(store, key, entry, slot)
+        return entry['value']
+
+@st.cache_resource
+def get_single_flight_registry():
+    """
+    Return the process-wide registry of in-flight calls used by single_flight.
+    """
+    return {'lock': threading.Lock(), 'calls': {}}
+
+def single_flight(key, fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) unless an identical call (same key) is already running.
+
+    The first caller executes the call; callers arriving while it is in flight wait
+    for it and receive the same result (or exception). If the first caller is
+    interrupted instead (e.g. by a Streamlit rerun or stop), the waiting callers run
+    the call again themselves. Results are shared and must be treated as read-only.
+    Nothing is cached once the call completes.
+
+    Args:
+        key: Hashable description of the call (e.g. provider, location, dates)
+        fn: Function to run
+
+    Returns:
+        Result of the single execution
+    """
+    registry = get_single_flight_registry()
+    with registry['lock']:
+        call = registry['calls'].get(key)
+        leader = call is None
+        if leader:
+            call = {'done': threading.Event(), 'result': None, 'error': None, 'aborted': False}
+            registry['calls'][key] = call
+    
+    if not leader:
+        call['done'].wait()
+    else:
+        try:
+            call['result'] = fn(*args, **kwargs)
+        except Exception as e:
+            call['error'] = e
+        except BaseException:
+            # RerunException/StopException end only the leader's script run
+            call['aborted'] = True
+            raise
+        finally:
+            with registry['lock']:
+                registry['calls'].pop(key, None)
+            call['done'].set()
+    
+    if call['aborted']:
+        return single_flight(key, fn, *args, **kwargs)
+    if call['error'] is not None:
+        raise call['error']
+    return call['result']
+
+# Utility function to issue a rate-limited GET request, collapsing identical concurrent requests
+def single_flight_get(provider, url, **kwargs):
+    # URLs and params can carry API keys, so the in-flight key is a digest
+    request_digest = hashlib.sha1(repr((url, sorted(kwargs.items()))).encode()).hexdigest()
+    return single_flight(('GET', provider, request_digest), rate_limited_get, provider, url, **kwargs)
+
+# Per-provider request rates as (requests per second, burst size)
+PROVIDER_RATE_LIMITS = {
+    'weatherapi': (5.0, 10),
+    'openweather': (1.0, 10),
+    'open-meteo': (10.0, 20),
+    'weatherbit': (1.0, 5)
+}
+# Backoff after a 429 response doubles per consecutive 429 up to this many seconds
+RATE_LIMIT_MAX_BACKOFF = 60.0
+# Lowest fraction of the configured rate the adaptive limiter slows down to
+RATE_LIMIT_MIN_FRACTION = 0.1
+
+@st.cache_resource
+def get_rate_limiters():
+    """
+    Return the token buckets of all providers, shared by all threads and sessions.
+    """
+    buckets = {}
+    for provider, (rate, burst) in PROVIDER_RATE_LIMITS.items():
+        buckets[provider] = {
+            'condition': threading.Condition(),
+            'max_rate': rate,
+            'rate': rate,
+            'capacity': burst,
+            'tokens': float(burst),
+            'updated': time.monotonic(),
+            'blocked_until': 0.0,
+            'backoff': 0.0,
+            'waiting': 0,
+            'throttled': 0
+        }
+    return buckets
+
+def _refill_bucket(bucket, now):
+    bucket['tokens'] = min(bucket['capacity'], bucket['tokens'] + (now - bucket['updated']) * bucket['rate'])
+    bucket['updated'] = now
+
+def acquire_rate_token(provider):
+    """
+    Block until a request to provider is allowed by its token bucket (and any 429 backoff).
+    """
+    bucket = get_rate_limiters().get(provider)
+    if bucket is None:
+        return
+    with bucket['condition']:
+        bucket['waiting'] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                _refill_bucket(bucket, now)
+                if now < bucket['blocked_until']:
+                    bucket['condition'].wait(bucket['blocked_until'] - now)
+                elif bucket['tokens'] >= 1:
+                    bucket['tokens'] -= 1
+                    return
+                else:
+                    bucket['condition'].wait((1 - bucket['tokens']) / bucket['rate'])
+        finally:
+            bucket['waiting'] -= 1
+
+def record_rate_limit_response(provider, response):
+    """
+    Adapt a provider's bucket to a response.
+
+    A 429 blocks the provider for Retry-After seconds (or an exponential backoff) and
+    halves its rate; successful responses clear the backoff and let the rate recover
+    towards the configured maximum.
+    """
+    bucket = get_rate_limiters().get(provider)
+    if bucket is None:
+        return
+    with bucket['condition']:
+        if response.status_code == 429:
+            bucket['throttled'] += 1
+            bucket['backoff'] = min(RATE_LIMIT_MAX_BACKOFF, max(1.0, bucket['backoff'] * 2))
+            try:
+                delay = float(response.headers.get('Retry-After', bucket['backoff']))
+            except (TypeError, ValueError):
+                delay = bucket['backoff']
+            bucket['blocked_until'] = max(bucket['blocked_until'], time.monotonic() + delay)
+            bucket['rate'] = max(bucket['max_rate'] * RATE_LIMIT_MIN_FRACTION, bucket['rate'] / 2)
+            bucket['tokens'] = 0.0
+        else:
+            bucket['backoff'] = 0.0
+            bucket['rate'] = min(bucket['max_rate'], bucket['rate'] * 1.1)
+        bucket['condition'].notify_all()
+
+# Provider traffic mode: 'live' (default), 'record' (live requests saved as fixtures)
+# or 'replay' (responses served from fixtures, no network access)
+PROVIDER_TRAFFIC_MODE = os.environ.get('RAINFALL_PROVIDER_MODE', 'live')
+PROVIDER_FIXTURES_DIR = os.environ.get(
+    'RAINFALL_FIXTURES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+)
+# Base URL of a local fake provider server (see fake_weather_server.py); requests are
+# sent to <base>/<provider host>/<path> instead of the real host when set
+FAKE_PROVIDER_URL = os.environ.get('RAINFALL_FAKE_PROVIDER_URL')
+# Query parameters holding API keys; they are never written to fixtures
+SECRET_QUERY_PARAMS = ('key', 'appid')
+
+def fixture_key(url, params=None):
+    """
+    Return the fixture file name for a request: a hash of the URL and query parameters
+    without API keys, so recordings do not depend on (or contain) the key used.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query) + sorted((params or {}).items())
+    query = sorted((name, str(value)) for name, value in query if name not in SECRET_QUERY_PARAMS)
+    normalized = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+    return hashlib.sha1(normalized.encode()).hexdigest() + '.json', normalized
+
+def replay_response(url, params=None, fixtures_dir=None):
+    """
+    Build a requests.Response from a recorded fixture.
+
+    Raises:
+        FileNotFoundError: If the request was never recorded
+    """
+    name, normalized = fixture_key(url, params)
+    with open(os.path.join(fixtures_dir or PROVIDER_FIXTURES_DIR, name), encoding='utf-8') as fixture:
+        recorded = json.load(fixture)
+    response = requests.Response()
+    response.status_code = recorded['status_code']
+    response.headers.update(recorded['headers'])
+    response._content = recorded['body'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.url = normalized
+    return response
+
+def record_response(url, response, params=None, fixtures_dir=None):
+    """
+    Save a response as a fixture keyed by its key-less request.
+    """
+    fixtures_dir = fixtures_dir or PROVIDER_FIXTURES_DIR
+    os.makedirs(fixtures_dir, exist_ok=True)
+    name, normalized = fixture_key(url, params)
+    recorded = {
+        'url': normalized,
+        'status_code': response.status_code,
+        'headers': {name: value for name, value in response.headers.items() if name.lower() in ('content-type', 'retry-after')},
+        'body': response.text
+    }
+    with open(os.path.join(fixtures_dir, name), 'w', encoding='utf-8') as fixture:
+        json.dump(recorded, fixture, indent=1)
+
+def provider_request(url, **kwargs):
+    """
+    Send a provider GET request according to PROVIDER_TRAFFIC_MODE and FAKE_PROVIDER_URL.
+    """
+    params = kwargs.get('params')
+    if PROVIDER_TRAFFIC_MODE == 'replay':
+        return replay_response(url, params)
+    
+    target = url
+    if FAKE_PROVIDER_URL:
+        parts = urlsplit(url)
+        target = f"{FAKE_PROVIDER_URL.rstrip('/')}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+    response = requests.get(target, **kwargs)
+    if PROVIDER_TRAFFIC_MODE == 'record':
+        record_response(url, response, params)
+    return response
+
+def rate_limited_get(provider, url, max_retries=3, **kwargs):
+    """
+    requests.get through the provider's token bucket, retrying 429 responses.
+
+    Args:
+        provider: Key of PROVIDER_RATE_LIMITS (unknown providers are not limited)
+        url: Request URL
+        max_retries: Number of retries after 429 responses
+        **kwargs: Passed on to requests.get
+
+    Returns:
+        The last response
+    """
+    # Replayed responses cost no provider quota and say nothing about its current limits
+    if PROVIDER_TRAFFIC_MODE == 'replay':
+        return provider_request(url, **kwargs)
+    
+    for attempt in range(max_retries + 1):
+        acquire_rate_token(provider)
+        response = provider_request(url, **kwargs)
+        record_rate_limit_response(provider, response)
+        if response.status_code != 429:
+            break
+    return response
+
+def rate_limiter_stats():
+    """
+    Return a DataFrame with the current rate, tokens, backoff and queue depth per provider.
+    """
+    rows = []
+    for provider, bucket in get_rate_limiters().items():
+        with bucket['condition']:
+            _refill_bucket(bucket, time.monotonic())
+            rows.append({
+                'Provider': provider,
+                'Rate (req/s)': round(bucket['rate'], 2),
+                'Max Rate (req/s)': bucket['max_rate'],
+                'Tokens': round(bucket['tokens'], 1),
+                'Queue Depth': bucket['waiting'],
+                'Backoff (s)': round(max(0.0, bucket['blocked_until'] - time.monotonic()), 1),
+                '429 Responses': bucket['throttled']
+            })
+    return pd.DataFrame(rows)
+
+def share_session_dataset():
+    """
+    Replace st.session_state.data with the shared copy of identical content.
+
+    Sessions that load the same dataset end up referencing one DataFrame; the
+    fingerprint is only computed when the session's data object changes. Setting
+    st.session_state.data to the same (e.g. cached) object again as in the previous
+    run, or to the shared copy, reuses the known key.
+    """
+    data = st.session_state.data
+    key = st.session_state.get('shared_data_key')
+    if key is None or (data is not st.session_state.get('shared_data') and data is not st.session_state.get('shared_data_source')):
+        key = 'data:' + dataset_fingerprint(data)
+    
+    shared = shared_store_put('data', key, data)
+    st.session_state.data = shared
+    st.session_state['shared_data'] = shared
+    st.session_state['shared_data_key'] = key
+    st.session_state['shared_data_source'] = data
+    return shared
 
 # Utility function to calculate parameter importance (correlation-based)
 def calculate_parameter_importance(df, params):
     """
     Calculate the importance of weather parameters for precipitation using absolute correlation.
+    All parameters are correlated with precipitation in a single vectorized pass.
     Returns a DataFrame with Parameter and Importance (%).
     """
-    import numpy as np
-    import pandas as pd
-    importance = []
-    for param in params:
-        if param in df.columns and 'precipitation' in df.columns:
-            corr = df[param].corr(df['precipitation'])
-            if pd.isna(corr):
-                corr = 0
-            importance.append(abs(corr))
-        else:
-            importance.append(0)
-    total = sum(importance) if sum(importance) != 0 else 1
-    importance_percent = [100 * val / total for val in importance]
-    return pd.DataFrame({'Parameter': params, 'Importance (%)': importance_percent})
+    importance = pd.Series(0.0, index=params)
+    present = [param for param in params if param in df.columns and param != 'precipitation']
+    if present and 'precipitation' in df.columns:
+        corr = df[present].corrwith(df['precipitation']).abs().fillna(0)
+        importance[present] = corr.values
+    total = importance.sum() if importance.sum() != 0 else 1
+    importance_percent = 100 * importance / total
+    return pd.DataFrame({'Parameter': params, 'Importance (%)': importance_percent.values})
+
+# Test sets at least this large are permuted in parallel worker processes
+PERMUTATION_PARALLEL_MIN_ROWS = 5000
+
+# Cached, model-agnostic permutation importance
+def calculate_permutation_importance(model, X_test, y_test, feature_names, n_repeats=10):
+    """
+    Calculate permutation importance of each feature on the test set.
+
+    Repeats run in parallel for large test sets. Results are cached in the session
+    per model fingerprint and test-set fingerprint, so reruns are free.
+
+    Args:
+        model: Fitted model with a predict method
+        X_test: Test features (as passed to model.predict)
+        y_test: Test target
+        feature_names: Names of the feature columns
+        n_repeats: Number of shuffles per feature
+
+    Returns:
+        DataFrame with Feature, Importance and Std columns, sorted by importance
+    """
+    cache = st.session_state.setdefault('importance_cache', OrderedDict())
+    key = ('permutation', model_fingerprint(model), dataset_fingerprint(X_test, y_test), n_repeats)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    
+    n_jobs = -1 if len(y_test) >= PERMUTATION_PARALLEL_MIN_ROWS else None
+    result = permutation_importance(
+        model, X_test, y_test,
+        scoring='neg_mean_squared_error',
+        n_repeats=n_repeats,
+        n_jobs=n_jobs,
+        random_state=42
+    )
+    
+    importance_df = pd.DataFrame({
+        'Feature': list(feature_names),
+        'Importance': result.importances_mean,
+        'Std': result.importances_std
+    }).sort_values('Importance', ascending=False)
+    
+    session_cache_put(cache, key, importance_df, IMPORTANCE_CACHE_MAX_ENTRIES)
+    return importance_df
 
 # Set page config for better appearance
 st.set_page_config(
@@ -821,6 +1333,12 @@ st.markdown(f"""
     <p style="color: {IBUS_PRIMARY}; font-size: 1.2rem; margin-top: 0;">Advanced forecasting with integrated climate analytics</p>
 """, unsafe_allow_html=True)
 
+# Indian climate seasons; season_code is the position in SEASON_NAMES
+SEASON_NAMES = ('Winter', 'Summer', 'Monsoon', 'Post-Monsoon')
+# Season code per month number (index 0 is unused padding so months index directly)
+MONTH_SEASON_CODES = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 2, 3, 3, 0], dtype=np.int8)
+CALENDAR_FEATURES = ['day_of_year', 'month', 'season_code']
+
 # Add this function at the top of your file
 def get_season(month):
     """
@@ -832,14 +1350,64 @@ def get_season(month):
     Returns:
         str: Season name ('Winter', 'Summer', 'Monsoon', 'Post-Monsoon')
     """
-    if month in [11, 12, 1, 2]:
-        return 'Winter'
-    elif month in [3, 4, 5]:
-        return 'Summer'
-    elif month in [6, 7, 8, 9]:
-        return 'Monsoon'
-    else:  # month in [10]
-        return 'Post-Monsoon'
+    return SEASON_NAMES[MONTH_SEASON_CODES[month]]
+
+@st.cache_resource(max_entries=64)
+def calendar_table(start, end):
+    """
+    Calendar features for every day from start to end (inclusive), shared by all sessions.
+
+    Returns:
+        Dict of CALENDAR_FEATURES name -> array with one entry per day
+    """
+    days = pd.date_range(start, end, freq='D')
+    month = days.month.to_numpy(dtype=np.int8)
+    return {
+        'day_of_year': days.dayofyear.to_numpy(dtype=np.int16),
+        'month': month,
+        'season_code': MONTH_SEASON_CODES[month]
+    }
+
+# Function to add calendar features derived from the dates
+def add_calendar_features(df):
+    """
+    Add day_of_year, month and season_code from the DatetimeIndex or date column.
+
+    Values are looked up by day offset in the cached calendar_table of the frame's date
+    range, so training and forecasting share the same features. Rows without a valid
+    date get NaN. Frames without dates are returned unchanged.
+
+    Args:
+        df: DataFrame to extend (modified in place)
+
+    Returns:
+        The extended DataFrame
+    """
+    if isinstance(df.index, pd.DatetimeIndex):
+        dates = df.index
+    elif 'date' in df.columns:
+        dates = pd.DatetimeIndex(pd.to_datetime(df['date'], errors='coerce'))
+    else:
+        return df
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    
+    days = dates.normalize().values
+    valid = ~np.isnat(days)
+    if not valid.any():
+        return df
+    start, end = days[valid].min(), days[valid].max()
+    table = calendar_table(pd.Timestamp(start), pd.Timestamp(end))
+    
+    offsets = ((days[valid] - start) // np.timedelta64(1, 'D')).astype(np.int64)
+    for col in CALENDAR_FEATURES:
+        if valid.all():
+            df[col] = table[col][offsets]
+        else:
+            values = np.full(len(df), np.nan)
+            values[valid] = table[col][offsets]
+            df[col] = values
+    return df
 
 # Synthetic data generation function
 def generate_rainfall_data(filename='rainfall_data.csv', years=5):
@@ -880,12 +1448,48 @@ def generate_rainfall_data(filename='rainfall_data.csv', years=5):
     data.to_csv(filename, index=False)
     return data
 
-def load_sample_data(filename='rainfall_data.csv'):
+# Compact dtypes: float32 measurements, categorical location and small integer calendar features
+COMPACT_FLOAT_DTYPE = np.float32
+COMPACT_CALENDAR_DTYPES = {'day_of_year': 'int16', 'month': 'int8', 'season_code': 'int8'}
+COMPACT_READ_DTYPES = {
+    'Location': 'category',
+    'temperature': 'float32',
+    'humidity': 'float32',
+    'pressure': 'float32',
+    'wind_speed': 'float32',
+    'precipitation': 'float32'
+}
+
+def compact_dtypes(df):
+    """
+    Convert a DataFrame to compact dtypes, roughly halving its memory use.
+
+    Float columns become float32, the location column becomes categorical and
+    calendar columns (day_of_year, month, season_code) become small integers.
+
+    Args:
+        df: DataFrame to convert (modified in place)
+
+    Returns:
+        The converted DataFrame
+    """
+    for col in df.columns:
+        values = df[col]
+        if col in COMPACT_CALENDAR_DTYPES and pd.api.types.is_numeric_dtype(values) and not values.isna().any():
+            df[col] = values.astype(COMPACT_CALENDAR_DTYPES[col])
+        elif str(col).lower() == 'location' and not isinstance(values.dtype, pd.CategoricalDtype):
+            df[col] = values.astype('category')
+        elif pd.api.types.is_float_dtype(values) and values.dtype != COMPACT_FLOAT_DTYPE:
+            df[col] = values.astype(COMPACT_FLOAT_DTYPE)
+    return df
+
+def load_sample_data(filename='rainfall_data.csv', compact=False):
     """
     Load rainfall data from the provided CSV file.
     
     Args:
         filename: Path to the CSV file
+        compact: Parse measurements as float32 and Location as categorical
         
 
     Returns:
@@ -895,7 +1499,11 @@ def load_sample_data(filename='rainfall_data.csv'):
         # Load data from CSV
         # data = pd.read_csv(filename)
         filename = os.path.join(os.path.dirname(__file__), "rainfall_data.csv")
-        data = pd.read_csv(filename)
+        if compact:
+            # Parse straight into compact dtypes so float64 columns are never materialized
+            data = pd.read_csv(filename, dtype=COMPACT_READ_DTYPES)
+        else:
+            data = pd.read_csv(filename)
         
         # Convert date column to datetime
         if 'date' in data.columns:
@@ -954,67 +1562,512 @@ def load_dataset(filename):
     data.set_index('date', inplace=True)
     return data
 
-def create_features(data):
+# Column names (case-insensitive) that identify the location/station of a row
+LOCATION_COLUMN_NAMES = ('location', 'station', 'city')
+
+# Utility function to find the location column of a dataset (case-insensitive)
+def find_location_column(data):
+    """
+    Return the name of the location/station column, or None if the data has none.
+    """
+    for col in data.columns:
+        if str(col).lower() in LOCATION_COLUMN_NAMES:
+            return col
+    return None
+
+# Utility function to build a (Location, date) index over station history
+def build_history_index(data):
+    """
+    Build a sorted (Location, date) index so per-station window queries avoid full scans.
+
+    Rows are ordered by station and then by date once; each station owns a contiguous
+    slice [start, stop) of that order, so lookups are a dict access plus a binary search.
+
+    Args:
+        data: DataFrame with a DatetimeIndex or 'date' column and an optional location column
+
+    Returns:
+        Dictionary with 'positions' (row positions in sorted order), 'dates' (int64
+        nanosecond timestamps aligned with positions), 'offsets' ({location: (start, stop)})
+        and 'location_col'
+    """
+    location_col = find_location_column(data)
+    if isinstance(data.index, pd.DatetimeIndex):
+        dates = data.index
+    elif 'date' in data.columns:
+        dates = pd.DatetimeIndex(pd.to_datetime(data['date'], errors='coerce'))
+    else:
+        raise ValueError("History index needs a DatetimeIndex or a 'date' column")
+    date_values = dates.values.astype('datetime64[ns]').astype(np.int64)
+    
+    if location_col is None:
+        codes = np.zeros(len(data), dtype=np.int64)
+        locations = [None]
+    else:
+        codes, locations = pd.factorize(data[location_col], sort=True)
+    
+    # Sort by station code, then date; rows with a missing location (code -1) sort first and are skipped
+    positions = np.lexsort((date_values, codes))
+    sorted_codes = codes[positions]
+    boundaries = np.searchsorted(sorted_codes, np.arange(len(locations) + 1), side='left')
+    offsets = {
+        location: (int(boundaries[code]), int(boundaries[code + 1]))
+        for code, location in enumerate(locations)
+    }
+    
+    return {
+        'positions': positions,
+        'dates': date_values[positions],
+        'offsets': offsets,
+        'location_col': location_col
+    }
+
+# Utility function to get the history index for a dataset, reusing it across reruns
+def get_history_index(data, key=None):
+    """
+    Return the (Location, date) index for data, cached in session state.
+
+    The cached index is reused for the same data object or the same shared dataset key
+    (see share_session_dataset), so reruns never rehash the data. Only the latest
+    dataset's index is kept.
+    """
+    cache = st.session_state.get('history_index_cache')
+    if cache is not None and (cache['data'] is data or (key is not None and cache['key'] == key)):
+        return cache['index']
+    index = build_history_index(data)
+    st.session_state['history_index_cache'] = {'key': key, 'data': data, 'index': index}
+    return index
+
+# Utility function to list the stations present in a history index
+def history_locations(index):
+    """
+    Return the stations in the index, in sorted order (None for data without a location column).
+    """
+    return list(index['offsets'].keys())
+
+# Utility function to find the sorted-order bounds of one station's rows within a date range
+def history_bounds(index, location, start=None, end=None):
+    """
+    Binary-search the [start, end] date window inside one station's slice.
+
+    Returns:
+        (lo, hi) bounds into index['positions']; empty (0, 0) for unknown stations
+    """
+    if location not in index['offsets']:
+        return 0, 0
+    lo, hi = index['offsets'][location]
+    station_dates = index['dates'][lo:hi]
+    if start is not None:
+        lo += int(np.searchsorted(station_dates, pd.Timestamp(start).value, side='left'))
+    if end is not None:
+        hi = index['offsets'][location][0] + int(np.searchsorted(station_dates, pd.Timestamp(end).value, side='right'))
+    return lo, max(lo, hi)
+
+# Utility function to slice one station's history between two dates
+def history_window(data, index, location, start=None, end=None):
+    """
+    Return the rows for one station between start and end (inclusive), sorted by date.
+
+    Args:
+        data: DataFrame the index was built from
+        index: Index from build_history_index / get_history_index
+        location: Station to select (None for data without a location column)
+        start, end: Optional date bounds
+
+    Returns:
+        DataFrame containing only that station's rows in the window
+    """
+    lo, hi = history_bounds(index, location, start, end)
+    return data.iloc[index['positions'][lo:hi]]
+
+# Utility function to get the latest N records for one station
+def history_latest(data, index, location, n):
+    """
+    Return the n most recent rows for a station, sorted by date.
+    """
+    lo, hi = history_bounds(index, location)
+    return data.iloc[index['positions'][max(lo, hi - n):hi]]
+
+# Utility function to check whether a station has a record for a given date
+def history_has(index, location, date):
+    """
+    Return True if the station has at least one record at the given timestamp.
+    """
+    value = pd.Timestamp(date).value
+    lo, hi = history_bounds(index, location, value, value)
+    return hi > lo
+
+# Canonical measurement columns and their display names with units
+COLUMN_UNITS = {
+    'temperature': 'temperature (°C)',
+    'humidity': 'humidity (%)',
+    'pressure': 'pressure (hPa)',
+    'wind_speed': 'wind_speed (m/s)',
+    'precipitation': 'precipitation (mm)'
+}
+UNIT_SUFFIXED_COLUMNS = {col_with_unit: col for col, col_with_unit in COLUMN_UNITS.items()}
+
+# Utility function to classify a dtype for schema resolution
+def dtype_class(dtype):
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    return 'other'
+
+@st.cache_resource(max_entries=256)
+def resolve_schema(signature, compact=False):
+    """
+    Resolve how a frame with the given column signature is normalized.
+
+    Args:
+        signature: Tuple of (column name, dtype class) pairs from normalize_schema
+        compact: Also coerce integer columns so they can be downcast to float32
+
+    Returns:
+        Dict with 'rename' (unit-suffixed name -> canonical name) and 'coerce'
+        (canonical names of the columns that need pd.to_numeric)
+    """
+    names = [col for col, _ in signature]
+    rename = {}
+    for col in names:
+        canonical = UNIT_SUFFIXED_COLUMNS.get(col)
+        # Never rename onto a column that already exists
+        if canonical is not None and canonical not in names:
+            rename[col] = canonical
+    
+    coerce = []
+    for col, dtype_class in signature:
+        if col == 'date' or str(col).lower() in LOCATION_COLUMN_NAMES or names.count(col) > 1:
+            continue
+        if dtype_class in ('datetime', 'bool', 'float') or (dtype_class == 'int' and not compact):
+            continue
+        coerce.append(rename.get(col, col))
+    return {'rename': rename, 'coerce': coerce}
+
+# Function to normalize column names and dtypes in one pass
+def normalize_schema(data, compact=False):
+    """
+    Map unit-suffixed columns to canonical names and coerce measurements to numbers.
+
+    The mapping is resolved once per column signature (resolve_schema); the frame is
+    renamed once and only columns that are not numeric yet are converted. Date and
+    location columns are left as they are.
+
+    Args:
+        data: DataFrame to normalize (not modified)
+        compact: Downcast converted columns to float32
+
+    Returns:
+        Normalized DataFrame
+    """
+    signature = tuple((col, dtype_class(dtype)) for col, dtype in data.dtypes.items())
+    schema = resolve_schema(signature, compact=compact)
+    df = data.rename(columns=schema['rename'])
+    for col in schema['coerce']:
+        df[col] = pd.to_numeric(df[col], errors='coerce', downcast='float' if compact else None)
+    return df
+
+def create_features(data, compact=False):
     """
     Create features for the model from the raw data.
     
     Args:
         data: DataFrame with raw data
+        compact: Keep numeric columns as float32 and Location as categorical
         
     Returns:
         DataFrame with features
     """
-    # Make a copy to avoid modifying the original
-    df = data.copy()
-    
-    # Define column mapping to remove units for processing
-    column_mapping = {
-        'temperature (°C)': 'temperature',
-        'humidity (%)': 'humidity',
-        'pressure (hPa)': 'pressure',
-        'wind_speed (m/s)': 'wind_speed',
-        'precipitation (mm)': 'precipitation'
-    }
+    # Canonical column names and numeric measurements (returns a new frame)
+    df = normalize_schema(data, compact=compact)
     
-    # Remove units from column names for processing
-    for col_with_unit, col in column_mapping.items():
-        if col_with_unit in df.columns:
-            df = df.rename(columns={col_with_unit: col})
+    # Calendar features, shared with the forecast frame
+    df = add_calendar_features(df)
     
-    # Ensure all columns are numeric where appropriate
-    for col in df.columns:
-        if col not in ['date'] and not pd.api.types.is_datetime64_any_dtype(df[col]):
-            try:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            except:
-                pass
+    if compact:
+        df = compact_dtypes(df)
     
     return df
 
-def preprocess_data(data):
-    # Define features dynamically based on what's available
-    potential_features = ['temperature', 'humidity', 'pressure', 'wind_speed', 
-                         'day_of_year', 'month', 'season_code']
-    # Removed lag and rolling features
-    
-    # Only use features that exist in the data
-    feature_cols = [col for col in potential_features if col in data.columns]
-    
-    # If no features are available, add some basic ones
-    if not feature_cols:
-        data['day_of_year'] = 1
-        data['month'] = 1
-        feature_cols = ['day_of_year', 'month']
+# Opt-in lagged and rolling precipitation features
+PRECIP_LAGS = (1, 2, 3)
+PRECIP_ROLLING_WINDOW = 7
+PRECIP_ROLLING_AVG = f'precip_rolling_avg_{PRECIP_ROLLING_WINDOW}'
+PRECIP_ROLLING_STD = f'precip_rolling_std_{PRECIP_ROLLING_WINDOW}'
+PRECIP_LAG_FEATURES = [f'precip_lag_{k}' for k in PRECIP_LAGS] + [PRECIP_ROLLING_AVG, PRECIP_ROLLING_STD]
+# Number of earlier days a station needs to compute the features of its next day
+PRECIP_LAG_CONTEXT = max(max(PRECIP_LAGS), PRECIP_ROLLING_WINDOW)
+
+# Utility function to order rows by station and then by date
+def station_date_order(data):
+    """
+    Return the positions that sort data by station (if any) and then by date.
+
+    Ties keep their original order; data without dates keeps its row order.
+    """
+    if isinstance(data.index, pd.DatetimeIndex):
+        dates = data.index.values
+    elif 'date' in data.columns:
+        dates = pd.to_datetime(data['date'], errors='coerce').values
+    else:
+        return np.arange(len(data))
+    location_col = find_location_column(data)
+    if location_col is None:
+        return np.argsort(dates, kind='stable')
+    return np.lexsort((dates, pd.factorize(data[location_col])[0]))
+
+# Function to add lagged and rolling precipitation features per station
+def add_precipitation_lag_features(data):
+    """
+    Add precip_lag_1..3 and the 7-day rolling mean/std of precipitation for each station.
+
+    The rolling windows end the day before, so a day's own rainfall never leaks into its
+    features. All stations are handled by one grouped shift/rolling pass in (station, date) order.
+
+    Args:
+        data: DataFrame with a precipitation column and a DatetimeIndex or date column
+
+    Returns:
+        Copy of data with the lag feature columns added (data itself if it has no precipitation)
+    """
+    if 'precipitation' not in data.columns:
+        return data
     
-    # Make sure all feature columns are numeric
-    for col in feature_cols:
-        try:
-            data[col] = pd.to_numeric(data[col], errors='coerce')
-        except:
-            st.warning(f"Could not convert {col} to numeric. Using zeros.")
-            data[col] = 0
+    df = data.copy()
+    order = station_date_order(df)
+    ordered = df.iloc[order]
+    precipitation = pd.to_numeric(ordered['precipitation'], errors='coerce').reset_index(drop=True)
+    dtype = precipitation.dtype if pd.api.types.is_float_dtype(precipitation) else np.float64
+    
+    location_col = find_location_column(df)
+    if location_col is None:
+        keys = np.zeros(len(df), dtype=np.int64)
+    else:
+        keys = pd.factorize(ordered[location_col])[0]
+    
+    grouped = precipitation.groupby(keys, sort=False)
+    features = {f'precip_lag_{k}': grouped.shift(k) for k in PRECIP_LAGS}
+    rolling = grouped.shift(1).groupby(keys, sort=False).rolling(PRECIP_ROLLING_WINDOW, min_periods=1)
+    features[PRECIP_ROLLING_AVG] = rolling.mean().reset_index(level=0, drop=True).sort_index()
+    features[PRECIP_ROLLING_STD] = rolling.std().reset_index(level=0, drop=True).sort_index()
+    
+    # Scatter the ordered results back to the original row order
+    for col, values in features.items():
+        column = np.empty(len(df), dtype=dtype)
+        column[order] = values.to_numpy(dtype=dtype)
+        df[col] = column
+    return df
+
+# Utility function to keep the tail each station needs for its next lag features
+def precipitation_lag_state(data):
+    """
+    Keep the last PRECIP_LAG_CONTEXT days of each station, in (station, date) order.
+
+    This is all that add_precipitation_lag_features needs to handle days appended later.
+    """
+    ordered = data.iloc[station_date_order(data)]
+    location_col = find_location_column(ordered)
+    if location_col is None:
+        return ordered.iloc[-PRECIP_LAG_CONTEXT:]
+    return ordered.groupby(location_col, sort=False, observed=True).tail(PRECIP_LAG_CONTEXT)
+
+# Utility function to check that new rows come after each station's stored tail
+def appends_after_state(state, new_rows):
+    """
+    Return True if every station's new rows are dated after its last stored day.
+    """
+    def station_dates(df):
+        if isinstance(df.index, pd.DatetimeIndex):
+            dates = df.index.values
+        elif 'date' in df.columns:
+            dates = pd.to_datetime(df['date'], errors='coerce').values
+        else:
+            return None
+        location_col = find_location_column(df)
+        keys = df[location_col].astype(str).to_numpy() if location_col is not None else np.zeros(len(df), dtype=int)
+        return pd.Series(dates, index=keys)
+    
+    new_dates, old_dates = station_dates(new_rows), station_dates(state)
+    if new_dates is None or old_dates is None:
+        return True
+    first_new = new_dates.groupby(level=0).min()
+    last_old = old_dates.groupby(level=0).max()
+    common = first_new.index.intersection(last_old.index)
+    return bool((first_new[common] > last_old[common]).all())
+
+# Function to compute lag features for appended days from the stored station tails only
+def append_precipitation_lag_features(state, new_rows):
+    """
+    Compute the lag features of newly appended days without touching the older history.
+
+    Args:
+        state: Station tails from precipitation_lag_state
+        new_rows: Rows dated after each station's tail
+
+    Returns:
+        Tuple of (new_rows with lag features, updated state)
+    """
+    context = pd.concat([state.drop(columns=PRECIP_LAG_FEATURES, errors='ignore'), new_rows])
+    featured = add_precipitation_lag_features(context)
+    return featured.iloc[len(state):], precipitation_lag_state(featured)
+
+# Utility function to fingerprint the rows around an append boundary
+def append_boundary_fingerprint(data, n_rows):
+    """
+    Fingerprint the first and the last PRECIP_LAG_CONTEXT of the first n_rows rows.
+
+    If a longer frame has the same boundary fingerprint, its first n_rows rows are
+    taken to be the earlier frame with days appended.
+    """
+    return dataset_fingerprint(
+        data.iloc[:min(PRECIP_LAG_CONTEXT, n_rows)],
+        data.iloc[max(0, n_rows - PRECIP_LAG_CONTEXT):n_rows]
+    )
+
+# Function to get lag features for the session's data, incrementally when rows were appended
+def get_precipitation_lag_features(data, key=None):
+    """
+    Session-cached add_precipitation_lag_features.
+
+    The cache is keyed by key (e.g. the shared dataset key plus the selected station and
+    options), or by data object identity without one, so reruns never rehash the data.
+    When data under a new key is the previously featured frame with later days appended
+    (same rows at the start and at the old end, see append_boundary_fingerprint), only
+    the new rows are computed from the cached station tails. Anything else triggers a
+    full recompute.
+    """
+    cache = st.session_state.get('precip_lag_cache')
+    if cache is not None and (cache['data'] is data or (key is not None and cache['key'] == key)):
+        return cache['features']
+    
+    features = None
+    if cache is not None and 0 < cache['n_rows'] < len(data):
+        new_rows = data.iloc[cache['n_rows']:]
+        if (append_boundary_fingerprint(data, cache['n_rows']) == cache['boundary']
+                and appends_after_state(cache['state'], new_rows)):
+            new_features, state = append_precipitation_lag_features(cache['state'], new_rows)
+            features = pd.concat([cache['features'], new_features])
+    
+    if features is None:
+        features = add_precipitation_lag_features(data)
+        state = precipitation_lag_state(features)
+    
+    st.session_state['precip_lag_cache'] = {
+        'key': key,
+        'data': data,
+        'boundary': append_boundary_fingerprint(data, len(data)),
+        'n_rows': len(data),
+        'features': features,
+        'state': state
+    }
+    return features
+
+# Utility function to read the latest observed precipitation for the recursive forecast
+def precipitation_history_tail(data, fallback=0.0, length=PRECIP_LAG_CONTEXT):
+    """
+    Return the last `length` precipitation values in date order (oldest first).
+
+    Missing values and histories shorter than `length` are filled with the mean (or fallback).
+    """
+    if 'precipitation' in data.columns:
+        values = pd.to_numeric(data['precipitation'].iloc[station_date_order(data)], errors='coerce')
+        values = values.to_numpy(dtype=float)[-length:]
+    else:
+        values = np.array([])
+    fill = np.nanmean(values) if np.isfinite(values).any() else fallback
+    values = np.where(np.isnan(values), fill, values)
+    return np.concatenate([np.full(length - len(values), fill), values])
+
+# Function to forecast recursively with lagged precipitation features
+def recursive_lag_predict(model, X_base, feature_cols, history_tail, imputer=None, scaler=None):
+    """
+    Recursive multi-step forecast for models trained with the lag/rolling precipitation features.
+
+    Each step fills the lag and rolling columns from the observed tail plus the predictions
+    of the earlier steps and predicts that step for every scenario in one call, so the loop
+    runs over the horizon only and stays vectorized across scenarios.
+
+    Args:
+        model: Fitted ML model
+        X_base: Feature array of shape (K, horizon, features); lag columns are overwritten
+        feature_cols: Feature columns used during training
+        history_tail: Last PRECIP_LAG_CONTEXT observed precipitation values (oldest first)
+        imputer, scaler: Fitted preprocessing steps (optional)
+
+    Returns:
+        Tuple of (predictions of shape (K, horizon), model inputs of shape (K, horizon, features))
+    """
+    n_scenarios, horizon, _ = X_base.shape
+    columns = list(feature_cols)
+    positions = {col: columns.index(col) for col in PRECIP_LAG_FEATURES if col in columns}
+    context = len(history_tail)
+    
+    # Observed tail followed by the predictions made so far, one row per scenario
+    buffer = np.empty((n_scenarios, context + horizon))
+    buffer[:, :context] = history_tail
+    predictions = np.empty((n_scenarios, horizon))
+    model_inputs = None
+    
+    for h in range(horizon):
+        now = context + h
+        X_step = np.array(X_base[:, h, :], dtype=float)
+        for k in PRECIP_LAGS:
+            if f'precip_lag_{k}' in positions:
+                X_step[:, positions[f'precip_lag_{k}']] = buffer[:, now - k]
+        window = buffer[:, now - PRECIP_ROLLING_WINDOW:now]
+        if PRECIP_ROLLING_AVG in positions:
+            X_step[:, positions[PRECIP_ROLLING_AVG]] = window.mean(axis=1)
+        if PRECIP_ROLLING_STD in positions:
+            X_step[:, positions[PRECIP_ROLLING_STD]] = window.std(axis=1, ddof=1)
+        
+        X_step = pd.DataFrame(X_step.astype(X_base.dtype), columns=columns)
+        if imputer is not None:
+            X_step = pd.DataFrame(imputer.transform(X_step), columns=columns)
+        if scaler is not None:
+            X_step = scaler.transform(X_step)
+        
+        if model_inputs is None:
+            model_inputs = np.empty((n_scenarios, horizon, len(columns)), dtype=np.asarray(X_step).dtype)
+        model_inputs[:, h, :] = np.asarray(X_step)
+        predictions[:, h] = np.maximum(np.asarray(model.predict(X_step)), 0)
+        buffer[:, now] = predictions[:, h]
+    
+    return predictions, model_inputs
+
+def preprocess_data(data, impute=True, compact=False):
+    # With impute=False missing feature values are kept (for models with native NaN support) and imputer is None
+    # With compact=True features are passed on as float32 through imputation and scaling
+    # Define features dynamically based on what's available
+    potential_features = ['temperature', 'humidity', 'pressure', 'wind_speed', 
+                         'day_of_year', 'month', 'season_code']
+    # Lag and rolling features are only present when the opt-in stage added them
+    potential_features += PRECIP_LAG_FEATURES
+    
+    # Only use features that exist in the data
+    feature_cols = [col for col in potential_features if col in data.columns]
+    
+    # If no features are available, add some basic ones
+    if not feature_cols:
+        data['day_of_year'] = 1
+        data['month'] = 1
+        feature_cols = ['day_of_year', 'month']
+    
+    # Make sure all feature columns are numeric
+    for col in feature_cols:
+        try:
+            data[col] = pd.to_numeric(data[col], errors='coerce')
+        except:
+            st.warning(f"Could not convert {col} to numeric. Using zeros.")
+            data[col] = 0
     
     X = data[feature_cols]
+    if compact:
+        X = X.astype(COMPACT_FLOAT_DTYPE)
     
     # Use precipitation as target if available, otherwise create a dummy target
     if 'precipitation' in data.columns:
@@ -1029,9 +2082,13 @@ def preprocess_data(data):
         y = pd.Series(np.random.normal(5, 2, len(data)), index=data.index)
         data['precipitation'] = y
     
-    # Handle missing values in X using SimpleImputer
-    imputer = SimpleImputer(strategy='mean')
-    X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns, index=X.index)
+    # Handle missing values in X using SimpleImputer (skipped for the fast engine)
+    if impute:
+        imputer = SimpleImputer(strategy='mean')
+        X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns, index=X.index)
+    else:
+        imputer = None
+        X_imputed = X
     
     # Handle missing values in y
     y_imputed = y.fillna(y.mean() if not y.isna().all() else 0)
@@ -1052,37 +2109,12 @@ def preprocess_data(data):
     
     return X_train_scaled, X_test_scaled, y_train, y_test, scaler, feature_cols, imputer
 
-def train_ml_models(X_train, y_train):
-    st.write("Training machine learning models...")
-    
-    # Adjust model complexity based on data size
-    n_estimators = min(100, max(10, len(X_train) // 2))
-    
-    # Create more robust models with better hyperparameters
-    models = {
-        'Linear Regression': LinearRegression(),
-        'Random Forest': RandomForestRegressor(
-            n_estimators=n_estimators, 
-            max_depth=min(10, len(X_train) // 10),
-            min_samples_leaf=3,
-            random_state=42
-        ),
-        'Gradient Boosting': GradientBoostingRegressor(
-            n_estimators=n_estimators,
-            learning_rate=0.05,
-            max_depth=4,
-            min_samples_leaf=3,
-            random_state=42
-        )
-    }
-    
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-    
-    return models
-
 def train_arima_model(y_train):
     st.write("Training ARIMA model...")
+    return fit_arima_model(y_train)
+
+# ARIMA fitting without UI output so it can also run in background training jobs
+def fit_arima_model(y_train):
     try:
         # Use simpler ARIMA model for small datasets
         if len(y_train) < 30:
@@ -1100,12 +2132,49 @@ def train_arima_model(y_train):
                 return np.array([self.mean] * steps)
         return SimpleMeanModel(y_train)
 
-def evaluate_model_and_show_importance(model, X_test, y_test, feature_names, scaler):
+# Per-run prediction store so each model predicts the test set only once
+def predict_with_store(model, X, prediction_store=None):
+    """
+    Return model.predict(X), reusing an earlier result from the prediction store.
+
+    Args:
+        model: Fitted model with a predict method
+        X: Input features
+        prediction_store: Dictionary shared by the consumers of one training run, or None
+
+    Returns:
+        Array of predictions
+    """
+    if prediction_store is None:
+        return model.predict(X)
+    
+    key = (id(model), 'predict', dataset_fingerprint(X))
+    if key not in prediction_store:
+        # Keep a reference to the model so its id cannot be reused within the run
+        prediction_store[key] = (model, model.predict(X))
+    return prediction_store[key][1]
+
+def forecast_with_store(model, steps, prediction_store=None):
+    """
+    Return model.forecast(steps=steps) as an array, reusing an earlier result from the prediction store.
+    """
+    if prediction_store is None:
+        forecast = model.forecast(steps=steps)
+        return forecast.values if hasattr(forecast, 'values') else np.asarray(forecast)
+    
+    key = (id(model), 'forecast', steps)
+    if key not in prediction_store:
+        forecast = model.forecast(steps=steps)
+        forecast = forecast.values if hasattr(forecast, 'values') else np.asarray(forecast)
+        prediction_store[key] = (model, forecast)
+    return prediction_store[key][1]
+
+def evaluate_model_and_show_importance(model, X_test, y_test, feature_names, scaler, prediction_store=None):
     """
     Evaluate the model and show feature importance.
     """
-    # Make predictions
-    y_pred = model.predict(X_test)
+    # Make predictions (reused from the prediction store when available)
+    y_pred = predict_with_store(model, X_test, prediction_store)
     
     # Calculate metrics
     mae = mean_absolute_error(y_test, y_pred)
@@ -1137,9 +2206,9 @@ def evaluate_model_and_show_importance(model, X_test, y_test, feature_names, sca
     col3.metric("R² Score", f"{r2:.2f}")
     
     # Only show feature importance if the model supports it
-    if hasattr(model, 'feature_importances_'):
+    if hasattr(final_estimator(model), 'feature_importances_'):
         # Get feature importances
-        importances = model.feature_importances_
+        importances = final_estimator(model).feature_importances_
         
         # Create a DataFrame for better visualization
         importance_df = pd.DataFrame({
@@ -1178,10 +2247,37 @@ def evaluate_model_and_show_importance(model, X_test, y_test, feature_names, sca
         # Display importance table
         st.dataframe(importance_df)
         
-        # Calculate parameter importance using correlation method
-        weather_features = ['temperature', 'humidity', 'pressure', 'wind_speed']
-        
-        # Create a DataFrame with features and target for correlation calculation
+    # Model-agnostic permutation importance (cached per model and test set)
+    st.subheader("Permutation Importance")
+    st.write("Increase in squared error when each parameter is shuffled on the test set.")
+    perm_df = calculate_permutation_importance(model, X_test, y_test, feature_names)
+    fig = px.bar(
+        perm_df,
+        y='Feature',
+        x='Importance',
+        error_x='Std',
+        orientation='h',
+        title='Permutation Importance for Rainfall Prediction',
+        color_discrete_sequence=['#110361'],
+        labels={'Importance': 'Increase in MSE', 'Feature': 'Weather Parameter'}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Calculate parameter importance using correlation method
+    weather_features = [f for f in ['temperature', 'humidity', 'pressure', 'wind_speed'] if f in list(feature_names)]
+    
+    # Create a DataFrame with features and target for correlation calculation
+    cache = st.session_state.setdefault('importance_cache', OrderedDict())
+    key = ('correlation', dataset_fingerprint(X_test, y_test))
+    if key not in cache:
+        corr_frame = pd.DataFrame(np.asarray(X_test), columns=list(feature_names))
+        corr_frame['precipitation'] = np.asarray(y_test)
+        session_cache_put(cache, key, calculate_parameter_importance(corr_frame, weather_features), IMPORTANCE_CACHE_MAX_ENTRIES)
+    else:
+        cache.move_to_end(key)
+    st.write("Correlation-based parameter importance:")
+    st.dataframe(cache[key])
+
 # Add global CSS to ensure all tables have light blue background and dark text
 st.markdown("""
 <style>
@@ -1333,29 +2429,30 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def visualize_all_models_predictions(models, X_test, y_test, arima_model=None):
+def visualize_all_models_predictions(models, X_test, y_test, arima_model=None, prediction_store=None):
     fig, ax = plt.subplots(figsize=(15, 8))
     ax.plot(y_test.values, label='Actual', linewidth=2, color='black')
     
     for name, model in models.items():
-        y_pred = model.predict(X_test)
+        y_pred = predict_with_store(model, X_test, prediction_store)
         ax.plot(y_pred, label=name)
     
     if arima_model:
-        y_pred_arima = arima_model.forecast(steps=len(y_test))
+        y_pred_arima = forecast_with_store(arima_model, len(y_test), prediction_store)
         ax.plot(y_pred_arima, label='ARIMA')
     
     ax.legend()
     ax.set_title("Model Predictions vs Actual Precipitation")
     st.pyplot(fig)
 
-def evaluate_models(ml_models, X_test, y_test, arima_model=None):
+def evaluate_models(ml_models, X_test, y_test, arima_model=None, prediction_store=None):
     """
     Evaluate all models and return a DataFrame with their performance metrics.
+    Predictions are recorded in prediction_store (if given) for reuse by other consumers.
     """
     results = []
     for name, model in ml_models.items():
-        y_pred = model.predict(X_test)
+        y_pred = predict_with_store(model, X_test, prediction_store)
         mae = mean_absolute_error(y_test, y_pred)
         rmse = np.sqrt(mean_squared_error(y_test, y_pred))
         r2 = r2_score(y_test, y_pred)
@@ -1363,9 +2460,7 @@ def evaluate_models(ml_models, X_test, y_test, arima_model=None):
     # ARIMA
     if arima_model is not None:
         try:
-            y_pred_arima = arima_model.forecast(steps=len(y_test))
-            if hasattr(y_pred_arima, 'values'):
-                y_pred_arima = y_pred_arima.values
+            y_pred_arima = forecast_with_store(arima_model, len(y_test), prediction_store)
             mae = mean_absolute_error(y_test, y_pred_arima)
             rmse = np.sqrt(mean_squared_error(y_test, y_pred_arima))
             r2 = r2_score(y_test, y_pred_arima)
@@ -1382,6 +2477,7 @@ def evaluate_models(ml_models, X_test, y_test, arima_model=None):
         'Linear Regression': 'Simple linear model',
         'Random Forest': 'Ensemble of decision trees',
         'Gradient Boosting': 'Sequential ensemble method',
+        'Hist Gradient Boosting': 'Histogram-based boosting (fast engine)',
         'ARIMA': 'Time series forecasting'
     }
     
@@ -1397,11 +2493,131 @@ def evaluate_models(ml_models, X_test, y_test, arima_model=None):
     
     return df
 
+# Payload-minimizing request builders: ask providers only for the fields and resolution we use
+WEATHERAPI_BASE_URL = "https://api.weatherapi.com/v1"
+OPEN_METEO_BASE_URL = "https://api.open-meteo.com/v1/forecast"
+# Historical weather API for days older than the forecast API serves
+OPEN_METEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+# Past days the forecast API still serves; older windows go to the archive API
+OPEN_METEO_FORECAST_PAST_DAYS = 92
+# Open-Meteo variables per output column, as daily aggregates and as hourly values
+OPEN_METEO_DAILY_VARIABLES = {
+    'temperature': 'temperature_2m_mean',
+    'humidity': 'relative_humidity_2m_mean',
+    'pressure': 'pressure_msl_mean',
+    'wind_speed': 'wind_speed_10m_mean',
+    'precipitation': 'precipitation_sum'
+}
+OPEN_METEO_HOURLY_VARIABLES = {
+    'temperature': 'temperature_2m',
+    'humidity': 'relativehumidity_2m',
+    'pressure': 'pressure_msl',
+    'wind_speed': 'windspeed_10m',
+    'precipitation': 'precipitation'
+}
+
+def build_weatherapi_url(endpoint, api_key, location, **params):
+    """
+    Build a WeatherAPI URL ('history' or 'forecast') without unused payload.
+
+    Air quality and alerts are switched off for forecasts, and an hour parameter
+    limits the hourly block to that single hour.
+
+    Args:
+        endpoint: 'history' or 'forecast'
+        api_key: WeatherAPI key
+        location: Location query
+        **params: Further query parameters (dt, end_dt, days, hour); None values are skipped
+
+    Returns:
+        URL string
+    """
+    if endpoint == 'forecast':
+        params = {'aqi': 'no', 'alerts': 'no', **params}
+    query = ''.join(f"&{name}={value}" for name, value in params.items() if value is not None)
+    return f"{WEATHERAPI_BASE_URL}/{endpoint}.json?key={api_key}&q={location}{query}"
+
+def build_open_meteo_url(lat, lon, variables, resolution='daily', start_date=None, end_date=None, forecast_days=None,
+                         start_hour=None, end_hour=None, base_url=OPEN_METEO_BASE_URL):
+    """
+    Build an Open-Meteo URL requesting only the given variables at one resolution.
+
+    Args:
+        lat, lon: Coordinates
+        variables: Open-Meteo variable names
+        resolution: 'daily' (one value per day) or 'hourly'
+        start_date, end_date: Optional date window ('YYYY-MM-DD')
+        forecast_days: Optional number of forecast days (instead of a window)
+        start_hour, end_hour: Optional hourly window ('YYYY-MM-DDTHH:MM'); replaces the
+            date window for hourly data
+        base_url: Endpoint (OPEN_METEO_BASE_URL or OPEN_METEO_ARCHIVE_URL)
+
+    Returns:
+        URL string
+    """
+    url = f"{base_url}?latitude={lat}&longitude={lon}&{resolution}={','.join(variables)}"
+    if start_hour is not None and end_hour is not None:
+        url += f"&start_hour={start_hour}&end_hour={end_hour}"
+    elif start_date is not None and end_date is not None:
+        url += f"&start_date={start_date}&end_date={end_date}"
+    if forecast_days is not None:
+        url += f"&forecast_days={forecast_days}"
+    # Daily aggregates follow the local calendar day
+    return url + "&timezone=auto"
+
+# Longest date range one WeatherAPI history request may cover (end_dt parameter; depends on the plan)
+WEATHERAPI_MAX_RANGE_DAYS = 30
+
+def plan_weatherapi_history_ranges(start_date, end_date, max_days=WEATHERAPI_MAX_RANGE_DAYS):
+    """
+    Split a date window into the fewest consecutive ranges of at most max_days days.
+
+    Returns:
+        List of (start, end) date strings (inclusive)
+    """
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    max_days = max(1, int(max_days))
+    return [
+        (dates[i].strftime('%Y-%m-%d'), dates[min(i + max_days, len(dates)) - 1].strftime('%Y-%m-%d'))
+        for i in range(0, len(dates), max_days)
+    ]
+
+# Utility function to convert a WeatherAPI forecastday 'day' block into a daily record
+def weatherapi_day_record(date_str, day_data):
+    return {
+        'date': date_str,
+        'temperature': day_data.get('avgtemp_c', 25),
+        'humidity': day_data.get('avghumidity', 70),
+        'pressure': 1013,  # WeatherAPI doesn't provide pressure directly
+        'wind_speed': day_data.get('maxwind_kph', 10),
+        'precipitation': day_data.get('totalprecip_mm', 0)
+    }
+
+# Placeholder record used to maintain continuity for days without data
+def weatherapi_placeholder_record(date_str):
+    return {
+        'date': date_str,
+        'temperature': 25,
+        'humidity': 70,
+        'pressure': 1013,
+        'wind_speed': 5,
+        'precipitation': 0
+    }
+
 # Function to fetch weather data from WeatherAPI
-def fetch_weather_data_from_api(location, start_date, end_date, api_key, show_debug=False):
+def fetch_weather_data_from_api(location, start_date, end_date, api_key, show_debug=False,
+                                max_range_days=WEATHERAPI_MAX_RANGE_DAYS, placeholders=True):
     """
     Fetch weather data from WeatherAPI for the given location and date range.
     Returns a DataFrame with columns: date, temperature, humidity, pressure, wind_speed, precipitation.
+
+    The window is requested in ranges of up to max_range_days days (dt/end_dt), and each
+    response is split back into daily rows. Days missing from a range response (e.g. on
+    plans without end_dt support) are fetched one day at a time.
+
+    With placeholders=False days without data are left out instead of being filled
+    with placeholder values. The dates of placeholder rows are listed in
+    df.attrs['placeholder_dates'] so they can be told apart from real observations.
     """
     try:
         if not isinstance(end_date, str):
@@ -1410,21 +2626,22 @@ def fetch_weather_data_from_api(location, start_date, end_date, api_key, show_de
         # Get current hour for consistent time-of-day forecasting
         current_hour = datetime.now().hour
         
-        # WeatherAPI only allows fetching one day at a time for history endpoint
         date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        records = []
+        records = {}
+        placeholder_dates = []
         api_errors = []
         
         # Debug information
         if show_debug:
             st.info(f"Attempting to fetch data for {location} from {start_date} to {end_date} using API key: {api_key[:5]}...")
         
-        for single_date in date_range:
-            date_str = single_date.strftime('%Y-%m-%d')
+        def request_history(range_start, range_end=None):
             # Add hour parameter to get data for the same hour of day
-            url = (
-                f"https://api.weatherapi.com/v1/history.json?key={api_key}"
-                f"&q={location}&dt={date_str}&hour={current_hour}"
+            url = build_weatherapi_url(
+                'history', api_key, location,
+                dt=range_start,
+                end_dt=range_end if range_end != range_start else None,
+                hour=current_hour
             )
             
             # Debug URL (hide full API key)
@@ -1432,38 +2649,51 @@ def fetch_weather_data_from_api(location, start_date, end_date, api_key, show_de
                 masked_url = url.replace(api_key, f"{api_key[:5]}...")
                 st.write(f"Fetching: {masked_url}")
             
-            response = requests.get(url)
+            response = single_flight_get('weatherapi', url)
             if show_debug:
                 st.write(f"Response status: {response.status_code}")
+            return response
+        
+        def collect_days(data, wanted):
+            # Debug response structure
+            if show_debug:
+                st.write(f"Response keys: {list(data.keys())}")
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Debug response structure
-                if show_debug:
-                    st.write(f"Response keys: {list(data.keys())}")
-                
-                # Extract the day's data - check both possible response structures
-                if 'forecast' in data and 'forecastday' in data['forecast'] and len(data['forecast']['forecastday']) > 0:
-                    day_data = data['forecast']['forecastday'][0]['day']
+            # Extract every returned day within the requested range
+            for forecast_day in data.get('forecast', {}).get('forecastday', []):
+                date_str = forecast_day.get('date')
+                if date_str in wanted and 'day' in forecast_day:
+                    day_data = forecast_day['day']
                     
                     # Debug day data
                     if show_debug:
                         st.write(f"Day data keys: {list(day_data.keys())}")
                     
-                    records.append({
-                        'date': date_str,
-                        'temperature': day_data.get('avgtemp_c', 25),
-                        'humidity': day_data.get('avghumidity', 70),
-                        'pressure': 1013,  # WeatherAPI doesn't provide pressure directly
-                        'wind_speed': day_data.get('maxwind_kph', 10),
-                        'precipitation': day_data.get('totalprecip_mm', 0)
-                    })
+                    records[date_str] = weatherapi_day_record(date_str, day_data)
                     
                     # Show successful data point
                     if show_debug:
                         st.success(f"Successfully retrieved data for {date_str}")
-                else:
+        
+        # One request per planned range
+        for range_start, range_end in plan_weatherapi_history_ranges(start_date, end_date, max_range_days):
+            wanted = {d.strftime('%Y-%m-%d') for d in pd.date_range(range_start, range_end, freq='D')}
+            response = request_history(range_start, range_end)
+            if response.status_code == 200:
+                collect_days(response.json(), wanted)
+            elif show_debug:
+                st.warning(f"Range request {range_start} to {range_end} failed ({response.status_code}); fetching days individually")
+        
+        # Fall back to one request per day for days the range requests did not return
+        for single_date in date_range:
+            date_str = single_date.strftime('%Y-%m-%d')
+            if date_str in records:
+                continue
+            
+            response = request_history(date_str)
+            if response.status_code == 200:
+                collect_days(response.json(), {date_str})
+                if date_str not in records:
                     # If no data for this day, log the issue
                     error_msg = f"No forecast data found for {date_str}"
                     api_errors.append(error_msg)
@@ -1471,14 +2701,9 @@ def fetch_weather_data_from_api(location, start_date, end_date, api_key, show_de
                         st.warning(error_msg)
                     
                     # Still add a placeholder to maintain continuity
-                    records.append({
-                        'date': date_str,
-                        'temperature': 25,
-                        'humidity': 70,
-                        'pressure': 1013,
-                        'wind_speed': 5,
-                        'precipitation': 0
-                    })
+                    if placeholders:
+                        records[date_str] = weatherapi_placeholder_record(date_str)
+                        placeholder_dates.append(date_str)
             else:
                 # If API call fails, log the error
                 error_msg = f"API error for {date_str}: {response.status_code}"
@@ -1489,18 +2714,17 @@ def fetch_weather_data_from_api(location, start_date, end_date, api_key, show_de
                     st.error(error_msg)
                 
                 # Add placeholder to maintain continuity
-                records.append({
-                    'date': date_str,
-                    'temperature': 25,
-                    'humidity': 70,
-                    'pressure': 1013,
-                    'wind_speed': 5,
-                    'precipitation': 0
-                })
+                if placeholders:
+                    records[date_str] = weatherapi_placeholder_record(date_str)
+                    placeholder_dates.append(date_str)
         
         # Create DataFrame from records
-        df = pd.DataFrame(records)
+        df = pd.DataFrame(
+            [records[d.strftime('%Y-%m-%d')] for d in date_range if d.strftime('%Y-%m-%d') in records],
+            columns=['date', 'temperature', 'humidity', 'pressure', 'wind_speed', 'precipitation']
+        )
         df['date'] = pd.to_datetime(df['date'])
+        df.attrs['placeholder_dates'] = sorted(placeholder_dates)
         
         # If we had errors, return them along with the data
         if api_errors:
@@ -1527,36 +2751,43 @@ def fetch_open_meteo_data(location, start_date, end_date):
         current_hour = datetime.now().hour
         
         # Geocode the location (convert city name to lat/lon)
-        geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location}&count=1"
-        geo_response = requests.get(geocoding_url)
+        coordinates = geocode_open_meteo(location)
         
-        if geo_response.status_code != 200 or not geo_response.json().get('results'):
+        if coordinates is None:
             return None, f"Geocoding failed for location: {location}"
             
-        lat = geo_response.json()['results'][0]['latitude']
-        lon = geo_response.json()['results'][0]['longitude']
-        
-        # Build Open-Meteo API URL with hourly=true parameter
-        api_url = (
-            f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}"
-            f"&start_date={start_date}&end_date={end_date}"
-            f"&hourly=temperature_2m,relativehumidity_2m,precipitation,pressure_msl,windspeed_10m"
-        )
+        lat, lon = coordinates
+        
+        # Request one aggregated value per day and variable (24x less payload than hourly data)
+        daily_url = build_open_meteo_url(lat, lon, OPEN_METEO_DAILY_VARIABLES.values(), 'daily', start_date, end_date)
+        response = single_flight_get('open-meteo', daily_url)
+        
+        if response.status_code == 200:
+            daily = response.json().get('daily', {})
+            if 'time' in daily and all(variable in daily for variable in OPEN_METEO_DAILY_VARIABLES.values()):
+                df = pd.DataFrame({
+                    column: daily[variable] for column, variable in OPEN_METEO_DAILY_VARIABLES.items()
+                })
+                df.insert(0, 'date', pd.to_datetime(daily['time'], format='%Y-%m-%d').date)
+                return df, None
+        
+        # Fall back to hourly data for the current hour if daily aggregates are unavailable.
+        # The API can only limit hours to one contiguous window, not to one hour of every
+        # day, so only single-day requests can ask for just the current hour.
+        hour_window = {}
+        if start_date == end_date:
+            hour_window = {'start_hour': f"{start_date}T{current_hour:02d}:00", 'end_hour': f"{end_date}T{current_hour:02d}:00"}
+        api_url = build_open_meteo_url(lat, lon, OPEN_METEO_HOURLY_VARIABLES.values(), 'hourly', start_date, end_date, **hour_window)
         
-        response = requests.get(api_url)
+        response = single_flight_get('open-meteo', api_url)
         
         if response.status_code == 200:
             data = response.json()
             
             # Extract hourly data
-            hourly_data = {
-                'date': data['hourly']['time'],
-                'temperature': data['hourly']['temperature_2m'],
-                'humidity': data['hourly']['relativehumidity_2m'],
-                'pressure': data['hourly']['pressure_msl'],
-                'wind_speed': data['hourly']['windspeed_10m'],
-                'precipitation': data['hourly']['precipitation']
-            }
+            hourly_data = {'date': data['hourly']['time']}
+            for column, variable in OPEN_METEO_HOURLY_VARIABLES.items():
+                hourly_data[column] = data['hourly'][variable]
             
             # Convert to DataFrame
             df = pd.DataFrame(hourly_data)
@@ -1573,107 +2804,644 @@ def fetch_open_meteo_data(location, start_date, end_date):
             df_filtered = df_filtered.drop('hour', axis=1)
             
             return df_filtered, None
+        return None, f"Open-Meteo API error: {response.status_code}"
     except Exception as e:
         return None, f"Exception: {e}"
 
-# Utility function to add units to column names
-def add_units_to_columns(df):
+# Open-Meteo accepts comma-separated coordinate lists; locations per batched request
+OPEN_METEO_MAX_LOCATIONS_PER_REQUEST = 100
+# Concurrent geocoding lookups for a batch (still bounded by the provider's rate limiter)
+GEOCODING_WORKERS = 8
+
+@st.cache_resource
+def get_geocode_cache():
     """
-    Add units to column names for display purposes.
+    Return the process-wide cache of geocoded coordinates by lower-cased location name.
     """
-    col_units = {
-        'temperature': 'temperature (°C)',
-        'humidity': 'humidity (%)',
-        'pressure': 'pressure (hPa)',
-        'wind_speed': 'wind_speed (m/s)',
-        'precipitation': 'precipitation (mm)'
-    }
-    df = df.copy()
-    for col, col_with_unit in col_units.items():
-        if col in df.columns and col_with_unit not in df.columns:
-            df = df.rename(columns={col: col_with_unit})
-    return df
+    return {'lock': threading.Lock(), 'coordinates': {}}
 
-# Process uploaded data function
-def process_uploaded_data(uploaded_file):
+def geocode_open_meteo(location):
     """
-    Process uploaded data file and add units to column names.
+    Geocode a location with the Open-Meteo geocoding API.
+
+    Entries of the form "lat,lon" are used as coordinates directly. Successful lookups
+    are cached for all sessions, since coordinates of a place do not change.
+
+    Returns:
+        (latitude, longitude) tuple, or None if the location was not found
+    """
+    parts = [part.strip() for part in str(location).split(',')]
+    if len(parts) == 2:
+        try:
+            return float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+    
+    cache = get_geocode_cache()
+    key = str(location).strip().lower()
+    with cache['lock']:
+        if key in cache['coordinates']:
+            return cache['coordinates'][key]
+    
+    geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location}&count=1"
+    geo_response = single_flight_get('open-meteo', geocoding_url)
+    if geo_response.status_code != 200 or not geo_response.json().get('results'):
+        return None
     
+    result = geo_response.json()['results'][0]
+    coordinates = (result['latitude'], result['longitude'])
+    with cache['lock']:
+        cache['coordinates'][key] = coordinates
+    return coordinates
+
+def plan_open_meteo_windows(start_date, end_date, today=None):
+    """
+    Split a date window between the archive API and the forecast API.
+
+    The forecast API only serves the last OPEN_METEO_FORECAST_PAST_DAYS days; the
+    part of the window before that is requested from the archive API.
+
+    Returns:
+        List of (endpoint URL, start, end) with inclusive 'YYYY-MM-DD' bounds
+    """
+    start, end = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+    today = pd.Timestamp(today if today is not None else datetime.now().date()).normalize()
+    first_forecast_day = today - pd.Timedelta(days=OPEN_METEO_FORECAST_PAST_DAYS)
+    windows = []
+    if start < first_forecast_day:
+        windows.append((OPEN_METEO_ARCHIVE_URL, start, min(end, first_forecast_day - pd.Timedelta(days=1))))
+    if end >= first_forecast_day:
+        windows.append((OPEN_METEO_BASE_URL, max(start, first_forecast_day), end))
+    return [(url, window_start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')) for url, window_start, window_end in windows]
+
+def fetch_open_meteo_batch(locations, start_date, end_date):
+    """
+    Fetch daily weather for many locations with as few Open-Meteo calls as possible.
+
+    Locations are geocoded (cached), then grouped into requests of up to
+    OPEN_METEO_MAX_LOCATIONS_PER_REQUEST coordinates each. Days older than the
+    forecast API serves are requested from the archive API (plan_open_meteo_windows).
+
     Args:
-        uploaded_file: File uploaded by the user
-        
+        locations: Iterable of city names or "lat,lon" strings
+        start_date, end_date: Date window (dates or 'YYYY-MM-DD' strings)
+
     Returns:
-        Tuple of (data, error_message)
+        Tuple of (long-format DataFrame with columns Location, date, temperature, humidity,
+        pressure, wind_speed, precipitation as in rainfall_data.csv, or None; error message or None)
     """
     try:
-        # Get file extension
-        file_extension = uploaded_file.name.split('.')[-1].lower()
+        if not isinstance(start_date, str):
+            start_date = start_date.strftime('%Y-%m-%d')
+        if not isinstance(end_date, str):
+            end_date = end_date.strftime('%Y-%m-%d')
         
-        # Read file based on extension
-        if file_extension == 'csv':
-            # Try different encodings and delimiters
-            try:
-                data = pd.read_csv(uploaded_file)
-            except:
-                try:
-                    data = pd.read_csv(uploaded_file, sep=';')
-                except:
-                    try:
-                        data = pd.read_csv(uploaded_file, encoding='latin1')
-                    except:
-                        data = pd.read_csv(uploaded_file, encoding='utf-8', sep=None, engine='python')
-        elif file_extension in ['xlsx', 'xls']:
-            data = pd.read_excel(uploaded_file)
-        elif file_extension == 'json':
-            data = pd.read_json(uploaded_file)
-        elif file_extension == 'txt':
-            # Try to detect delimiter for text files
-            try:
-                data = pd.read_csv(uploaded_file, sep=None, engine='python')
-            except:
-                try:
-                    data = pd.read_csv(uploaded_file, sep='\t')
-                except:
-                    data = pd.read_fwf(uploaded_file)  # Fixed width format as last resort
-        elif file_extension == 'pdf':
-            # Try to extract tables from PDF
-            try:
-                import tabula
-                # Save the uploaded file temporarily
-                with open("temp.pdf", "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                
-                # Extract tables from the PDF
-                tables = tabula.read_pdf("temp.pdf", pages='all', multiple_tables=True)
-                
-                if not tables:
-                    return None, "No tables found in the PDF file."
-                
-                # Use the first table found
-                data = tables[0]
-                
-                # If multiple tables were found, show a message
-                if len(tables) > 1:
-                    st.info(f"Found {len(tables)} tables in the PDF. Using the first table. Upload individual pages for other tables.")
-                
-                # Clean up the temporary file
-                import os
-                os.remove("temp.pdf")
+        # Deduplicate while keeping the given order
+        locations = list(dict.fromkeys(str(location).strip() for location in locations if str(location).strip()))
+        if not locations:
+            return None, "No locations given"
+        
+        with ThreadPoolExecutor(max_workers=GEOCODING_WORKERS) as pool:
+            geocoded = dict(zip(locations, pool.map(geocode_open_meteo, locations)))
+        failed = [location for location, coordinates in geocoded.items() if coordinates is None]
+        found = [location for location in locations if geocoded[location] is not None]
+        
+        frames = []
+        for base_url, window_start, window_end in plan_open_meteo_windows(start_date, end_date):
+            for i in range(0, len(found), OPEN_METEO_MAX_LOCATIONS_PER_REQUEST):
+                chunk = found[i:i + OPEN_METEO_MAX_LOCATIONS_PER_REQUEST]
+                url = build_open_meteo_url(
+                    ','.join(str(geocoded[location][0]) for location in chunk),
+                    ','.join(str(geocoded[location][1]) for location in chunk),
+                    OPEN_METEO_DAILY_VARIABLES.values(), 'daily', window_start, window_end,
+                    base_url=base_url
+                )
+                response = single_flight_get('open-meteo', url)
+                if response.status_code != 200:
+                    failed.extend(chunk)
+                    continue
                 
-            except ImportError:
-                # If tabula-py is not installed, try PyPDF2
-                try:
-                    import PyPDF2
-                    import re
-                    
-                    # Save the uploaded file temporarily
-                    with open("temp.pdf", "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    # Extract text from the PDF
-                    pdf_file = open("temp.pdf", 'rb')
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    
+                # A single coordinate returns an object, several return a list in request order
+                payload = response.json()
+                if isinstance(payload, dict):
+                    payload = [payload]
+                for location, result in zip(chunk, payload):
+                    daily = result.get('daily', {})
+                    if 'time' not in daily:
+                        failed.append(location)
+                        continue
+                    frame = pd.DataFrame({
+                        column: daily.get(variable) for column, variable in OPEN_METEO_DAILY_VARIABLES.items()
+                    })
+                    frame.insert(0, 'date', pd.to_datetime(daily['time'], format='%Y-%m-%d'))
+                    frame.insert(0, 'Location', location)
+                    frames.append(frame)
+        
+        data = pd.concat(frames, ignore_index=True) if frames else None
+        error_message = None
+        # A location is reported once even if several of its windows failed
+        failed = list(dict.fromkeys(failed))
+        if failed:
+            error_message = f"Could not fetch {len(failed)} location(s): {', '.join(failed[:5])}{'...' if len(failed) > 5 else ''}"
+        return data, error_message
+    except Exception as e:
+        return None, f"Exception: {e}"
+
+# Persistent local history store (SQLite) for fetched observations
+HISTORY_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weather_history.sqlite")
+HISTORY_COLUMNS = ['temperature', 'humidity', 'pressure', 'wind_speed', 'precipitation']
+# Providers the history store can sync from
+HISTORY_PROVIDERS = ['open-meteo', 'weatherapi']
+
+# Largest range one history request may cover, and how many already-stored days the
+# planner may re-download to merge two holes into one request, per provider
+HISTORY_MAX_RANGE_DAYS = {'open-meteo': None, 'weatherapi': WEATHERAPI_MAX_RANGE_DAYS}
+HISTORY_BRIDGE_DAYS = {'open-meteo': 7, 'weatherapi': WEATHERAPI_MAX_RANGE_DAYS}
+
+def connect_history_store(path=HISTORY_STORE_PATH):
+    """
+    Open the history store, creating the observations table if needed.
+
+    Callers close the connection (contextlib.closing); using it as a context manager
+    on its own only commits or rolls back.
+
+    Observations are keyed by (provider, location, date) and are only ever inserted,
+    never updated: the first stored value for a day is kept. Placeholder rows (flagged
+    with placeholder = 1) are the exception and get replaced by a real observation.
+    """
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS observations ("
+        "provider TEXT NOT NULL, location TEXT NOT NULL, date TEXT NOT NULL, "
+        "temperature REAL, humidity REAL, pressure REAL, wind_speed REAL, precipitation REAL, "
+        "fetched_at TEXT NOT NULL, placeholder INTEGER NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (provider, location, date))"
+    )
+    # Stores created before placeholders were tracked lack the flag column
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(observations)")]
+    if 'placeholder' not in columns:
+        connection.execute("ALTER TABLE observations ADD COLUMN placeholder INTEGER NOT NULL DEFAULT 0")
+    return connection
+
+def append_observations(provider, data, path=HISTORY_STORE_PATH, placeholder_dates=None):
+    """
+    Append daily observations to the store, skipping (provider, location, date) keys
+    that already hold a real observation.
+
+    Args:
+        provider: Provider name
+        data: Long-format DataFrame with Location, date and the HISTORY_COLUMNS
+        placeholder_dates: Optional collection of 'YYYY-MM-DD' dates whose rows are placeholders
+
+    Returns:
+        Number of newly stored rows
+    """
+    if data is None or data.empty:
+        return 0
+    dates = pd.to_datetime(data['date']).dt.strftime('%Y-%m-%d')
+    placeholder_dates = set(placeholder_dates or [])
+    fetched_at = datetime.now().isoformat(timespec='seconds')
+    values = data[HISTORY_COLUMNS].astype(float).to_numpy()
+    rows = [
+        (provider, str(location), date, *[None if np.isnan(v) else float(v) for v in row],
+         fetched_at, int(date in placeholder_dates))
+        for location, date, row in zip(data['Location'], dates, values)
+    ]
+    # closing() releases the file handle; the inner block commits the insert
+    with closing(connect_history_store(path)) as connection, connection:
+        before = connection.total_changes
+        connection.executemany(
+            "INSERT INTO observations (provider, location, date, " + ', '.join(HISTORY_COLUMNS) + ", fetched_at, placeholder) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (provider, location, date) DO UPDATE SET "
+            + ', '.join(f"{column} = excluded.{column}" for column in HISTORY_COLUMNS) +
+            ", fetched_at = excluded.fetched_at, placeholder = 0 "
+            "WHERE observations.placeholder = 1 AND excluded.placeholder = 0",
+            rows
+        )
+        return connection.total_changes - before
+
+def build_availability_index(provider, locations, start_date, end_date, path=HISTORY_STORE_PATH):
+    """
+    Build one day bitmap per location over [start_date, end_date].
+
+    Returns:
+        Dictionary {location: {'origin': Timestamp of bit 0, 'observed': bool array,
+        'placeholder': bool array}}; bit i stands for origin + i days
+    """
+    origin = pd.Timestamp(start_date).normalize()
+    n_days = max(0, (pd.Timestamp(end_date).normalize() - origin).days + 1)
+    index = {
+        location: {
+            'origin': origin,
+            'observed': np.zeros(n_days, dtype=bool),
+            'placeholder': np.zeros(n_days, dtype=bool)
+        }
+        for location in locations
+    }
+    if not locations or n_days == 0:
+        return index
+    
+    with closing(connect_history_store(path)) as connection:
+        stored = pd.read_sql_query(
+            f"SELECT location, date, placeholder FROM observations WHERE provider = ? "
+            f"AND location IN ({','.join('?' * len(locations))}) AND date >= ? AND date <= ?",
+            connection,
+            params=[provider, *locations, origin.strftime('%Y-%m-%d'), pd.Timestamp(end_date).strftime('%Y-%m-%d')]
+        )
+    offsets = (pd.to_datetime(stored['date'], format='%Y-%m-%d') - origin).dt.days.to_numpy()
+    is_placeholder = stored['placeholder'].to_numpy().astype(bool)
+    for location, positions in stored.groupby('location').indices.items():
+        index[location]['observed'][offsets[positions[~is_placeholder[positions]]]] = True
+        index[location]['placeholder'][offsets[positions[is_placeholder[positions]]]] = True
+    return index
+
+def plan_gap_ranges(holes, origin, max_range_days=None, max_bridge_days=0):
+    """
+    Turn a bitmap of missing days into the fewest (start, end) range requests.
+
+    Holes are covered greedily from the earliest one: a range keeps absorbing the next
+    hole while the stored days it would re-download in between number at most
+    max_bridge_days and the range stays within max_range_days.
+
+    Args:
+        holes: Boolean array, True for days to fetch
+        origin: Timestamp of bit 0
+        max_range_days: Longest allowed range (None for unlimited)
+        max_bridge_days: Most stored days a range may span to join two holes
+
+    Returns:
+        List of inclusive ('YYYY-MM-DD', 'YYYY-MM-DD') ranges
+    """
+    positions = np.flatnonzero(holes)
+    ranges = []
+    i = 0
+    while i < len(positions):
+        first = last = positions[i]
+        i += 1
+        while i < len(positions):
+            next_hole = positions[i]
+            if next_hole - last - 1 > max_bridge_days:
+                break
+            if max_range_days is not None and next_hole - first + 1 > max_range_days:
+                break
+            last = next_hole
+            i += 1
+        ranges.append((
+            (origin + pd.Timedelta(days=int(first))).strftime('%Y-%m-%d'),
+            (origin + pd.Timedelta(days=int(last))).strftime('%Y-%m-%d')
+        ))
+    return ranges
+
+def plan_history_sync(provider, locations, start_date, end_date, path=HISTORY_STORE_PATH):
+    """
+    Work out which date ranges each location is missing in [start_date, end_date].
+
+    Days without a real observation (never fetched, or only a placeholder) are holes,
+    both after a location's high-watermark and before it. Locations missing the same
+    range are grouped so they can share one batched request.
+
+    Returns:
+        Dictionary {(range_start, range_end): [locations]} with inclusive 'YYYY-MM-DD' bounds
+    """
+    index = build_availability_index(provider, locations, start_date, end_date, path)
+    plan = {}
+    for location, availability in index.items():
+        for key in plan_gap_ranges(
+            ~availability['observed'],
+            availability['origin'],
+            max_range_days=HISTORY_MAX_RANGE_DAYS.get(provider),
+            max_bridge_days=HISTORY_BRIDGE_DAYS.get(provider, 0)
+        ):
+            plan.setdefault(key, []).append(location)
+    return plan
+
+# Utility function to get the newest day whose daily values are final
+def latest_complete_day():
+    """
+    Return yesterday: today's daily row is still partial (or a forecast) and the
+    store never refreshes a stored day, so it must not be synced yet.
+    """
+    return pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=1)
+
+def sync_history_store(provider, locations, start_date, end_date, api_key=None, path=HISTORY_STORE_PATH):
+    """
+    Bring the store up to date for the given locations and window.
+
+    The window ends at latest_complete_day() at the latest.
+
+    Only the holes in each location's day bitmap (dates after its high-watermark, gaps
+    and placeholder days) are requested, as the fewest range requests, so a daily refresh
+    downloads one day per location and a re-run backfill only the days that failed.
+    Open-Meteo ranges are fetched for all locations sharing them in one batched request,
+    from the archive API for days the forecast API no longer serves.
+
+    Returns:
+        Tuple of (number of new rows, number of fetched ranges, list of error messages)
+    """
+    locations = list(dict.fromkeys(str(location).strip() for location in locations if str(location).strip()))
+    end_date = min(pd.Timestamp(end_date), latest_complete_day())
+    if pd.Timestamp(start_date) > end_date:
+        return 0, 0, []
+    plan = plan_history_sync(provider, locations, start_date, end_date, path)
+    new_rows = 0
+    errors = []
+    for (range_start, range_end), range_locations in plan.items():
+        if provider == 'open-meteo':
+            data, error_message = fetch_open_meteo_batch(range_locations, range_start, range_end)
+        elif provider == 'weatherapi':
+            error_message = None
+            for location in range_locations:
+                location_data, location_error = fetch_weather_data_from_api(
+                    location, range_start, range_end, api_key
+                )
+                if location_error:
+                    errors.append(f"{location}: {location_error}")
+                if location_data is not None and not location_data.empty:
+                    # Placeholder days are stored flagged, so they stay holes for the next sync
+                    new_rows += append_observations(
+                        provider, location_data.assign(Location=location), path,
+                        placeholder_dates=location_data.attrs.get('placeholder_dates')
+                    )
+            data = None
+        else:
+            raise ValueError(f"Unsupported history provider: {provider}")
+        
+        if error_message:
+            errors.append(error_message)
+        # Days without values are not stored, so later syncs retry them
+        if data is not None:
+            data = data.dropna(subset=HISTORY_COLUMNS, how='all')
+        new_rows += append_observations(provider, data, path)
+    return new_rows, len(plan), errors
+
+def load_history_store(provider, locations=None, start_date=None, end_date=None, path=HISTORY_STORE_PATH,
+                       include_placeholders=False):
+    """
+    Read observations from the store in the rainfall_data.csv schema (placeholder rows
+    are left out unless include_placeholders is set).
+
+    Returns:
+        DataFrame with columns Location, date, temperature, humidity, pressure, wind_speed, precipitation
+    """
+    query = "SELECT location AS Location, date, " + ', '.join(HISTORY_COLUMNS) + " FROM observations WHERE provider = ?"
+    params = [provider]
+    if not include_placeholders:
+        query += " AND placeholder = 0"
+    if locations:
+        query += f" AND location IN ({','.join('?' * len(locations))})"
+        params.extend(locations)
+    if start_date is not None:
+        query += " AND date >= ?"
+        params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+    if end_date is not None:
+        query += " AND date <= ?"
+        params.append(pd.Timestamp(end_date).strftime('%Y-%m-%d'))
+    with closing(connect_history_store(path)) as connection:
+        data = pd.read_sql_query(query + " ORDER BY location, date", connection, params=params)
+    data['date'] = pd.to_datetime(data['date'])
+    return data
+
+def history_store_summary(path=HISTORY_STORE_PATH):
+    """
+    Return rows, placeholders, first date and high-watermark per provider and location.
+    """
+    with closing(connect_history_store(path)) as connection:
+        return pd.read_sql_query(
+            "SELECT provider AS Provider, location AS Location, SUM(1 - placeholder) AS Rows, "
+            "SUM(placeholder) AS Placeholders, "
+            "MIN(date) AS 'First Date', MAX(date) AS 'Latest Date' "
+            "FROM observations GROUP BY provider, location ORDER BY provider, location",
+            connection
+        )
+
+# Utility function to add units to column names
+def add_units_to_columns(df):
+    """
+    Add units to column names for display purposes.
+    """
+    rename = {
+        col: col_with_unit for col, col_with_unit in COLUMN_UNITS.items()
+        if col in df.columns and col_with_unit not in df.columns
+    }
+    return df.rename(columns=rename)
+
+# Page sizes offered by the paginated table view
+TABLE_PAGE_SIZES = [25, 50, 100, 250, 500]
+
+# Utility function to filter and sort a frame without copying it
+def table_row_positions(df, sort_by=None, descending=False, filter_col=None, filter_text=""):
+    """
+    Compute the positional row order for a filtered and sorted table view.
+
+    Args:
+        df: DataFrame to display
+        sort_by: Column name to sort by, the index name (or "index") to sort by index, or None
+        descending: Sort in descending order
+        filter_col: Column to filter on, or None
+        filter_text: Substring to match for text columns, or "min:max" range for numeric columns
+
+    Returns:
+        numpy array of row positions in display order
+    """
+    positions = np.arange(len(df))
+
+    # Filtering
+    filter_text = filter_text.strip()
+    if filter_col in df.columns and filter_text:
+        col_values = df[filter_col]
+        if pd.api.types.is_numeric_dtype(col_values):
+            low, _, high = filter_text.partition(':')
+            try:
+                low = float(low) if low.strip() else -np.inf
+                high = float(high) if high.strip() else (low if ':' not in filter_text else np.inf)
+                mask = (col_values >= low) & (col_values <= high)
+            except ValueError:
+                mask = pd.Series(False, index=df.index)
+        else:
+            mask = col_values.astype(str).str.contains(filter_text, case=False, regex=False, na=False)
+        positions = positions[mask.values]
+
+    # Sorting (stable so equal keys keep their original order)
+    if sort_by is not None:
+        if sort_by in df.columns:
+            keys = df[sort_by].iloc[positions]
+        else:
+            keys = pd.Series(df.index[positions])
+        order = keys.reset_index(drop=True).sort_values(
+            ascending=not descending, kind='stable', na_position='last'
+        ).index.values
+        positions = positions[order]
+
+    return positions
+
+# Paginated table view that only sends the visible page to the browser
+def show_paginated_table(df, key, add_units=False, default_page_size=50):
+    """
+    Display a DataFrame one page at a time with sorting and filtering controls.
+
+    Sorting and filtering are done on the server; only the rows of the current
+    page are sliced out, formatted and serialized to the browser.
+
+    Args:
+        df: DataFrame to display
+        key: Unique widget key prefix for this table
+        add_units: Add units to column names of the displayed page
+        default_page_size: Initial number of rows per page
+    """
+    index_label = df.index.name or 'index'
+    sort_options = ["(none)", index_label] + [col for col in df.columns if col != index_label]
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_by = st.selectbox("Sort by", sort_options, key=f"{key}_sort_by")
+    with col2:
+        descending = st.checkbox("Descending", value=False, key=f"{key}_descending")
+    with col3:
+        filter_col = st.selectbox("Filter column", ["(none)"] + list(df.columns), key=f"{key}_filter_col")
+    with col4:
+        filter_text = st.text_input(
+            "Filter value",
+            value="",
+            key=f"{key}_filter_text",
+            help="Text to search for, or a min:max range for numeric columns"
+        )
+
+    positions = table_row_positions(
+        df,
+        sort_by=None if sort_by == "(none)" else sort_by,
+        descending=descending,
+        filter_col=None if filter_col == "(none)" else filter_col,
+        filter_text=filter_text
+    )
+
+    n_rows = len(positions)
+    page_size = st.session_state.get(f"{key}_page_size", default_page_size)
+    n_pages = max(1, int(np.ceil(n_rows / page_size)))
+
+    # Reset the page if the filter shrank the table below it
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = 1
+
+    # Slice out only the visible window
+    page = st.session_state.get(f"{key}_page", 1)
+    start = (page - 1) * page_size
+    end = min(start + page_size, n_rows)
+    page_df = df.iloc[positions[start:end]]
+
+    if isinstance(page_df.index, pd.DatetimeIndex):
+        page_df = page_df.reset_index()
+    if add_units:
+        page_df = add_units_to_columns(page_df)
+
+    st.dataframe(page_df, use_container_width=True)
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        st.number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+    with col2:
+        st.selectbox(
+            "Rows per page",
+            TABLE_PAGE_SIZES,
+            index=TABLE_PAGE_SIZES.index(default_page_size) if default_page_size in TABLE_PAGE_SIZES else 0,
+            key=f"{key}_page_size"
+        )
+    with col3:
+        st.caption(f"Showing rows {start + 1 if n_rows else 0}-{end} of {n_rows} (page {page} of {n_pages})")
+
+# Process uploaded data function
+def parse_uploaded_bytes(file_name, content):
+    """
+    Parse the bytes of an uploaded file and detect its date, target and weather columns.
+
+    Nothing is written to the page: messages are returned so a cached result can show them again.
+
+    Args:
+        file_name: Name of the uploaded file (its extension selects the parser)
+        content: File content as bytes
+
+    Returns:
+        Dict with 'data' (normalized frame or None), 'error', 'raw' (frame as uploaded, with units),
+        'roles' (detected column roles), 'schema' (column -> dtype class) and 'messages'
+        (list of (streamlit function name, text))
+    """
+    messages = []
+    roles = {}
+    uploaded_file = io.BytesIO(content)
+    
+    def failure(error, raw=None):
+        return {'data': None, 'error': error, 'raw': raw, 'roles': roles, 'schema': {}, 'messages': messages}
+    
+    try:
+        # Get file extension
+        file_extension = file_name.split('.')[-1].lower()
+        
+        # Read file based on extension
+        if file_extension == 'csv':
+            # Try different encodings and delimiters
+            try:
+                data = pd.read_csv(io.BytesIO(content))
+            except:
+                try:
+                    data = pd.read_csv(io.BytesIO(content), sep=';')
+                except:
+                    try:
+                        data = pd.read_csv(io.BytesIO(content), encoding='latin1')
+                    except:
+                        data = pd.read_csv(io.BytesIO(content), encoding='utf-8', sep=None, engine='python')
+        elif file_extension in ['xlsx', 'xls']:
+            data = pd.read_excel(uploaded_file)
+        elif file_extension == 'json':
+            data = pd.read_json(uploaded_file)
+        elif file_extension == 'txt':
+            # Try to detect delimiter for text files
+            try:
+                data = pd.read_csv(io.BytesIO(content), sep=None, engine='python')
+            except:
+                try:
+                    data = pd.read_csv(io.BytesIO(content), sep='\t')
+                except:
+                    data = pd.read_fwf(io.BytesIO(content))  # Fixed width format as last resort
+        elif file_extension == 'pdf':
+            # Try to extract tables from PDF
+            try:
+                import tabula
+                # Save the uploaded file temporarily
+                with open("temp.pdf", "wb") as f:
+                    f.write(content)
+                
+                # Extract tables from the PDF
+                tables = tabula.read_pdf("temp.pdf", pages='all', multiple_tables=True)
+                
+                if not tables:
+                    return failure("No tables found in the PDF file.")
+                
+                # Use the first table found
+                data = tables[0]
+                
+                # If multiple tables were found, show a message
+                if len(tables) > 1:
+                    messages.append(('info', f"Found {len(tables)} tables in the PDF. Using the first table. Upload individual pages for other tables."))
+                
+                # Clean up the temporary file
+                import os
+                os.remove("temp.pdf")
+                
+            except ImportError:
+                # If tabula-py is not installed, try PyPDF2
+                try:
+                    import PyPDF2
+                    import re
+                    
+                    # Save the uploaded file temporarily
+                    with open("temp.pdf", "wb") as f:
+                        f.write(content)
+                    
+                    # Extract text from the PDF
+                    pdf_file = open("temp.pdf", 'rb')
+                    pdf_reader = PyPDF2.PdfReader(pdf_file)
+                    
                     # Extract text from all pages
                     text = ""
                     for page_num in range(len(pdf_reader.pages)):
@@ -1690,7 +3458,7 @@ def process_uploaded_data(uploaded_file):
                     
                     # Assume the first line contains headers
                     if not lines:
-                        return None, "No text content found in the PDF."
+                        return failure("No text content found in the PDF.")
                     
                     headers = re.split(r'\s{2,}', lines[0].strip())
                     
@@ -1718,25 +3486,23 @@ def process_uploaded_data(uploaded_file):
                         
                         data = pd.DataFrame(rows, columns=headers)
                     else:
-                        return None, "Could not parse table structure from PDF."
+                        return failure("Could not parse table structure from PDF.")
                     
                 except ImportError:
-                    return None, "PDF processing libraries (tabula-py or PyPDF2) not installed. Please install them to process PDF files."
+                    return failure("PDF processing libraries (tabula-py or PyPDF2) not installed. Please install them to process PDF files.")
                 except Exception as e:
-                    return None, f"Error extracting data from PDF: {str(e)}"
+                    return failure(f"Error extracting data from PDF: {str(e)}")
         else:
-            return None, f"Unsupported file format: {file_extension}. Please use CSV, Excel, JSON, TXT, or PDF files."
+            return failure(f"Unsupported file format: {file_extension}. Please use CSV, Excel, JSON, TXT, or PDF files.")
         
         # Check if data is empty
         if data.empty:
-            return None, "Uploaded file contains no data"
+            return failure("Uploaded file contains no data")
         
-        # Add units to column names
+        # Add units to column names (kept as uploaded for the raw data view)
         data = add_units_to_columns(data)
-        
-        # Display raw data for debugging
-        st.write("### Raw Uploaded Data:")
-        st.dataframe(data, use_container_width=True)
+        raw = data
+        data = data.copy()
         
         # Try to identify date column
         date_col = None
@@ -1753,7 +3519,7 @@ def process_uploaded_data(uploaded_file):
                 date_col = first_col
             except:
                 # Create a date column if none exists
-                st.warning("No date column found. Creating a synthetic date column.")
+                messages.append(('warning', "No date column found. Creating a synthetic date column."))
                 data['date'] = pd.date_range(start='2023-01-01', periods=len(data), freq='D')
                 date_col = 'date'
         
@@ -1767,10 +3533,10 @@ def process_uploaded_data(uploaded_file):
             
             # Sort the index to ensure chronological order
             data = data.sort_index()
+            roles['date'] = date_col
             
         except Exception as e:
-            st.error(f"Error converting date column: {str(e)}")
-            return None, f"Failed to convert date column: {str(e)}"
+            return failure(f"Failed to convert date column: {str(e)}", raw)
         
         # Try to identify precipitation column
         precip_col = None
@@ -1785,7 +3551,7 @@ def process_uploaded_data(uploaded_file):
             if len(numeric_cols) > 0:
                 precip_col = numeric_cols[0]
                 data = data.rename(columns={precip_col: 'precipitation'})
-                st.info(f"Using '{precip_col}' as precipitation data.")
+                messages.append(('info', f"Using '{precip_col}' as precipitation data."))
             else:
                 # Try to convert columns to numeric
                 for col in data.columns:
@@ -1799,13 +3565,14 @@ def process_uploaded_data(uploaded_file):
                 if len(numeric_cols) > 0:
                     precip_col = numeric_cols[0]
                     data = data.rename(columns={precip_col: 'precipitation'})
-                    st.info(f"Using '{precip_col}' as precipitation data.")
+                    messages.append(('info', f"Using '{precip_col}' as precipitation data."))
                 else:
-                    return None, "No numeric columns found for precipitation"
+                    return failure("No numeric columns found for precipitation", raw)
         else:
             # Rename the identified precipitation column
             data = data.rename(columns={precip_col: 'precipitation'})
-            st.success(f"Using '{precip_col}' as precipitation data.")
+            messages.append(('success', f"Using '{precip_col}' as precipitation data."))
+        roles['precipitation'] = precip_col
         
         # Convert all remaining columns to numeric if possible
         for col in data.columns:
@@ -1825,21 +3592,253 @@ def process_uploaded_data(uploaded_file):
                     scale={'temperature': 5, 'humidity': 10, 'pressure': 5, 'wind_speed': 3}[col],
                     size=len(data)
                 )
-                st.info(f"Generated synthetic '{col}' data.")
+                messages.append(('info', f"Generated synthetic '{col}' data."))
+                roles[col] = None
             else:
                 matched_col = next(c for c in data.columns if col in c.lower())
                 if matched_col != col:
                     data = data.rename(columns={matched_col: col})
-                    st.success(f"Using '{matched_col}' as {col} data.")
+                    messages.append(('success', f"Using '{matched_col}' as {col} data."))
+                roles[col] = matched_col
         
-        return data, None
+        schema = {col: dtype_class(dtype) for col, dtype in data.dtypes.items()}
+        return {'data': data, 'error': None, 'raw': raw, 'roles': roles, 'schema': schema, 'messages': messages}
     except Exception as e:
-        return None, f"Error processing file: {str(e)}"
+        return failure(f"Error processing file: {str(e)}")
+
+# Parsed uploads kept per session (most recent last)
+UPLOAD_CACHE_MAX_ENTRIES = 4
+
+# Function to parse an upload once per distinct file content
+def load_uploaded_file(uploaded_file):
+    """
+    Return the parsed upload, reusing the session's cached result for identical bytes.
+
+    The cache key is the SHA-1 of the file content plus the file name, so reruns
+    (changing the target variable, moving a slider) never re-read the file. The raw
+    data view and the parsing messages are shown from the cached result.
+
+    Args:
+        uploaded_file: File uploaded by the user
+
+    Returns:
+        Parsed upload dict from parse_uploaded_bytes
+    """
+    content = uploaded_file.getvalue()
+    key = (uploaded_file.name, hashlib.sha1(content).hexdigest())
+    cache = st.session_state.setdefault('upload_cache', OrderedDict())
+    entry = cache.get(key)
+    if entry is None:
+        entry = parse_uploaded_bytes(uploaded_file.name, content)
+        session_cache_put(cache, key, entry, UPLOAD_CACHE_MAX_ENTRIES)
+    else:
+        cache.move_to_end(key)
+    
+    # Display raw data for debugging
+    if entry['raw'] is not None:
+        st.write("### Raw Uploaded Data:")
+        show_paginated_table(entry['raw'], key="raw_upload")
+    for level, message in entry['messages']:
+        getattr(st, level)(message)
+    return entry
+
+# Utility function to get the uploaded data with a chosen target, reusing it across reruns
+def upload_target_frame(upload, target_variable):
+    """
+    Return the uploaded data with target_variable copied to 'precipitation'.
+
+    An existing precipitation column is kept as 'original_precipitation'. The frame
+    for the latest target is kept in the cached upload entry, so reruns hand the
+    same object to share_session_dataset and the data is not hashed again.
+
+    Args:
+        upload: Parsed upload dict from load_uploaded_file
+        target_variable: Column to predict
+
+    Returns:
+        DataFrame with the target in the 'precipitation' column
+    """
+    cached = upload.get('target_frame')
+    if cached is not None and cached[0] == target_variable:
+        return cached[1]
+    
+    # Make a copy to avoid modifying the original
+    data_copy = upload['data'].copy()
+    # If precipitation exists, temporarily store it
+    if 'precipitation' in data_copy.columns:
+        data_copy['original_precipitation'] = data_copy['precipitation']
+    # Rename target to precipitation for model compatibility
+    data_copy['precipitation'] = data_copy[target_variable]
+    upload['target_frame'] = (target_variable, data_copy)
+    return data_copy
+
+def process_uploaded_data(uploaded_file):
+    """
+    Process uploaded data file and add units to column names.
+    
+    Args:
+        uploaded_file: File uploaded by the user
+        
+    Returns:
+        Tuple of (data, error_message)
+    """
+    entry = load_uploaded_file(uploaded_file)
+    return entry['data'], entry['error']
+
+# Quantiles emitted by the probabilistic forecast mode (P10, P50, P90)
+FORECAST_QUANTILES = (0.1, 0.5, 0.9)
+
+def quantile_column(column_name, q):
+    """
+    Name of the forecast column holding quantile q of column_name (e.g. precipitation_p10).
+    """
+    return f"{column_name}_p{int(round(q * 100))}"
+
+def forest_leaf_value_table(model):
+    """
+    Build a (n_trees, max_nodes) table of node values for a fitted Random Forest.
+
+    The table is built once per fitted model and kept on the model object.
+    """
+    table = getattr(model, '_leaf_value_table', None)
+    if table is None:
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        table = np.zeros((len(trees), max(tree.node_count for tree in trees)))
+        for i, tree in enumerate(trees):
+            table[i, :tree.node_count] = tree.value[:, 0, 0]
+        model._leaf_value_table = table
+    return table
+
+def forest_tree_predictions(model, X):
+    """
+    Predictions of every tree of a Random Forest as one (n_samples, n_trees) array.
+
+    Leaf indices for all trees come from a single model.apply call and are mapped
+    to leaf values with one vectorized lookup.
+    """
+    leaves = model.apply(X)
+    table = forest_leaf_value_table(model)
+    return table[np.arange(table.shape[0])[np.newaxis, :], leaves]
+
+def final_estimator(model):
+    """
+    Return the last step of a pipeline, or the model itself.
+    """
+    return model[-1] if hasattr(model, 'steps') else model
+
+def forest_quantile_predictions(model, X, quantiles=FORECAST_QUANTILES):
+    """
+    Quantiles of the per-tree predictions of a Random Forest (optionally wrapped in a pipeline).
+
+    Returns:
+        Array of shape (len(quantiles), n_samples)
+    """
+    if hasattr(model, 'steps'):
+        X = model[:-1].transform(X)
+        model = model[-1]
+    return np.quantile(forest_tree_predictions(model, X), quantiles, axis=1)
+
+def smooth_predictions(predictions):
+    """
+    Apply exponential smoothing to avoid extreme jumps between consecutive forecast steps.
+
+    Works along the last axis, so a (n_scenarios, horizon) matrix is smoothed one step at a time for all scenarios.
+    """
+    smoothed_predictions = np.copy(predictions)
+    for i in range(1, predictions.shape[-1]):
+        smoothed_predictions[..., i] = 0.7 * predictions[..., i] + 0.3 * smoothed_predictions[..., i-1]
+    return smoothed_predictions
+
+# Upper bound on scenarios x horizon rows predicted in one ensemble batch
+ENSEMBLE_MAX_ROWS = 2_000_000
+
+def predict_covariate_ensemble(model, future_df, feature_cols, avg_values, month_temp_factors,
+                               month_humidity_factors, n_scenarios, random_state=None,
+                               imputer=None, scaler=None, dtype=np.float64, history_tail=None):
+    """
+    Predict precipitation for many random future covariate scenarios with one predict call.
+
+    Temperature, humidity, pressure and wind speed are sampled for all scenarios at once
+    with the same seasonal rules as the single-path forecast, stacked into one
+    (n_scenarios * horizon, features) matrix and passed through the imputer, scaler and model once.
+
+    Args:
+        model: Fitted ML model
+        future_df: Future frame with date features (one row per forecast step)
+        feature_cols: Feature columns used during training
+        avg_values: Historical averages of the weather parameters
+        month_temp_factors, month_humidity_factors: Seasonal factors keyed by month
+        n_scenarios: Number of scenarios (K)
+        random_state: Seed for the random generator
+        imputer, scaler: Fitted preprocessing steps (optional)
+        dtype: dtype of the stacked feature matrix (float32 in compact mode)
+        history_tail: Latest observed precipitation; when given, lag features are filled
+            recursively with one predict call per step over all scenarios
+
+    Returns:
+        Tuple of (predictions of shape (K, horizon), dict of mean covariate paths)
+    """
+    rng = np.random.default_rng(random_state)
+    horizon = len(future_df)
+    
+    # Keep the batch within the memory budget
+    n_scenarios = max(1, min(n_scenarios, ENSEMBLE_MAX_ROWS // max(horizon, 1)))
+    shape = (n_scenarios, horizon)
+    
+    # Month lookup tables (index = month number)
+    months = future_df['month'].to_numpy()
+    temp_factor = np.array([0] + [month_temp_factors[m] for m in range(1, 13)])[months]
+    humidity_factor = np.array([0] + [month_humidity_factors[m] for m in range(1, 13)])[months]
+    
+    scenarios = {
+        'temperature': avg_values['temperature'] * temp_factor * (1 + rng.normal(0, 0.1, size=shape)),
+        'humidity': np.clip(avg_values['humidity'] * humidity_factor * (1 + rng.normal(0, 0.1, size=shape)), 30, 95),
+        'pressure': avg_values['pressure'] + rng.normal(0, 5, size=shape),
+        'wind_speed': np.maximum(0, avg_values['wind_speed'] + rng.normal(0, 2, size=shape))
+    }
+    
+    # Stack all scenarios into one feature matrix; non-sampled features are repeated per scenario
+    X_ensemble = np.empty((n_scenarios * horizon, len(feature_cols)), dtype=dtype)
+    for j, col in enumerate(feature_cols):
+        if col in scenarios:
+            X_ensemble[:, j] = scenarios[col].ravel()
+        else:
+            X_ensemble[:, j] = np.tile(future_df[col].to_numpy(dtype=float), n_scenarios)
+    covariate_means = {col: values.mean(axis=0) for col, values in scenarios.items()}
+    
+    if history_tail is not None:
+        predictions, _ = recursive_lag_predict(
+            model, X_ensemble.reshape(n_scenarios, horizon, -1), feature_cols, history_tail,
+            imputer=imputer, scaler=scaler
+        )
+        return predictions, covariate_means
+    
+    X_ensemble = pd.DataFrame(X_ensemble, columns=list(feature_cols))
+    
+    if imputer is not None:
+        X_ensemble = pd.DataFrame(imputer.transform(X_ensemble), columns=X_ensemble.columns)
+    if scaler is not None:
+        X_ensemble = scaler.transform(X_ensemble)
+    
+    predictions = np.asarray(model.predict(X_ensemble)).reshape(shape)
+    return predictions, covariate_means
 
 # Function to generate future forecast
-def generate_forecast(data, model, periods=30, time_granularity='D', forecast_unit='days', forecast_days=30, scaler=None, feature_cols=None, imputer=None):
+def generate_forecast(data, model, periods=30, time_granularity='D', forecast_unit='days', forecast_days=30, scaler=None, feature_cols=None, imputer=None, quantiles=None, n_scenarios=None, random_state=None, compact=False):
     """
     Generate forecast for future periods using the trained model.
+
+    If quantiles is given (e.g. FORECAST_QUANTILES) and the model is a Random Forest,
+    the per-tree quantiles are added as precipitation_p10/_p50/_p90 columns.
+
+    If n_scenarios > 1 (ML models only), the forecast is the mean over that many
+    sampled covariate scenarios (seeded by random_state) and precipitation_std holds
+    their spread; requested quantiles are then taken across scenarios.
+
+    With compact=True the features are built, scaled and predicted as float32.
+
+    Models trained with the lag/rolling precipitation features are forecast recursively:
+    each step's lags come from the latest observations and the earlier predicted steps.
     """
     # Convert forecast_days to periods based on forecast_unit
     if forecast_unit.lower() == 'days':
@@ -1881,22 +3880,8 @@ def generate_forecast(data, model, periods=30, time_granularity='D', forecast_un
     future_df = pd.DataFrame(index=future_dates)
     future_df['date'] = future_dates
     
-    # Extract date features
-    future_df['day_of_year'] = future_df['date'].dt.dayofyear
-    future_df['month'] = future_df['date'].dt.month
-    
-    # Add season code
-    def get_season_code(month):
-        if month in [12, 1, 2]:
-            return 0  # Winter
-        elif month in [3, 4, 5]:
-            return 1  # Summer
-        elif month in [6, 7, 8, 9]:
-            return 2  # Monsoon
-        else:
-            return 3  # Post-Monsoon
-    
-    future_df['season_code'] = future_df['month'].apply(get_season_code)
+    # Extract date features (same calendar stage as training)
+    future_df = add_calendar_features(future_df)
     
     # Calculate average values from historical data
     avg_values = {}
@@ -1997,6 +3982,11 @@ def generate_forecast(data, model, periods=30, time_granularity='D', forecast_un
                 # Default feature columns if we can't determine from model
                 feature_cols = ['temperature', 'humidity', 'pressure', 'wind_speed', 'day_of_year', 'month']
         
+        # Lag features need the latest observed precipitation to seed the recursion
+        history_tail = None
+        if any(col in PRECIP_LAG_FEATURES for col in feature_cols):
+            history_tail = precipitation_history_tail(data, fallback=avg_values['precipitation'])
+        
         # Ensure all required features are present in future_df
         for col in feature_cols:
             if col not in future_df.columns:
@@ -2007,7 +3997,7 @@ def generate_forecast(data, model, periods=30, time_granularity='D', forecast_un
                     future_df[col] = 0
         
         # Select only the features used during training
-        X_future = future_df[feature_cols].copy()
+        X_future = future_df[feature_cols].astype(COMPACT_FLOAT_DTYPE if compact else np.float64)
         
         # Handle missing values if imputer is provided
         if imputer is not None:
@@ -2021,25 +4011,65 @@ def generate_forecast(data, model, periods=30, time_granularity='D', forecast_un
         
         # Make predictions
         try:
-            predictions = model.predict(X_future_scaled)
+            scenario_predictions = None
+            if n_scenarios and n_scenarios > 1:
+                # Monte Carlo ensemble: one batched predict over all covariate scenarios
+                scenario_predictions, covariate_means = predict_covariate_ensemble(
+                    model, future_df, feature_cols, avg_values,
+                    month_temp_factors, month_humidity_factors,
+                    n_scenarios, random_state=random_state,
+                    imputer=imputer, scaler=scaler,
+                    dtype=COMPACT_FLOAT_DTYPE if compact else np.float64,
+                    history_tail=history_tail
+                )
+                for col, values in covariate_means.items():
+                    future_df[col] = values
+                scenario_predictions = np.maximum(scenario_predictions, 0)
+                if scenario_predictions.shape[1] > 1:
+                    scenario_predictions = smooth_predictions(scenario_predictions)
+                predictions = scenario_predictions.mean(axis=0)
+            elif history_tail is not None:
+                # Recursive strategy: lags of each step come from the steps predicted before it
+                path_predictions, path_inputs = recursive_lag_predict(
+                    model, X_future.to_numpy()[np.newaxis], feature_cols, history_tail,
+                    imputer=imputer, scaler=scaler
+                )
+                predictions = path_predictions[0]
+                X_future_scaled = path_inputs[0]
+            else:
+                predictions = model.predict(X_future_scaled)
             
             # Apply post-processing to predictions to make them more realistic
             # 1. Ensure no negative values
             predictions = np.maximum(predictions, 0)
             
-            # 2. Apply smoothing to avoid extreme jumps
-            if len(predictions) > 1:
-                smoothed_predictions = np.copy(predictions)
-                for i in range(1, len(predictions)):
-                    smoothed_predictions[i] = 0.7 * predictions[i] + 0.3 * smoothed_predictions[i-1]
-                predictions = smoothed_predictions
+            # 2. Apply smoothing to avoid extreme jumps (scenarios are already smoothed)
+            if len(predictions) > 1 and scenario_predictions is None:
+                predictions = smooth_predictions(predictions)
             
             # 3. Scale predictions to be in a reasonable range
+            scale_factor = 1.0
             if np.mean(predictions) > 3 * avg_values['precipitation']:
-                predictions = predictions * (avg_values['precipitation'] / np.mean(predictions)) * 2
+                scale_factor = (avg_values['precipitation'] / np.mean(predictions)) * 2
+                predictions = predictions * scale_factor
             
             future_df['precipitation'] = predictions
             
+            # 4. Probabilistic bands from the scenario spread or from the Random Forest trees
+            if scenario_predictions is not None:
+                future_df['precipitation_std'] = scenario_predictions.std(axis=0) * scale_factor
+                if quantiles:
+                    bands = np.quantile(scenario_predictions, quantiles, axis=0)
+                    for q, band in zip(quantiles, bands):
+                        future_df[quantile_column('precipitation', q)] = band * scale_factor
+            elif quantiles and isinstance(final_estimator(model), RandomForestRegressor):
+                bands = forest_quantile_predictions(model, X_future_scaled, quantiles)
+                for q, band in zip(quantiles, bands):
+                    band = np.maximum(band, 0)
+                    if len(band) > 1:
+                        band = smooth_predictions(band)
+                    future_df[quantile_column('precipitation', q)] = band * scale_factor
+            
         except Exception as e:
             st.warning(f"Prediction failed: {str(e)}. Using seasonal patterns instead.")
             # Use seasonal patterns for precipitation if prediction fails
@@ -2063,6 +4093,9 @@ def generate_forecast(data, model, periods=30, time_granularity='D', forecast_un
                              (1 + np.random.normal(0, 0.3)))  # Add some randomness
             )
     
+    # Lag features are model inputs only, not forecast output
+    future_df = future_df.drop(columns=PRECIP_LAG_FEATURES, errors='ignore')
+    
     # Ensure no negative precipitation
     future_df['precipitation'] = future_df['precipitation'].clip(lower=0)
     
@@ -2090,40 +4123,137 @@ def generate_forecast(data, model, periods=30, time_granularity='D', forecast_un
     
     return future_df
 
-def plot_historical_and_forecast(historical_data, forecast_data, column_name, display_name=None, title=None):
+# Maximum number of points sent to the browser per chart trace
+PLOT_MAX_POINTS = 2000
+
+# Traces longer than this are drawn with WebGL (go.Scattergl) instead of SVG
+WEBGL_POINT_THRESHOLD = 1000
+
+# Largest-Triangle-Three-Buckets downsampling for line charts
+def lttb_downsample(x, y, n_out):
     """
-    Plot historical data and forecast together with no gaps.
+    Select the indices of at most n_out points that preserve the visual shape of a series.
+
+    Args:
+        x: Array of x values (numeric or datetime64), sorted ascending
+        y: Array of y values
+        n_out: Target number of points (the point budget)
+
+    Returns:
+        numpy array of selected positional indices, always including the first and last point
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+
+    if n_out is None or n_out < 3 or n <= n_out:
+        return np.arange(n)
+
+    # Work on a float x axis so datetimes can be used in the area calculation
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.view('int64')
+    x = x.astype(float)
+
+    # Bucket boundaries for the points between the first and the last one
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average point of the next bucket (the last bucket looks ahead to the final point)
+        next_start = edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Pick the point forming the largest triangle with the previous selection and the next average
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+def downsample_series(dates, values, max_points=PLOT_MAX_POINTS):
+    """
+    Downsample a date/value series to the point budget using LTTB.
+
+    Missing values are dropped before downsampling so they cannot dominate the triangle areas.
+
+    Returns:
+        Tuple of (dates, values) as pandas Series
+    """
+    if max_points is None or len(values) <= max_points:
+        return dates, values
+
+    mask = values.notna().values & dates.notna().values
+    dates = dates[mask]
+    values = values[mask]
+
+    idx = lttb_downsample(dates.values, values.values, max_points)
+    return dates.iloc[idx], values.iloc[idx]
+
+def make_line_trace(x, y, max_points=PLOT_MAX_POINTS, **kwargs):
+    """
+    Build a line trace with a bounded number of points.
+
+    The series is downsampled to max_points and drawn with WebGL when it is
+    still longer than WEBGL_POINT_THRESHOLD.
+    """
+    x, y = downsample_series(x, y, max_points)
+    trace_cls = go.Scattergl if len(y) > WEBGL_POINT_THRESHOLD else go.Scatter
+    return trace_cls(x=x, y=y, **kwargs)
+
+# Normalize historical and forecast frames for plotting (once per forecast run)
+def prepare_forecast_plot_data(historical_data, forecast_data):
+    """
+    Prepare historical and forecast data for plotting.
+
+    Both frames are copied once and given a datetime 'date' column so that every
+    forecast tab can reuse them without repeating the copies and date conversions.
+
+    Args:
+        historical_data: DataFrame with historical observations
+        forecast_data: DataFrame returned by generate_forecast
+
+    Returns:
+        Dictionary with 'historical' and 'forecast' DataFrames, or None if the
+        forecast has no date information
     """
-    if display_name is None:
-        display_name = column_name
-    
-    if title is None:
-        title = f"{display_name} Historical Data and Forecast"
-    
-    # Debug information
-    # st.write(f"Historical data shape: {historical_data.shape}")
-    # st.write(f"Historical data columns: {historical_data.columns.tolist()}")
-    # st.write(f"Forecast data shape: {forecast_data.shape}")
-    # st.write(f"Forecast data columns: {forecast_data.columns.tolist()}")
-    
-    # Create figure directly with plotly
-    fig = go.Figure()
-    
     # Prepare historical data for plotting
     hist_df = historical_data.copy()
     
+    # Check for datetime column and rename it to date if found
+    if 'datetime' in hist_df.columns and 'date' not in hist_df.columns:
+        hist_df = hist_df.rename(columns={'datetime': 'date'})
+    
     # CRITICAL: Ensure historical data has a date column
     if 'date' not in hist_df.columns:
-        ###warning("No 'date' column found in historical data. Creating synthetic dates.")
-        hist_df['date'] = pd.date_range(
-            end=pd.Timestamp.today() - pd.Timedelta(days=1),
-            periods=len(hist_df),
-            freq='D'
-        )
+        if isinstance(hist_df.index, pd.DatetimeIndex):
+            # Use the date index so the historical and forecast traces line up
+            hist_df['date'] = hist_df.index
+        else:
+            # Try to find a date-like column
+            date_cols = [col for col in hist_df.columns if any(term in str(col).lower() for term in ['date', 'time', 'day'])]
+            if date_cols:
+                hist_df = hist_df.rename(columns={date_cols[0]: 'date'})
+            else:
+                # Create synthetic dates if no suitable column found
+                hist_df['date'] = pd.date_range(
+                    end=pd.Timestamp.today() - pd.Timedelta(days=1),
+                    periods=len(hist_df),
+                    freq='D'
+                )
     
     # Ensure date column is datetime type
     hist_df['date'] = pd.to_datetime(hist_df['date'])
-    hist_dates = hist_df['date']
     
     # Prepare forecast data for plotting
     fore_df = forecast_data.copy()
@@ -2134,12 +4264,52 @@ def plot_historical_and_forecast(historical_data, forecast_data, column_name, di
             fore_df = fore_df.reset_index()
             fore_df.rename(columns={'index': 'date'}, inplace=True)
         else:
-            st.warning("No date information found in forecast data.")
-            return
+            return None
     
     # Ensure date column is datetime type
     fore_df['date'] = pd.to_datetime(fore_df['date'])
-    fore_dates = fore_df['date']
+    
+    return {'historical': hist_df, 'forecast': fore_df}
+
+def show_forecast_debug_data(prepared):
+    """
+    Show the first and last few rows of the prepared historical and forecast data.
+    """
+    with st.expander("Debug Data"):
+        st.write("Historical Data (first 5 rows):")
+        st.write(prepared['historical'].head())
+        st.write("Historical Data (last 5 rows):")
+        st.write(prepared['historical'].tail())
+        st.write("Forecast Data (first 5 rows):")
+        st.write(prepared['forecast'].head())
+        st.write("Forecast Data (last 5 rows):")
+        st.write(prepared['forecast'].tail())
+
+def plot_historical_and_forecast(historical_data, forecast_data, column_name, display_name=None, title=None, max_points=PLOT_MAX_POINTS, prepared=None):
+    """
+    Plot historical data and forecast together with no gaps.
+
+    Each trace is limited to max_points points (None disables downsampling).
+    Pass the result of prepare_forecast_plot_data as prepared to reuse the
+    normalized frames across several charts; historical_data and forecast_data
+    are then ignored.
+    """
+    if display_name is None:
+        display_name = column_name
+    
+    if title is None:
+        title = f"{display_name} Historical Data and Forecast"
+    
+    # Normalize the frames unless the caller already did it for this forecast run
+    show_debug = prepared is None
+    if prepared is None:
+        prepared = prepare_forecast_plot_data(historical_data, forecast_data)
+        if prepared is None:
+            st.warning("No date information found in forecast data.")
+            return
+    
+    hist_df = prepared['historical']
+    fore_df = prepared['forecast']
     
     # Get historical values
     if column_name in hist_df.columns:
@@ -2155,19 +4325,47 @@ def plot_historical_and_forecast(historical_data, forecast_data, column_name, di
         st.error(f"Column '{column_name}' not found in forecast data")
         return
     
-    # Add historical trace
-    fig.add_trace(go.Scatter(
-        x=hist_dates,
-        y=hist_values,
+    # Create figure directly with plotly
+    fig = go.Figure()
+    
+    # Add historical trace (downsampled to the point budget)
+    fig.add_trace(make_line_trace(
+        hist_df['date'],
+        hist_values,
+        max_points=max_points,
         name='Historical Data',
         line=dict(color='blue'),
         mode='lines'
     ))
     
-    # Add forecast trace
-    fig.add_trace(go.Scatter(
-        x=fore_dates,
-        y=fore_values,
+    # Add the probabilistic band (lowest to highest quantile) if the forecast has one
+    lower_col = quantile_column(column_name, min(FORECAST_QUANTILES))
+    upper_col = quantile_column(column_name, max(FORECAST_QUANTILES))
+    if lower_col in fore_df.columns and upper_col in fore_df.columns:
+        fig.add_trace(make_line_trace(
+            fore_df['date'],
+            fore_df[upper_col],
+            max_points=max_points,
+            name=upper_col,
+            line=dict(color='rgba(255, 0, 0, 0.3)', width=0),
+            mode='lines'
+        ))
+        fig.add_trace(make_line_trace(
+            fore_df['date'],
+            fore_df[lower_col],
+            max_points=max_points,
+            name=lower_col,
+            line=dict(color='rgba(255, 0, 0, 0.3)', width=0),
+            fill='tonexty',
+            fillcolor='rgba(255, 0, 0, 0.15)',
+            mode='lines'
+        ))
+    
+    # Add forecast trace (downsampled to the point budget)
+    fig.add_trace(make_line_trace(
+        fore_df['date'],
+        fore_values,
+        max_points=max_points,
         name='Forecast',
         line=dict(color='red', dash='dash'),
         mode='lines'
@@ -2186,24 +4384,186 @@ def plot_historical_and_forecast(historical_data, forecast_data, column_name, di
     st.plotly_chart(fig, use_container_width=True)
     
     # Debug: Show the first and last few rows of each dataset
-    with st.expander("Debug Data"):
-        st.write("Historical Data (first 5 rows):")
-        st.write(hist_df.head())
-        st.write("Historical Data (last 5 rows):")
-        st.write(hist_df.tail())
-        st.write("Forecast Data (first 5 rows):")
-        st.write(fore_df.head())
-        st.write("Forecast Data (last 5 rows):")
-        st.write(fore_df.tail())
+    if show_debug:
+        show_forecast_debug_data(prepared)
+
+# Hyperparameter search spaces for the ensemble models
+TUNING_PARAM_SPACES = {
+    'Random Forest': {
+        'max_depth': [3, 5, 8, 12, None],
+        'min_samples_leaf': [1, 3, 5, 10],
+        'max_features': [1.0, 0.5, 'sqrt']
+    },
+    'Gradient Boosting': {
+        'learning_rate': [0.01, 0.03, 0.05, 0.1, 0.2],
+        'max_depth': [2, 3, 4, 5],
+        'min_samples_leaf': [1, 3, 5, 10],
+        'subsample': [0.7, 0.85, 1.0]
+    }
+}
+
+TUNING_MODEL_CLASSES = {
+    'Random Forest': RandomForestRegressor,
+    'Gradient Boosting': GradientBoostingRegressor
+}
+
+# Wall-clock budget (seconds) for tuning one model
+TUNING_BUDGET_SECONDS = 30
+
+# Tuning needs enough rows for time-ordered validation folds
+TUNING_MIN_ROWS = 30
+
+def score_candidate_on_fold(model_class, params, X, y, train_idx, val_idx, deadline=None):
+    """
+    Fit one candidate on a training fold and return its validation RMSE
+    (None without fitting once the time.time() deadline has passed).
+    """
+    if deadline is not None and time.time() > deadline:
+        return None
+    model = model_class(**params, random_state=42)
+    model.fit(X[train_idx], y[train_idx])
+    return np.sqrt(mean_squared_error(y[val_idx], model.predict(X[val_idx])))
+
+def successive_halving_search(model_name, X_train, y_train, n_candidates=27, eta=3,
+                              min_estimators=10, max_estimators=200, n_splits=3,
+                              budget_seconds=TUNING_BUDGET_SECONDS, n_jobs=-1):
+    """
+    Tune an ensemble model with successive halving over time-ordered folds.
+
+    All candidates start with min_estimators trees; after each rung only the best
+    1/eta of them survive and get eta times more trees, until max_estimators is
+    reached or the wall-clock budget runs out. Candidate/fold fits of a rung run in
+    parallel workers; fits that would start after the deadline are skipped, so the
+    budget is overrun by at most the fits already running, and only fully scored
+    candidates are ranked.
+
+    Args:
+        model_name: 'Random Forest' or 'Gradient Boosting'
+        X_train: Training features
+        y_train: Training target (a date index is used to restore time order)
+        n_candidates: Number of sampled configurations in the first rung
+        eta: Halving factor
+        min_estimators, max_estimators: Resource range (number of trees)
+        n_splits: Number of TimeSeriesSplit folds
+        budget_seconds: Wall-clock budget
+        n_jobs: Number of parallel workers
+
+    Returns:
+        Dictionary with the best hyperparameters (including n_estimators)
+    """
+    deadline = time.time() + budget_seconds
+    model_class = TUNING_MODEL_CLASSES[model_name]
+    
+    # Restore chronological order so validation folds always lie after their training folds
+    X = np.asarray(X_train)
+    y = np.asarray(y_train, dtype=float)
+    if isinstance(getattr(y_train, 'index', None), pd.DatetimeIndex):
+        order = np.argsort(y_train.index.values, kind='stable')
+        X, y = X[order], y[order]
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    
+    candidates = list(ParameterSampler(TUNING_PARAM_SPACES[model_name], n_iter=n_candidates, random_state=42))
+    n_estimators = min_estimators
+    best_params = dict(candidates[0], n_estimators=n_estimators)
+    
+    with Parallel(n_jobs=n_jobs) as parallel:
+        while candidates:
+            rung = [dict(params, n_estimators=n_estimators) for params in candidates]
+            scores = parallel(
+                delayed(score_candidate_on_fold)(model_class, params, X, y, train_idx, val_idx, deadline)
+                for params in rung
+                for train_idx, val_idx in folds
+            )
+            scores = np.array([np.nan if score is None else score for score in scores]).reshape(len(rung), len(folds))
+            complete = ~np.isnan(scores).any(axis=1)
+            if complete.any():
+                # Candidates cut off by the deadline rank last
+                ranking = np.argsort(np.where(complete, scores.mean(axis=1), np.inf))
+                best_params = rung[ranking[0]]
+            
+            # Stop at full resource, a single survivor, or when the budget is spent
+            if n_estimators >= max_estimators or len(candidates) == 1:
+                break
+            if not complete.all() or time.time() > deadline:
+                break
+            
+            candidates = [candidates[i] for i in ranking[:max(1, len(candidates) // eta)]]
+            n_estimators = min(max_estimators, n_estimators * eta)
+    
+    return best_params
+
+def get_tuned_params(model_name, X_train, y_train, budget_seconds=TUNING_BUDGET_SECONDS):
+    """
+    Return tuned hyperparameters for a model, cached per dataset fingerprint.
+
+    Routine retrains on the same training data reuse the cached configuration
+    instead of searching again.
+    """
+    cache = st.session_state.setdefault('tuned_params_cache', OrderedDict())
+    key = (model_name, dataset_fingerprint(X_train, y_train))
+    if key not in cache:
+        params = successive_halving_search(model_name, X_train, y_train, budget_seconds=budget_seconds)
+        session_cache_put(cache, key, params, TUNED_PARAMS_CACHE_MAX_ENTRIES)
+    else:
+        cache.move_to_end(key)
+    return cache[key]
+
+# Datasets with at least this many rows use the histogram-based boosting engine
+FAST_ENGINE_MIN_ROWS = 200_000
+
+def use_fast_engine(n_rows):
+    """
+    Decide whether the histogram-based boosting engine should replace Gradient Boosting.
+    """
+    return n_rows >= FAST_ENGINE_MIN_ROWS
+
+def train_ml_models(X_train, y_train, tune=False, fast_engine=False):
+    """
+    Train the ML models.
 
-def train_ml_models(X_train, y_train):
+    With tune=True the Random Forest and Gradient Boosting hyperparameters come
+    from a budgeted successive-halving search (cached per dataset); otherwise
+    they are derived from the data size.
+
+    With fast_engine=True Gradient Boosting is replaced by a histogram-based
+    boosting model with early stopping. X_train may then contain missing values:
+    the boosting model handles them natively and the other models impute them
+    inside their own pipeline.
+    """
     st.write("Training machine learning models...")
     
+    # Replace the heuristics with tuned settings when requested and the data allows it
+    tuned_params = {}
+    if tune and len(X_train) >= TUNING_MIN_ROWS:
+        for name in TUNING_MODEL_CLASSES:
+            if name in build_ml_models(len(X_train), fast_engine):
+                tuned_params[name] = get_tuned_params(name, X_train, y_train)
+    elif tune:
+        st.info(f"At least {TUNING_MIN_ROWS} training rows are needed for tuning. Using default hyperparameters.")
+    
+    models = build_ml_models(len(X_train), fast_engine, tuned_params)
+    for name, model in models.items():
+        model.fit(X_train, y_train)
+    
+    return models
+
+def build_ml_models(n_rows, fast_engine=False, tuned_params=None):
+    """
+    Create the (unfitted) ML models for a training set of n_rows rows.
+
+    Args:
+        n_rows: Number of training rows
+        fast_engine: Use histogram-based boosting and imputing pipelines
+        tuned_params: Optional {model name: hyperparameters} overriding the size heuristics
+
+    Returns:
+        Dictionary of model name to unfitted estimator
+    """
     # Adjust model complexity based on data size
-    n_estimators = min(100, max(10, len(X_train) // 2))
+    n_estimators = min(100, max(10, n_rows // 2))
     
     # Calculate max_depth ensuring it's at least 1
-    max_depth_value = max(1, min(10, len(X_train) // 10))
+    max_depth_value = max(1, min(10, n_rows // 10))
     
     # Create more robust models with better hyperparameters
     models = {
@@ -2223,11 +4583,323 @@ def train_ml_models(X_train, y_train):
         )
     }
     
-    for name, model in models.items():
-        model.fit(X_train, y_train)
+    # Swap in the histogram-based engine for large datasets
+    if fast_engine:
+        del models['Gradient Boosting']
+        models['Hist Gradient Boosting'] = HistGradientBoostingRegressor(
+            max_iter=500,
+            learning_rate=0.1,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=10,
+            random_state=42
+        )
+    
+    # Tuned settings replace the heuristics
+    for name, params in (tuned_params or {}).items():
+        if name in models:
+            models[name] = TUNING_MODEL_CLASSES[name](**params, random_state=42)
+    
+    # Models without native missing-value support impute inside their own pipeline
+    if fast_engine:
+        for name in ['Linear Regression', 'Random Forest']:
+            models[name] = make_pipeline(SimpleImputer(strategy='mean'), models[name])
     
     return models
 
+# Background training: jobs run in a worker pool while the page keeps rendering
+TRAINING_WORKERS = 2
+TRAINING_POLL_SECONDS = 1.0
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+class TrainingCancelled(Exception):
+    """Raised inside a training job when its cancellation was requested."""
+
+@st.cache_resource
+def get_training_executor():
+    """
+    Return the worker pool for training jobs, shared by all reruns and sessions.
+    """
+    return ThreadPoolExecutor(max_workers=TRAINING_WORKERS, thread_name_prefix='training')
+
+# Utility function to identify a training run by its data and options
+def training_job_key(X_train, y_train, tune=False, fast_engine=False):
+    """
+    Return the model cache key for training on (X_train, y_train) with the given options.
+    """
+    return f"{dataset_fingerprint(X_train, y_train)}:tune={tune}:fast={fast_engine}"
+
+def run_training_job(job, X_train, y_train, tune, fast_engine, tuned_params):
+    """
+    Worker body of a training job: tune (optionally), fit the ML models and ARIMA.
+
+    Runs in a pool thread without a Streamlit script context, so it makes no st.* calls;
+    it only updates the job dictionary (status, progress, message, result, error).
+    Cancellation is checked between models, since a single fit cannot be interrupted.
+    """
+    cancel_event = job['cancel_event']
+    
+    def report(progress, message):
+        if cancel_event.is_set():
+            raise TrainingCancelled()
+        job['progress'] = progress
+        job['message'] = message
+    
+    try:
+        job['status'] = 'running'
+        job['started'] = time.time()
+        
+        models = build_ml_models(len(X_train), fast_engine)
+        if tune and len(X_train) >= TUNING_MIN_ROWS:
+            to_tune = [name for name in TUNING_MODEL_CLASSES if name in models and name not in tuned_params]
+            for i, name in enumerate(to_tune):
+                report(0.5 * i / len(to_tune), f"Tuning {name}...")
+                tuned_params[name] = successive_halving_search(name, X_train, y_train)
+            models = build_ml_models(len(X_train), fast_engine, tuned_params)
+        
+        start = 0.5 if tune else 0.0
+        steps = len(models) + 1
+        for i, (name, model) in enumerate(models.items()):
+            report(start + (1 - start) * i / steps, f"Training {name}...")
+            model.fit(X_train, y_train)
+        report(start + (1 - start) * len(models) / steps, "Training ARIMA model...")
+        arima_model = fit_arima_model(y_train)
+        
+        job['result'] = (models, arima_model)
+        job['tuned_params'] = tuned_params
+        job['progress'] = 1.0
+        job['message'] = "Training finished"
+        job['status'] = 'done'
+    except TrainingCancelled:
+        job['status'] = 'cancelled'
+        job['message'] = "Training cancelled"
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        job['message'] = "Training failed"
+    finally:
+        job['finished'] = time.time()
+
+def submit_training_job(X_train, y_train, tune=False, fast_engine=False):
+    """
+    Submit a background training job, or return the existing job for the same key.
+
+    Active jobs of this session for other data/options are cancelled, since only the
+    latest training run is shown.
+
+    Returns:
+        Job dictionary with 'id', 'key', 'status', 'progress', 'message' and, once
+        finished, 'result' ((ml_models, arima_model)) or 'error'
+    """
+    jobs = st.session_state.setdefault('training_jobs', {})
+    key = training_job_key(X_train, y_train, tune, fast_engine)
+    for job in jobs.values():
+        if job['key'] == key:
+            return job
+    
+    for job in jobs.values():
+        if training_job_status(job) in ACTIVE_JOB_STATUSES:
+            cancel_training_job(job)
+    
+    # Join an identical job already running (or finished but not yet collected) for another session
+    inflight = get_inflight_training_jobs()
+    with inflight['lock']:
+        job = inflight['jobs'].get(key)
+        joinable = job is not None and (
+            job['status'] == 'done'
+            or (job['status'] in ACTIVE_JOB_STATUSES and not job['cancel_event'].is_set())
+        )
+        if joinable:
+            job['waiters'].add(current_session_id())
+            jobs[job['id']] = job
+            return job
+    
+    # Reuse tuned settings already found for this training set
+    fingerprint = dataset_fingerprint(X_train, y_train)
+    tuned_cache = st.session_state.get('tuned_params_cache', {})
+    tuned_params = {
+        name: tuned_cache[(name, fingerprint)]
+        for name in TUNING_MODEL_CLASSES if (name, fingerprint) in tuned_cache
+    }
+    
+    job = {
+        'id': uuid.uuid4().hex[:8],
+        'key': key,
+        'fingerprint': fingerprint,
+        'status': 'queued',
+        'progress': 0.0,
+        'message': "Waiting for a free worker...",
+        'cancel_event': threading.Event(),
+        'submitted': time.time(),
+        'result': None,
+        'error': None,
+        'tuned_params': {},
+        'waiters': {current_session_id()}
+    }
+    with inflight['lock']:
+        # Submitted under the lock so joiners never see a job without its future
+        inflight['jobs'][key] = job
+        job['future'] = get_training_executor().submit(
+            run_training_job, job, X_train, y_train, tune, fast_engine, tuned_params
+        )
+    job['future'].add_done_callback(lambda future: release_inflight_training_job(inflight, job))
+    jobs[job['id']] = job
+    return job
+
+@st.cache_resource
+def get_inflight_training_jobs():
+    """
+    Return the process-wide registry of running training jobs by training key.
+    """
+    return {'lock': threading.Lock(), 'jobs': {}}
+
+def release_inflight_training_job(inflight, job):
+    """
+    Remove a job from the in-flight registry.
+
+    Called from the worker pool when a job ends; successful jobs stay registered until
+    a session collects them (or their result is older than SHARED_REF_TTL_SECONDS), so
+    sessions arriving in between join them instead of training again.
+    """
+    with inflight['lock']:
+        if job['status'] != 'done' or job.get('collected'):
+            if inflight['jobs'].get(job['key']) is job:
+                del inflight['jobs'][job['key']]
+        # Drop uncollected results nobody came back for
+        now = time.time()
+        for key, other in list(inflight['jobs'].items()):
+            if other['status'] == 'done' and now - other.get('finished', now) > SHARED_REF_TTL_SECONDS:
+                del inflight['jobs'][key]
+
+def training_job_status(job):
+    """
+    Return the job status as seen by this session ('cancelled' once this session
+    cancelled it, even if other sessions keep it running).
+    """
+    if job['status'] in ACTIVE_JOB_STATUSES and current_session_id() not in job['waiters']:
+        return 'cancelled'
+    return job['status']
+
+def cancel_training_job(job):
+    """
+    Withdraw this session from a job; the job itself is cancelled once no session
+    waits for it any more (queued jobs immediately, running ones between models).
+
+    The waiter set and the cancel flag change under the in-flight lock, so a session
+    joining concurrently either keeps the job alive or sees it as cancelled and starts its own.
+    """
+    with get_inflight_training_jobs()['lock']:
+        job['waiters'].discard(current_session_id())
+        if job['waiters']:
+            return
+        job['cancel_event'].set()
+    if job['future'].cancel():
+        job['status'] = 'cancelled'
+        job['message'] = "Training cancelled"
+
+def discard_training_job(job):
+    """
+    Remove a job from this session's registry (so the same data can be resubmitted).
+    """
+    st.session_state.setdefault('training_jobs', {}).pop(job['id'], None)
+
+def store_trained_models(key, ml_models, arima_model, feature_cols, fast_engine, scaler=None, imputer=None):
+    """
+    Put trained models into the shared store and mark them as this session's last good models.
+
+    The fitted scaler and imputer are stored with them, so the models can still be
+    served (as last good models) after the data and its preprocessing changed.
+
+    Returns:
+        The stored bundle (another session's bundle if it stored the same key first)
+    """
+    # Tag the models with their training run so caches keyed by model_fingerprint stay per run
+    for model in list(ml_models.values()) + [arima_model]:
+        try:
+            model._training_key = key
+        except AttributeError:
+            pass
+    bundle = shared_store_put('models', 'models:' + key, {
+        'ml_models': ml_models,
+        'arima_model': arima_model,
+        'feature_cols': list(feature_cols),
+        'fast_engine': fast_engine,
+        'scaler': scaler,
+        'imputer': imputer
+    })
+    st.session_state['last_good_models'] = key
+    return bundle
+
+def get_trained_models(key):
+    """
+    Return the shared bundle of models trained for key, or None.
+    """
+    return shared_store_get('models', 'models:' + key)
+
+def collect_training_job(job, feature_cols, fast_engine, scaler=None, imputer=None):
+    """
+    Move a finished job's models into the shared model store.
+
+    Returns:
+        True if the job finished successfully and its models are now cached
+    """
+    if job['status'] != 'done':
+        return False
+    ml_models, arima_model = job['result']
+    store_trained_models(job['key'], ml_models, arima_model, feature_cols, fast_engine, scaler, imputer)
+    tuned_cache = st.session_state.setdefault('tuned_params_cache', OrderedDict())
+    for name, params in job['tuned_params'].items():
+        session_cache_put(tuned_cache, (name, job['fingerprint']), params, TUNED_PARAMS_CACHE_MAX_ENTRIES)
+    discard_training_job(job)
+    # The models are in the shared store now; later sessions find them there
+    job['collected'] = True
+    release_inflight_training_job(get_inflight_training_jobs(), job)
+    return True
+
+def get_last_good_models(feature_cols, fast_engine):
+    """
+    Return the most recently trained cache entry if it is usable with the current features.
+
+    The entry carries its own 'scaler' and 'imputer'; inputs for its models must be
+    prepared with those, not with the preprocessing fitted on the current data.
+    """
+    last_good = st.session_state.get('last_good_models')
+    entry = get_trained_models(last_good) if last_good is not None else None
+    if entry is None or entry['feature_cols'] != list(feature_cols) or entry['fast_engine'] != fast_engine:
+        return None
+    if entry.get('scaler') is None:
+        return None
+    return entry
+
+def show_training_job_status(job):
+    """
+    Show a job's progress with a cancel button, polling until it finishes.
+
+    The status fragment reruns on its own every TRAINING_POLL_SECONDS and triggers a
+    full rerun once the job leaves the queue, so the finished models get picked up.
+    Failed or cancelled jobs show a retry button instead.
+    """
+    if training_job_status(job) in ACTIVE_JOB_STATUSES:
+        # st.fragment with run_every needs streamlit>=1.37 (requirements.txt)
+        @st.fragment(run_every=TRAINING_POLL_SECONDS)
+        def poll_training_job():
+            if training_job_status(job) not in ACTIVE_JOB_STATUSES:
+                st.rerun()
+            elapsed = time.time() - job.get('started', job['submitted'])
+            st.progress(job['progress'], text=f"Training job {job['id']}: {job['message']} ({elapsed:.0f}s)")
+            if st.button("Cancel training", key=f"cancel_training_{job['id']}"):
+                cancel_training_job(job)
+                st.rerun()
+        poll_training_job()
+    else:
+        if training_job_status(job) == 'failed':
+            st.error(f"Training job {job['id']} failed: {job['error']}")
+        else:
+            st.warning(f"Training job {job['id']} was cancelled.")
+        if st.button("Retry training", key=f"retry_training_{job['id']}"):
+            discard_training_job(job)
+            st.rerun()
+
 def main():
     # Display current time information
     current_time = datetime.now()
@@ -2260,6 +4932,34 @@ def main():
         label_visibility="collapsed",  # Hide the default label
     )
     
+    # Compact dtypes (float32 / categorical) to roughly halve memory use on large histories
+    compact_mode = st.sidebar.checkbox(
+        "Compact data types",
+        value=False,
+        help="Store measurements as float32, Location as categorical and calendar features as small integers"
+    )
+    
+    # Lagged and rolling precipitation features (forecasts then run recursively)
+    lag_features = st.sidebar.checkbox(
+        "Lag precipitation features",
+        value=False,
+        help="Add precipitation of the last 3 days and its 7-day rolling mean and standard deviation per station"
+    )
+    
+    # Optional hyperparameter tuning for the ensemble models
+    tune_models = st.sidebar.checkbox(
+        "Tune ensemble models",
+        value=False,
+        help=f"Search Random Forest and Gradient Boosting settings with successive halving (up to {TUNING_BUDGET_SECONDS}s per model, cached per dataset)"
+    )
+    
+    # Train in a background worker so the page stays responsive
+    background_training = st.sidebar.checkbox(
+        "Train models in background",
+        value=True,
+        help="Training runs in a worker pool; the last trained models stay in use until the new ones are ready"
+    )
+    
     # Clear session state data when switching input methods
     if 'prev_input_method' not in st.session_state:
         st.session_state.prev_input_method = input_method
@@ -2283,7 +4983,7 @@ def main():
             </div>
         """, unsafe_allow_html=True)
         
-        data = load_sample_data('rainfall_data.csv')
+        data = load_sample_data('rainfall_data.csv', compact=compact_mode)
         
         if data is not None:
             st.session_state.data = data  # Save to session state for future use
@@ -2303,8 +5003,12 @@ def main():
             <p style="font-size: 1.1rem;">Fetch historical and real-time weather data for any location worldwide.</p>
         """, unsafe_allow_html=True)
 
+        # Shared request budget of all sessions, per provider
+        with st.expander("API Rate Limits"):
+            st.dataframe(rate_limiter_stats(), use_container_width=True, hide_index=True)
+        
         # Create tabs for different API providers and forecast
-        api_tabs = st.tabs(["WeatherAPI", "OpenWeather API", "Open-Meteo API", "WeatherBit API"])
+        api_tabs = st.tabs(["WeatherAPI", "OpenWeather API", "Open-Meteo API", "WeatherBit API", "Local History Store"])
         
         # WeatherAPI tab implementation
         with api_tabs[0]:
@@ -2354,7 +5058,10 @@ def main():
                     if location:
                         with st.spinner(f"Fetching historical weather data for {location}..."):
                             # Fetch historical data using the modified function with debug parameter
-                            weather_data, error_message = fetch_weather_data_from_api(
+                            # (identical in-flight requests from other users share one fetch)
+                            weather_data, error_message = single_flight(
+                                ('weatherapi', location, str(start_date), str(end_date), hashlib.sha1(str(custom_api_key).encode()).hexdigest(), show_debug),
+                                fetch_weather_data_from_api,
                                 location, 
                                 start_date, 
                                 end_date, 
@@ -2366,6 +5073,10 @@ def main():
                                 st.warning(error_message)
                             
                             if weather_data is not None:
+                                placeholder_dates = weather_data.attrs.get('placeholder_dates', [])
+                                if placeholder_dates:
+                                    st.info(f"{len(placeholder_dates)} of {len(weather_data)} days have no data and were filled with placeholder values.")
+                                
                                 # Store in session state
                                 st.session_state.data = weather_data
                                 
@@ -2448,14 +5159,16 @@ def main():
                             # Fetch forecast data
                             try:
                                 # Build the forecast API URL
-                                forecast_url = (
-                                    f"https://api.weatherapi.com/v1/forecast.json?key={api_key_fc}"
-                                    f"&q={location_fc}&days={forecast_days}&aqi=yes&alerts=yes"
+                                # Only the current hour's block is used, so only that hour is requested
+                                forecast_url = build_weatherapi_url(
+                                    'forecast', api_key_fc, location_fc,
+                                    days=forecast_days,
+                                    hour=current_hour
                                 )
                                 
                                 st.info(f"Fetching forecast for {location_fc} at current time ({current_time})")
                                 
-                                response = requests.get(forecast_url)
+                                response = single_flight_get('weatherapi', forecast_url)
                                 if response.status_code == 200:
                                     forecast_data = response.json()
                                     
@@ -2616,7 +5329,7 @@ def main():
                                 # Build the API URL for historical data (One Call API 3.0)
                                 # First get coordinates from geocoding API
                                 geo_url = f"http://api.openweathermap.org/geo/1.0/direct?q={location_ow}&limit=1&appid={api_key_ow}"
-                                geo_response = requests.get(geo_url)
+                                geo_response = single_flight_get('openweather', geo_url)
                                 
                                 if geo_response.status_code == 200 and geo_response.json():
                                     lat = geo_response.json()[0]['lat']
@@ -2624,7 +5337,7 @@ def main():
                                     
                                     # Historical weather data API call
                                     hist_url = f"https://api.openweathermap.org/data/3.0/onecall/timemachine?lat={lat}&lon={lon}&dt={int(start_date_ow.timestamp())}&appid={api_key_ow}&units=metric"
-                                    hist_response = requests.get(hist_url)
+                                    hist_response = single_flight_get('openweather', hist_url)
                                     
                                     st.write("OpenWeather API response:", hist_response.status_code, hist_response.text)
                                     
@@ -2744,7 +5457,7 @@ def main():
             st.write("### Open-Meteo API")
             
             # Create tabs for historical and forecast data
-            om_tabs = st.tabs(["Historical Data", "Weather Forecast"])
+            om_tabs = st.tabs(["Historical Data", "Weather Forecast", "Multiple Cities"])
             
             # Historical data tab
             with om_tabs[0]:
@@ -2781,7 +5494,10 @@ def main():
                     if location_om:
                         with st.spinner(f"Fetching historical weather data for {location_om}..."):
                             # Fetch historical data using the Open-Meteo function
-                            weather_data, error_message = fetch_open_meteo_data(
+                            # (identical in-flight requests from other users share one fetch)
+                            weather_data, error_message = single_flight(
+                                ('open-meteo', location_om, str(start_date_om), str(end_date_om)),
+                                fetch_open_meteo_data,
                                 location_om, 
                                 start_date_om, 
                                 end_date_om
@@ -2807,6 +5523,58 @@ def main():
                             else:
                                 st.error(f"Failed to retrieve weather data for {location_om}")
             
+            # Batch tab: many cities in as few requests as possible
+            with om_tabs[2]:
+                col1_om_batch, col2_om_batch = st.columns(2)
+                
+                with col1_om_batch:
+                    # One city (or "lat,lon") per line
+                    locations_text_om = st.text_area(
+                        "Cities (one per line):",
+                        value="Bangalore\nMumbai\nChennai",
+                        key="openmeteo_batch_locations",
+                        help='Enter city names or coordinates as "lat,lon"'
+                    )
+                
+                with col2_om_batch:
+                    today_om_batch = datetime.now().date()
+                    
+                    start_date_om_batch = st.date_input(
+                        "Start Date:",
+                        value=today_om_batch - timedelta(days=7),
+                        max_value=today_om_batch,
+                        key="openmeteo_batch_start_date"
+                    )
+                    
+                    end_date_om_batch = st.date_input(
+                        "End Date:",
+                        value=today_om_batch,
+                        max_value=today_om_batch,
+                        key="openmeteo_batch_end_date"
+                    )
+                
+                if st.button("Fetch All Cities", key="openmeteo_batch_fetch"):
+                    locations_om_batch = [line for line in locations_text_om.splitlines() if line.strip()]
+                    if locations_om_batch:
+                        with st.spinner(f"Fetching historical weather data for {len(locations_om_batch)} locations..."):
+                            weather_data_batch, error_message = fetch_open_meteo_batch(
+                                locations_om_batch,
+                                start_date_om_batch,
+                                end_date_om_batch
+                            )
+                            
+                            if error_message:
+                                st.warning(error_message)
+                            
+                            if weather_data_batch is not None:
+                                # Store in session state (same long format as rainfall_data.csv)
+                                st.session_state.data = weather_data_batch
+                                
+                                st.success(f"Successfully retrieved weather data for {weather_data_batch['Location'].nunique()} locations")
+                                show_paginated_table(weather_data_batch, key="openmeteo_batch")
+                    else:
+                        st.warning("Please enter at least one city.")
+            
             # Forecast tab
             with om_tabs[1]:
                 # Create columns for better layout
@@ -2834,7 +5602,7 @@ def main():
                                 if show_debug_om_fc:
                                     st.info(f"Geocoding URL: {geocoding_url}")
                                 
-                                geo_response = requests.get(geocoding_url)
+                                geo_response = single_flight_get('open-meteo', geocoding_url)
                                 
                                 if show_debug_om_fc:
                                     st.write(f"Geocoding response status: {geo_response.status_code}")
@@ -2848,18 +5616,18 @@ def main():
                                     end_date_fc = today + timedelta(days=forecast_days_om)
                                     
                                     # Build Open-Meteo Forecast API URL
-                                    forecast_url = (
-                                        f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}"
-                                        f"&daily=temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum,"
-                                        f"precipitation_hours,windspeed_10m_max,windgusts_10m_max,winddirection_10m_dominant,"
-                                        f"shortwave_radiation_sum,et0_fao_evapotranspiration"
-                                        f"&timezone=auto&forecast_days={forecast_days_om}"
+                                    forecast_url = build_open_meteo_url(
+                                        lat, lon,
+                                        ['temperature_2m_max', 'temperature_2m_min', 'temperature_2m_mean',
+                                         'precipitation_sum', 'windspeed_10m_max'],
+                                        'daily',
+                                        forecast_days=forecast_days_om
                                     )
                                     
                                     if show_debug_om_fc:
                                         st.info(f"Forecast URL: {forecast_url}")
                                     
-                                    forecast_response = requests.get(forecast_url)
+                                    forecast_response = single_flight_get('open-meteo', forecast_url)
                                     
                                     if show_debug_om_fc:
                                         st.write(f"Forecast response status: {forecast_response.status_code}")
@@ -2996,7 +5764,7 @@ def main():
                                 params["country"] = country_code_wb
                             
                             try:
-                                response = requests.get(base_url, params=params)
+                                response = single_flight_get('weatherbit', base_url, params=params)
                                 
                                 if response.status_code == 200:
                                     data = response.json()
@@ -3099,9 +5867,67 @@ def main():
                             except Exception as e:
                                 st.error(f"Error fetching weather data: {str(e)}")
                                 return
-    elif input_method == "Upload Your Own Data":
-        st.markdown("""
-            <h2 style="color: #110361; margin-bottom: 16px;">Upload Your Weather Data</h2>
+        
+        # Local history store: incremental sync and training data from stored observations
+        with api_tabs[4]:
+            st.write("### Local History Store")
+            st.write("Observations are kept on disk; each sync only downloads days that are not stored yet.")
+            
+            col1_hs, col2_hs = st.columns(2)
+            
+            with col1_hs:
+                provider_hs = st.selectbox("Provider:", HISTORY_PROVIDERS, key="history_store_provider")
+                locations_text_hs = st.text_area(
+                    "Cities (one per line):",
+                    value="Bangalore",
+                    key="history_store_locations"
+                )
+            
+            with col2_hs:
+                # Only complete days are stored; today's values are still changing
+                last_day_hs = latest_complete_day().date()
+                
+                start_date_hs = st.date_input(
+                    "Start Date:",
+                    value=last_day_hs - timedelta(days=30),
+                    max_value=last_day_hs,
+                    key="history_store_start_date"
+                )
+                
+                end_date_hs = st.date_input(
+                    "End Date:",
+                    value=last_day_hs,
+                    max_value=last_day_hs,
+                    key="history_store_end_date"
+                )
+            
+            locations_hs = [line.strip() for line in locations_text_hs.splitlines() if line.strip()]
+            
+            if st.button("Sync and Load", key="history_store_sync"):
+                if locations_hs:
+                    with st.spinner(f"Syncing {len(locations_hs)} locations..."):
+                        new_rows, fetched_ranges, sync_errors = sync_history_store(
+                            provider_hs, locations_hs, start_date_hs, end_date_hs, api_key=WEATHERAPI_KEY
+                        )
+                    for sync_error in sync_errors[:5]:
+                        st.warning(sync_error)
+                    st.success(f"Stored {new_rows} new observations from {fetched_ranges} missing date range(s).")
+                    
+                    # Training reads from the store
+                    stored_data = load_history_store(provider_hs, locations_hs, start_date_hs, end_date_hs)
+                    if not stored_data.empty:
+                        st.session_state.data = stored_data
+                        show_paginated_table(stored_data, key="history_store_data")
+                    else:
+                        st.error("No stored observations for the selected locations and dates.")
+                else:
+                    st.warning("Please enter at least one city.")
+            
+            with st.expander("Stored Locations"):
+                st.dataframe(history_store_summary(), use_container_width=True, hide_index=True)
+    elif input_method == "Upload Your Own Data":
+        st.markdown("""
+            <h2 style="color: #110361; margin-bottom: 16px;">Upload Your Weather Data</h2>
             <p style="font-size: 1.1rem;">Upload your own weather or rainfall data in CSV or Excel format.</p>
         """, unsafe_allow_html=True)
         
@@ -3110,7 +5936,8 @@ def main():
         
         if uploaded_file is not None:
             with st.spinner("Processing uploaded file..."):
-                data, error_message = process_uploaded_data(uploaded_file)
+                upload = load_uploaded_file(uploaded_file)
+                data, error_message = upload['data'], upload['error']
                 
                 if error_message:
                     st.error(f"Error processing file: {error_message}")
@@ -3121,8 +5948,8 @@ def main():
                     st.subheader("Select Target Variable")
                     st.write("Choose which parameter you want to predict. The remaining parameters will be used as input features.")
                     
-                    # Get numeric columns for potential target variables
-                    numeric_cols = data.select_dtypes(include=['number']).columns.tolist()
+                    # Get numeric columns for potential target variables (from the cached schema)
+                    numeric_cols = [col for col, kind in upload['schema'].items() if kind in ('float', 'int')]
                     
                     # Default to precipitation if available, otherwise first numeric column
                     default_target = 'precipitation' if 'precipitation' in numeric_cols else numeric_cols[0] if numeric_cols else None
@@ -3138,18 +5965,11 @@ def main():
                         # Rename selected column to 'precipitation' for compatibility with existing code
                         if target_variable != 'precipitation':
                             st.info(f"Using '{target_variable}' as the target variable for prediction")
-                            # Make a copy to avoid modifying the original
-                            data_copy = data.copy()
                             # Store original target name for display purposes
                             if 'original_target_name' not in st.session_state:
                                 st.session_state.original_target_name = target_variable
-                            # If precipitation exists, temporarily store it
-                            if 'precipitation' in data_copy.columns:
-                                data_copy['original_precipitation'] = data_copy['precipitation']
-                            # Rename target to precipitation for model compatibility
-                            data_copy['precipitation'] = data_copy[target_variable]
-                            # Store in session state
-                            st.session_state.data = data_copy
+                            # Store in session state (the same cached frame on every rerun)
+                            st.session_state.data = upload_target_frame(upload, target_variable)
                         else:
                             # Store in session state
                             st.session_state.data = data
@@ -3161,11 +5981,7 @@ def main():
                         
                         # Display the processed data
                         st.subheader("Processed Data")
-                        display_data = data.copy()
-                        if isinstance(display_data.index, pd.DatetimeIndex):
-                            display_data = display_data.reset_index()
-                        display_data = add_units_to_columns(display_data)
-                        st.dataframe(display_data, use_container_width=True)
+                        show_paginated_table(data, key="upload_processed", add_units=True)
                         
                         # Create visualizations for the uploaded data
                         st.subheader("Data Visualizations")
@@ -3253,17 +6069,31 @@ def main():
                     st.error("Failed to process the uploaded file.")    
     # Common section for all input methods
     if 'data' in st.session_state:
-        data = st.session_state.data
+        # Sessions with identical data share one copy
+        data = share_session_dataset()
+        
+        # Restrict training and plotting to one station; the index avoids rescanning the full history
+        station = None
+        if find_location_column(data) is not None and (isinstance(data.index, pd.DatetimeIndex) or 'date' in data.columns):
+            history_index = get_history_index(data, st.session_state.get('shared_data_key'))
+            stations = history_locations(history_index)
+            if len(stations) > 1:
+                station = st.sidebar.selectbox("Station", stations, key="history_station")
+            else:
+                station = stations[0]
+            data = history_window(data, history_index, station)
         
         st.write("### Processed Data:")
-        display_data = data.copy()
-        if isinstance(display_data.index, pd.DatetimeIndex):
-            display_data = display_data.reset_index()
-        display_data = add_units_to_columns(display_data)
-        st.dataframe(display_data, use_container_width=True)  # Removed .head() to show all rows
+        # Only the visible page is sliced and sent to the browser
+        show_paginated_table(data, key="processed_data", add_units=True)
         
         # Feature engineering (keep the computation but hide the display)
-        data_features = create_features(data)
+        data_features = create_features(data, compact=compact_mode)
+        if lag_features:
+            shared_key = st.session_state.get('shared_data_key')
+            data_features = get_precipitation_lag_features(
+                data_features, key=(shared_key, station, compact_mode) if shared_key else None
+            )
         
         # Preprocessing
         st.write("### Data Preprocessing:")
@@ -3296,17 +6126,53 @@ def main():
         
         st.dataframe(params_df, use_container_width=True)
         
-        # Process the data
-        X_train, X_test, y_train, y_test, scaler, feature_cols, imputer = preprocess_data(data_features)
-        
-        # Train models
-        ml_models = train_ml_models(X_train, y_train)
+        # Large datasets use the histogram-based boosting engine, which handles missing values itself
+        fast_engine = use_fast_engine(len(data_features))
+        if fast_engine:
+            st.info(f"Dataset has {len(data_features):,} rows: using the histogram-based boosting engine.")
         
-        # Train ARIMA model
-        arima_model = train_arima_model(y_train)
+        # Process the data
+        X_train, X_test, y_train, y_test, scaler, feature_cols, imputer = preprocess_data(data_features, impute=not fast_engine, compact=compact_mode)
+        
+        # Train models (trained models are shared by all sessions per training set and options)
+        training_key = training_job_key(X_train, y_train, tune_models, fast_engine)
+        trained = get_trained_models(training_key)
+        if trained is None:
+            if background_training:
+                job = submit_training_job(X_train, y_train, tune=tune_models, fast_engine=fast_engine)
+                if collect_training_job(job, feature_cols, fast_engine, scaler, imputer):
+                    trained = get_trained_models(training_key)
+                else:
+                    show_training_job_status(job)
+            else:
+                def train_all_models():
+                    # Train ARIMA model alongside the ML models
+                    return train_ml_models(X_train, y_train, tune=tune_models, fast_engine=fast_engine), train_arima_model(y_train)
+                
+                # Identical trainings started by other sessions are joined instead of repeated
+                ml_models, arima_model = single_flight(('train', training_key), train_all_models)
+                trained = store_trained_models(training_key, ml_models, arima_model, feature_cols, fast_engine, scaler, imputer)
+        else:
+            st.session_state['last_good_models'] = training_key
+        
+        if trained is None:
+            # Keep showing the last good models while the new ones train
+            trained = get_last_good_models(feature_cols, fast_engine)
+            if trained is None:
+                st.info("Models are training in the background. Results will appear here when training finishes.")
+                return
+            st.info("Showing the last trained models until the new training job finishes.")
+            # Evaluate and forecast with the preprocessing those models were trained with
+            X_test = trained['scaler'].transform(pd.DataFrame(scaler.inverse_transform(X_test), columns=feature_cols))
+            scaler, imputer = trained['scaler'], trained['imputer']
+        ml_models = trained['ml_models']
+        arima_model = trained['arima_model']
+        
+        # Each model predicts the test set once per training run; evaluation and plots share the results
+        prediction_store = {}
         
         # Evaluate all models to find the best one
-        model_metrics = evaluate_models(ml_models, X_test, y_test, arima_model)
+        model_metrics = evaluate_models(ml_models, X_test, y_test, arima_model, prediction_store=prediction_store)
         
         # Display model comparison
         st.write("#### Model Comparison:")
@@ -3335,6 +6201,11 @@ def main():
                 It builds models sequentially, with each new model correcting errors made by previous ones.
                 This model suggests that rainfall prediction requires capturing both obvious and subtle weather patterns.
             """,
+            'Hist Gradient Boosting': """
+                **Hist Gradient Boosting** performs best when subtle patterns matter and the dataset is large.
+                It bins each parameter into histograms, which makes training fast on hundreds of thousands of rows, handles missing values natively and stops adding trees once validation error stops improving.
+                This model suggests that rainfall prediction benefits from capturing both obvious and subtle weather patterns across a long history.
+            """,
             'ARIMA': """
                 **ARIMA** performs best when rainfall follows strong temporal patterns and is primarily influenced by its own past values.
                 It's specialized for time series data and doesn't use weather parameters directly.
@@ -3347,11 +6218,11 @@ def main():
         # Evaluation
         st.write("### Model Evaluation:")
         if best_model_name != 'ARIMA' and best_model is not None:
-            evaluate_model_and_show_importance(best_model, X_test, y_test, feature_cols, scaler)
+            evaluate_model_and_show_importance(best_model, X_test, y_test, feature_cols, scaler, prediction_store=prediction_store)
         else:
             # If ARIMA is best, use Random Forest for feature importance
             st.write("Using Random Forest to show feature importance (ARIMA doesn't provide feature importance):")
-            evaluate_model_and_show_importance(ml_models['Random Forest'], X_test, y_test, feature_cols, scaler)
+            evaluate_model_and_show_importance(ml_models['Random Forest'], X_test, y_test, feature_cols, scaler, prediction_store=prediction_store)
         
         # Forecasting
         st.write("### Future Rainfall Forecast:")
@@ -3366,6 +6237,27 @@ def main():
             index=0
         )
         
+        # Probabilistic mode: P10/P50/P90 bands from the Random Forest trees
+        show_quantiles = st.checkbox(
+            "Show P10/P50/P90 rainfall bands",
+            value=False,
+            help="Quantiles of the individual Random Forest tree predictions (or of the scenarios when the ensemble is enabled)"
+        )
+        
+        # Monte Carlo scenario ensemble over future weather conditions
+        col1, col2 = st.columns(2)
+        with col1:
+            n_scenarios = st.number_input(
+                "Weather scenarios (0 = single path)",
+                min_value=0,
+                max_value=5000,
+                value=0,
+                step=100,
+                help="Number of sampled future weather scenarios averaged into the forecast"
+            )
+        with col2:
+            scenario_seed = st.number_input("Scenario seed", min_value=0, value=42, step=1)
+        
         # Button to trigger forecast
         if st.button("Generate Forecast"):
             with st.spinner("Generating forecast..."):
@@ -3392,7 +6284,11 @@ def main():
                     forecast_days=forecast_days,
                     scaler=scaler,
                     feature_cols=feature_cols,
-                    imputer=imputer
+                    imputer=imputer,
+                    quantiles=FORECAST_QUANTILES if show_quantiles else None,
+                    n_scenarios=int(n_scenarios),
+                    random_state=int(scenario_seed),
+                    compact=compact_mode
                 )
                 
                 # Ensure forecast data has a date column
@@ -3431,67 +6327,79 @@ def main():
                 # Plot forecast using the new function
                 st.write(f"### Historical Data and {target_display_name.title()} Forecast:")
 
-                # Create tabs for different parameter visualizations
-                forecast_tabs = st.tabs([f"{target_display_name.title()}", "Temperature", "Humidity", "Pressure", "Wind Speed"])
-                
-                with forecast_tabs[0]:
-                    # Plot the target variable (precipitation or custom target)
-                    plot_historical_and_forecast(
-                        historical_data, 
-                        future_forecast, 
-                        'precipitation',  # Always use 'precipitation' as the internal column name
-                        display_name=target_display_name,
-                        title=f"{target_display_name.title()} - Historical vs Forecast"
-                    )
+                # Normalize the historical and forecast frames once for all tabs
+                plot_data = prepare_forecast_plot_data(historical_data, future_forecast)
+                if plot_data is None:
+                    st.warning("No date information found in forecast data.")
+                else:
+                    show_forecast_debug_data(plot_data)
                     
-                    # Add a download button for the forecast data
-                    csv = display_df.to_csv(index=False)
-                    st.download_button(
-                        label=f"Download {target_display_name.title()} Forecast",
-                        data=csv,
-                        file_name=f"{target_display_name}_forecast.csv",
-                        mime="text/csv"
-                    )
-                
-                with forecast_tabs[1]:
-                    # Plot temperature
-                    plot_historical_and_forecast(
-                        historical_data, 
-                        future_forecast, 
-                        'temperature',
-                        display_name='Temperature (°C)',
-                        title="Temperature - Historical vs Forecast"
-                    )
-                
-                with forecast_tabs[2]:
-                    # Plot humidity
-                    plot_historical_and_forecast(
-                        historical_data, 
-                        future_forecast, 
-                        'humidity',
-                        display_name='Humidity (%)',
-                        title="Humidity - Historical vs Forecast"
-                    )
-                
-                with forecast_tabs[3]:
-                    # Plot pressure
-                    plot_historical_and_forecast(
-                        historical_data, 
-                        future_forecast, 
-                        'pressure',
-                        display_name='Pressure (hPa)',
-                        title="Pressure - Historical vs Forecast"
-                    )
-                
-                with forecast_tabs[4]:
-                    # Plot wind speed
-                    plot_historical_and_forecast(
-                        historical_data, 
-                        future_forecast, 
-                        'wind_speed',
-                        display_name='Wind Speed (m/s)',
-                        title="Wind Speed - Historical vs Forecast"
-                    )
+                    # Create tabs for different parameter visualizations
+                    forecast_tabs = st.tabs([f"{target_display_name.title()}", "Temperature", "Humidity", "Pressure", "Wind Speed"])
+                    
+                    with forecast_tabs[0]:
+                        # Plot the target variable (precipitation or custom target)
+                        plot_historical_and_forecast(
+                            historical_data, 
+                            future_forecast, 
+                            'precipitation',  # Always use 'precipitation' as the internal column name
+                            display_name=target_display_name,
+                            title=f"{target_display_name.title()} - Historical vs Forecast",
+                            prepared=plot_data
+                        )
+                        
+                        # Add a download button for the forecast data
+                        csv = display_df.to_csv(index=False)
+                        st.download_button(
+                            label=f"Download {target_display_name.title()} Forecast",
+                            data=csv,
+                            file_name=f"{target_display_name}_forecast.csv",
+                            mime="text/csv"
+                        )
+                    
+                    with forecast_tabs[1]:
+                        # Plot temperature
+                        plot_historical_and_forecast(
+                            historical_data, 
+                            future_forecast, 
+                            'temperature',
+                            display_name='Temperature (°C)',
+                            title="Temperature - Historical vs Forecast",
+                            prepared=plot_data
+                        )
+                    
+                    with forecast_tabs[2]:
+                        # Plot humidity
+                        plot_historical_and_forecast(
+                            historical_data, 
+                            future_forecast, 
+                            'humidity',
+                            display_name='Humidity (%)',
+                            title="Humidity - Historical vs Forecast",
+                            prepared=plot_data
+                        )
+                    
+                    with forecast_tabs[3]:
+                        # Plot pressure
+                        plot_historical_and_forecast(
+                            historical_data, 
+                            future_forecast, 
+                            'pressure',
+                            display_name='Pressure (hPa)',
+                            title="Pressure - Historical vs Forecast",
+                            prepared=plot_data
+                        )
+                    
+                    with forecast_tabs[4]:
+                        # Plot wind speed
+                        plot_historical_and_forecast(
+                            historical_data, 
+                            future_forecast, 
+                            'wind_speed',
+                            display_name='Wind Speed (m/s)',
+                            title="Wind Speed - Historical vs Forecast",
+                            prepared=plot_data
+                        )
     
     # Debugging tools
     if st.checkbox("Show debug information"):
@@ -3504,571 +6412,3 @@ def main():
 # Call the main function when the script is run
 if __name__ == "__main__":
     main()
-
-
-
-
-
-#precip_lag_1	precip_lag_2	precip_lag_3	precip_rolling_avg_7	precip_rolling_std_7
-
-#remove all these columns from the forecast table and the importance graph and give forecast graph and imporatnce each parameters plays in predicting or having rainfall,consider these parameters only :
-#temperature	humidity	pressure	wind_speed	precipitation
-
-def preprocess_data(data):
-    # Define features dynamically based on what's available
-    potential_features = ['temperature', 'humidity', 'pressure', 'wind_speed', 
-                         'day_of_year', 'month', 'season_code']
-    # Only use features that exist in the data
-    feature_cols = [col for col in potential_features if col in data.columns]
-    
-    # If no features are available, add some basic ones
-    if not feature_cols:
-        data['day_of_year'] = data.index.dayofyear if isinstance(data.index, pd.DatetimeIndex) else 1
-        data['month'] = data.index.month if isinstance(data.index, pd.DatetimeIndex) else 1
-        feature_cols = ['day_of_year', 'month']
-    
-    # Make sure all feature columns are numeric
-    for col in feature_cols:
-        try:
-            data[col] = pd.to_numeric(data[col], errors='coerce')
-        except:
-            st.warning(f"Could not convert {col} to numeric. Using zeros.")
-            data[col] = 0
-    
-    X = data[feature_cols]
-    
-    # Use precipitation as target if available, otherwise create a dummy target
-    if 'precipitation' in data.columns:
-        try:
-            data['precipitation'] = pd.to_numeric(data['precipitation'], errors='coerce')
-            y = data['precipitation']
-        except:
-            st.warning("Could not convert precipitation to numeric. Using random values.")
-            y = pd.Series(np.random.normal(5, 2, len(data)), index=data.index)
-            data['precipitation'] = y
-    else:
-        y = pd.Series(np.random.normal(5, 2, len(data)), index=data.index)
-        data['precipitation'] = y
-    
-    # Handle missing values in X using SimpleImputer
-    imputer = SimpleImputer(strategy='mean')
-    X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns, index=X.index)
-    
-    # Handle missing values in y
-    y_imputed = y.fillna(y.mean() if not y.isna().all() else 0)
-    
-    # Check if there are still NaN values in y
-    if y_imputed.isna().any():
-        st.warning("Could not impute all missing values in precipitation data. Using zeros for remaining NaNs.")
-        y_imputed = y_imputed.fillna(0)
-    
-    # Split data - use a smaller test set if data is limited
-    test_size = min(0.2, max(1/len(X_imputed), 0.1)) if len(X_imputed) > 10 else 0.1
-    X_train, X_test, y_train, y_test = train_test_split(X_imputed, y_imputed, test_size=test_size, random_state=42)
-    
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
-    return X_train_scaled, X_test_scaled, y_train, y_test, scaler, feature_cols, imputer
-
-def process_uploaded_data(uploaded_file):
-    """
-    Process uploaded data file and add units to column names.
-    
-    Args:
-        uploaded_file: File uploaded by the user
-        
-    Returns:
-        Tuple of (processed_data, error_message)
-    """
-    try:
-        # Determine file type from extension
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        # Read file based on extension
-        if file_extension == 'csv':
-            data = pd.read_csv(uploaded_file)
-        elif file_extension in ['xlsx', 'xls']:
-            data = pd.read_excel(uploaded_file)
-        elif file_extension == 'json':
-            data = pd.read_json(uploaded_file)
-        elif file_extension == 'txt':
-            # Try to read as CSV first
-            try:
-                data = pd.read_csv(uploaded_file, sep=None, engine='python')
-            except:
-                return None, "Could not parse text file. Please ensure it's in a tabular format."
-        elif file_extension == 'pdf':
-            st.warning("PDF parsing is limited. Attempting to extract tabular data...")
-            try:
-                import tabula
-                data = tabula.read_pdf(uploaded_file, pages='all')[0]
-            except:
-                return None, "Could not extract data from PDF. Please upload a CSV or Excel file instead."
-        else:
-            return None, f"Unsupported file format: {file_extension}"
-        
-        # Check if data was loaded successfully
-        if data is None or len(data) == 0:
-            return None, "No data found in the file"
-        
-        # Add units to column names
-        data = add_units_to_columns(data)
-        
-        # Display raw data for debugging
-        st.write("### Raw Uploaded Data:")
-        st.dataframe(data, use_container_width=True)
-        
-        # Try to identify date column
-        date_col = None
-        for col in data.columns:
-            if any(term in col.lower() for term in ['date', 'time', 'day', 'year', 'month']):
-                date_col = col
-                break
-        
-        if date_col is None:
-            # If no date column found, use the first column if it looks like dates
-            first_col = data.columns[0]
-            try:
-                pd.to_datetime(data[first_col], errors='raise')
-                date_col = first_col
-            except:
-                # Create a date column if none exists
-                st.warning("No date column found. Creating a synthetic date column.")
-                data['date'] = pd.date_range(start='2023-01-01', periods=len(data), freq='D')
-                date_col = 'date'
-        
-        # Convert date column to datetime
-        try:
-            data[date_col] = pd.to_datetime(data[date_col])
-            st.success(f"Using '{date_col}' as date column")
-        except:
-            st.warning(f"Could not convert '{date_col}' to datetime. Creating a synthetic date column.")
-            data['date'] = pd.date_range(start='2023-01-01', periods=len(data), freq='D')
-            date_col = 'date'
-        
-        # Set date as index
-        data = data.set_index(date_col)
-        
-        # Try to identify precipitation column
-        precip_col = None
-        precip_terms = ['precipitation', 'rainfall', 'rain', 'precip']
-        
-        for col in data.columns:
-            if any(term in col.lower() for term in precip_terms):
-                precip_col = col
-                break
-        
-        if precip_col is None:
-            # If no precipitation column found, look for numeric columns
-            numeric_cols = data.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
-                # Don't automatically assign precipitation - let user choose target variable
-                st.info("No precipitation column found. You'll be able to select a target variable.")
-            else:
-                return None, "No numeric columns found for analysis"
-        else:
-            # Rename the identified precipitation column
-            data = data.rename(columns={precip_col: 'precipitation'})
-            st.success(f"Using '{precip_col}' as precipitation data.")
-        
-        # Convert all remaining columns to numeric if possible
-        for col in data.columns:
-            try:
-                data[col] = pd.to_numeric(data[col], errors='coerce')
-            except:
-                pass
-        
-        # Check for other required columns
-        required_cols = ['temperature', 'humidity', 'pressure', 'wind_speed']
-        for col in required_cols:
-            if not any(col in c.lower() for c in data.columns):
-                # Generate synthetic data for missing columns
-                data[col] = np.random.normal(
-                    loc={'temperature': 25, 'humidity': 70, 'pressure': 1013, 'wind_speed': 10}[col],
-                    scale={'temperature': 5, 'humidity': 10, 'pressure': 5, 'wind_speed': 3}[col],
-                    size=len(data)
-                )
-                st.info(f"Generated synthetic '{col}' data.")
-            else:
-                matched_col = next(c for c in data.columns if col in c.lower())
-                if matched_col != col:
-                    data = data.rename(columns={matched_col: col})
-                    st.success(f"Using '{matched_col}' as {col} data.")
-        
-        return data, None
-    except Exception as e:
-        return None, f"Error processing file: {str(e)}"
-
-def generate_forecast(data, model, periods=30, time_granularity='D', forecast_unit='days', forecast_days=30, scaler=None, feature_cols=None, imputer=None):
-    """
-    Generate forecast for future periods using the trained model.
-    """
-    # Convert forecast_days to periods based on forecast_unit
-    if forecast_unit.lower() == 'days':
-        periods = forecast_days
-    elif forecast_unit.lower() == 'weeks':
-        periods = forecast_days * 7
-    elif forecast_unit.lower() == 'months':
-        periods = forecast_days * 30
-    elif forecast_unit.lower() == 'years':
-        periods = forecast_days * 365
-    else:
-        periods = forecast_days
-    
-    # Create future dates - ensure continuous dates from the last date in the data
-    if isinstance(data.index, pd.DatetimeIndex):
-        last_date = data.index[-1]
-    else:
-        # If index is not datetime, try to find a date column
-        if 'date' in data.columns:
-            last_date = pd.to_datetime(data['date']).max()
-        else:
-            last_date = pd.to_datetime('today')
-    
-    # Ensure last_date is a datetime object
-    if not isinstance(last_date, (pd.Timestamp, datetime)):
-        try:
-            last_date = pd.to_datetime(last_date)
-        except:
-            last_date = pd.to_datetime('today')
-    
-    # Create continuous date range starting from the day after the last date
-    future_dates = pd.date_range(
-        start=last_date + pd.Timedelta(days=1), 
-        periods=periods, 
-        freq=time_granularity
-    )
-    
-    # Create a DataFrame for future dates
-    future_df = pd.DataFrame(index=future_dates)
-    future_df['date'] = future_dates
-    
-    # Extract date features
-    future_df['day_of_year'] = future_df['date'].dt.dayofyear
-    future_df['month'] = future_df['date'].dt.month
-    
-    # Add season code
-    def get_season_code(month):
-        if month in [12, 1, 2]:
-            return 0  # Winter
-        elif month in [3, 4, 5]:
-            return 1  # Summer
-        elif month in [6, 7, 8, 9]:
-            return 2  # Monsoon
-        else:
-            return 3  # Post-Monsoon
-    
-    future_df['season_code'] = future_df['month'].apply(get_season_code)
-    
-    # Calculate average values from historical data
-    avg_values = {}
-    for col in ['temperature', 'humidity', 'pressure', 'wind_speed', 'precipitation']:
-        if col in data.columns and not data[col].isna().all():
-            avg_values[col] = data[col].mean()
-        else:
-            avg_values[col] = {'temperature': 25, 'humidity': 70, 'pressure': 1013, 'wind_speed': 10, 'precipitation': 5}[col]
-    
-    # Generate synthetic data for all weather parameters
-    # This ensures we have complete data for visualization
-    
-    # Temperature varies by season
-    month_temp_factors = {
-        1: 0.7,   # January - cooler
-        2: 0.8,   # February - cooler
-        3: 0.9,   # March - warming
-        4: 1.0,   # April - warming
-        5: 1.1,   # May - warm
-        6: 1.2,   # June - hot
-        7: 1.1,   # July - hot
-        8: 1.1,   # August - hot
-        9: 1.0,   # September - cooling
-        10: 0.9,  # October - cooling
-        11: 0.8,  # November - cooler
-        12: 0.7   # December - cooler
-    }
-    
-    # Check if temperature already exists in the DataFrame
-    if 'temperature' not in future_df.columns:
-        future_df['temperature'] = future_df['month'].apply(
-            lambda m: avg_values['temperature'] * month_temp_factors[m] * (1 + np.random.normal(0, 0.1))
-        )
-    
-    # Humidity varies by season
-    month_humidity_factors = {
-        1: 0.8,   # January - drier
-        2: 0.7,   # February - drier
-        3: 0.7,   # March - drier
-        4: 0.8,   # April - getting humid
-        5: 0.9,   # May - getting humid
-        6: 1.1,   # June - monsoon
-        7: 1.2,   # July - monsoon
-        8: 1.2,   # August - monsoon
-        9: 1.1,   # September - monsoon ending
-        10: 1.0,  # October - post-monsoon
-        11: 0.9,  # November - drying
-        12: 0.8   # December - drier
-    }
-    
-    if 'humidity' not in future_df.columns:
-        future_df['humidity'] = future_df['month'].apply(
-            lambda m: min(95, max(30, avg_values['humidity'] * month_humidity_factors[m] * (1 + np.random.normal(0, 0.1))))
-        )
-    
-    # Pressure varies less
-    if 'pressure' not in future_df.columns:
-        future_df['pressure'] = avg_values['pressure'] + np.random.normal(0, 5, size=len(future_df))
-    
-    # Wind speed varies somewhat randomly
-    if 'wind_speed' not in future_df.columns:
-        future_df['wind_speed'] = np.maximum(0, avg_values['wind_speed'] + np.random.normal(0, 2, size=len(future_df)))
-    
-    # Initialize precipitation column
-    if 'precipitation' not in future_df.columns:
-        future_df['precipitation'] = 0.0
-    
-    # Check if model is ARIMA
-    if hasattr(model, 'forecast'):
-        # For ARIMA, we need to forecast directly
-        try:
-            forecast_result = model.forecast(steps=periods)
-            future_df['precipitation'] = forecast_result
-        except Exception as e:
-            st.warning(f"ARIMA forecast failed: {str(e)}. Using seasonal patterns instead.")
-            # Use seasonal patterns for precipitation if ARIMA fails
-            month_precip_factors = {
-                1: 0.3,   # January - dry
-                2: 0.2,   # February - dry
-                3: 0.3,   # March - dry
-                4: 0.4,   # April - some rain
-                5: 0.6,   # May - pre-monsoon
-                6: 1.2,   # June - monsoon
-                7: 1.5,   # July - peak monsoon
-                8: 1.4,   # August - monsoon
-                9: 1.0,   # September - monsoon ending
-                10: 0.7,  # October - post-monsoon
-                11: 0.4,  # November - drying
-                12: 0.3   # December - dry
-            }
-            
-            future_df['precipitation'] = future_df['month'].apply(
-                lambda m: max(0, avg_values['precipitation'] * month_precip_factors[m] * 
-                             (1 + np.random.normal(0, 0.3)))  # Add some randomness
-            )
-    else:
-        # For ML models, we need to prepare the features
-        # Use only the feature columns that were used during training
-        if feature_cols is None:
-            # If feature_cols is not provided, try to infer from model
-            if hasattr(model, 'feature_names_in_'):
-                feature_cols = model.feature_names_in_
-            else:
-                # Default feature columns if we can't determine from model
-                feature_cols = ['temperature', 'humidity', 'pressure', 'wind_speed', 'day_of_year', 'month']
-        
-        # Ensure all required features are present in future_df
-        for col in feature_cols:
-            if col not in future_df.columns:
-                if col in avg_values:
-                    future_df[col] = avg_values[col]
-                else:
-                    # For unknown features, use zeros
-                    future_df[col] = 0
-        
-        # Select only the features used during training
-        X_future = future_df[feature_cols].copy()
-        
-        # Handle missing values if imputer is provided
-        if imputer is not None:
-            X_future = pd.DataFrame(imputer.transform(X_future), columns=X_future.columns, index=X_future.index)
-        
-        # Scale features if scaler is provided
-        if scaler is not None:
-            X_future_scaled = scaler.transform(X_future)
-        else:
-            X_future_scaled = X_future
-        
-        # Make predictions
-        try:
-            predictions = model.predict(X_future_scaled)
-            
-            # Apply post-processing to predictions to make them more realistic
-            # 1. Ensure no negative values
-            predictions = np.maximum(predictions, 0)
-            
-            # 2. Apply smoothing to avoid extreme jumps
-            if len(predictions) > 1:
-                smoothed_predictions = np.copy(predictions)
-                for i in range(1, len(predictions)):
-                    smoothed_predictions[i] = 0.7 * predictions[i] + 0.3 * smoothed_predictions[i-1]
-                predictions = smoothed_predictions
-            
-            # 3. Scale predictions to be in a reasonable range
-            if np.mean(predictions) > 3 * avg_values['precipitation']:
-                predictions = predictions * (avg_values['precipitation'] / np.mean(predictions)) * 2
-            
-            future_df['precipitation'] = predictions
-            
-        except Exception as e:
-            st.warning(f"Prediction failed: {str(e)}. Using seasonal patterns instead.")
-            # Use seasonal patterns for precipitation if prediction fails
-            month_precip_factors = {
-                1: 0.3,   # January - dry
-                2: 0.2,   # February - dry
-                3: 0.3,   # March - dry
-                4: 0.4,   # April - some rain
-                5: 0.6,   # May - pre-monsoon
-                6: 1.2,   # June - monsoon
-                7: 1.5,   # July - peak monsoon
-                8: 1.4,   # August - monsoon
-                9: 1.0,   # September - monsoon ending
-                10: 0.7,  # October - post-monsoon
-                11: 0.4,  # November - drying
-                12: 0.3   # December - dry
-            }
-            
-            future_df['precipitation'] = future_df['month'].apply(
-                lambda m: max(0, avg_values['precipitation'] * month_precip_factors[m] * 
-                             (1 + np.random.normal(0, 0.3)))  # Add some randomness
-            )
-    
-    # Ensure no negative precipitation
-    future_df['precipitation'] = future_df['precipitation'].clip(lower=0)
-    
-    # Final check to ensure no None/NaN values in any column
-    for col in future_df.columns:
-        if future_df[col].isna().any():
-            if col in avg_values:
-                future_df[col] = future_df[col].fillna(avg_values[col])
-            else:
-                future_df[col] = future_df[col].fillna(0)
-    
-    # Round numeric columns to improve display
-    numeric_cols = future_df.select_dtypes(include=['float64', 'float32']).columns
-    for col in numeric_cols:
-        future_df[col] = future_df[col].round(2)
-    
-    # Ensure the date column is preserved
-    if 'date' not in future_df.columns and isinstance(future_df.index, pd.DatetimeIndex):
-        future_df['date'] = future_df.index
-    
-    # Check for duplicate columns and remove them
-    if len(future_df.columns) != len(set(future_df.columns)):
-        # Find duplicate columns
-        cols_seen = set()
-        duplicate_cols = []
-        for col in future_df.columns:
-            if col in cols_seen:
-                duplicate_cols.append(col)
-            else:
-                cols_seen.add(col)
-        
-        # Keep only the first occurrence of each column
-        future_df = future_df.loc[:, ~future_df.columns.duplicated()]
-        st.warning(f"Removed duplicate columns: {duplicate_cols}")
-    
-    return future_df
-
-def plot_historical_and_forecast(historical_data, forecast_data, column_name, display_name=None, title=None):
-    """
-    Plot historical data and forecast together with no gaps.
-    """
-    if display_name is None:
-        display_name = column_name
-    
-    if title is None:
-        title = f"{display_name} Historical Data and Forecast"
-    
-    # Create figure directly with plotly
-    fig = go.Figure()
-    
-    # Prepare historical data for plotting
-    hist_df = historical_data.copy()
-    
-    # Check for datetime column and rename it to date if found
-    if 'datetime' in hist_df.columns and 'date' not in hist_df.columns:
-        hist_df = hist_df.rename(columns={'datetime': 'date'})
-    
-    # CRITICAL: Ensure historical data has a date column
-    if 'date' not in hist_df.columns:
-        # Try to find a date-like column
-        date_cols = [col for col in hist_df.columns if any(term in col.lower() for term in ['date', 'time', 'day'])]
-        if date_cols:
-            hist_df = hist_df.rename(columns={date_cols[0]: 'date'})
-        else:
-            # Create synthetic dates if no suitable column found
-            hist_df['date'] = pd.date_range(
-                end=pd.Timestamp.today() - pd.Timedelta(days=1),
-                periods=len(hist_df),
-                freq='D'
-            )
-
-    
-    # Ensure date column is datetime type
-    hist_df['date'] = pd.to_datetime(hist_df['date'])
-    hist_dates = hist_df['date']
-
-    
-    # Prepare forecast data for plotting
-    fore_df = forecast_data.copy()
-    
-    # CRITICAL: Ensure forecast data has a date column
-    if 'date' not in fore_df.columns:
-        if isinstance(fore_df.index, pd.DatetimeIndex):
-            fore_df = fore_df.reset_index()
-            fore_df.rename(columns={'index': 'date'}, inplace=True)
-        else:
-            return
-    
-    # Ensure date column is datetime type
-    fore_df['date'] = pd.to_datetime(fore_df['date'])
-    fore_dates = fore_df['date']
-    
-    # Get historical values
-    if column_name in hist_df.columns:
-        hist_values = hist_df[column_name]
-    else:
-        return
-    
-    # Get forecast values
-    if column_name in fore_df.columns:
-        fore_values = fore_df[column_name]
-    else:
-        return
-    
-    # Add historical trace
-    fig.add_trace(go.Scatter(
-        x=hist_dates,
-        y=hist_values,
-        name='Historical Data',
-        line=dict(color='blue'),
-        mode='lines'
-    ))
-    
-    # Add forecast trace
-    fig.add_trace(go.Scatter(
-        x=fore_dates,
-        y=fore_values,
-        name='Forecast',
-        line=dict(color='red', dash='dash'),
-        mode='lines'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        title=title,
-        xaxis_title='Date',
-        yaxis_title=display_name,
-        legend_title='Data Type',
-        hovermode='x unified'
-    )
-    
-    # Display the plot
-    st.plotly_chart(fig, use_container_width=True)
-    
-    
-    # Display the plot
-    st.write("Forecast Data Sample:", fore_df[['date', column_name]].head(3))
-
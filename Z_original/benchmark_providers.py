@@ -0,0 +1,121 @@
+"""
+Offline throughput and tail-latency benchmark of the provider fetch engines.
+
+Starts the local fake provider server (fake_weather_server.py) with the given latency,
+error rate and 429 limit, points the dashboard's provider requests at it and runs
+many fetches concurrently, the way several dashboard sessions would. No network
+access or API keys are needed.
+
+Usage:
+    python benchmark_providers.py --engine open-meteo --fetches 200 --concurrency 16 --latency 0.05
+    python benchmark_providers.py --engine weatherapi --days 90 --server-rate-limit 20 --error-rate 0.02
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from fake_weather_server import start_server
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Rainfall_Prediction_.py")
+
+def load_app():
+    """
+    Import the dashboard script as a module (Streamlit bare mode; main() is not run).
+    """
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        spec = importlib.util.spec_from_file_location("rainfall_app", APP_PATH)
+        app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(app)
+    return app
+
+def make_fetch(app, engine, start_date, end_date, batch_size):
+    """
+    Return a function running fetch number i with the chosen engine.
+
+    Every fetch asks for a different place so that single-flight collapsing does not
+    hide the cost of the requests.
+    """
+    def place(i):
+        return f"{(i % 170) - 85 + 0.01 * (i // 170):.2f},{(i * 7) % 360 - 180:.2f}"
+
+    if engine == 'weatherapi':
+        return lambda i: app.fetch_weather_data_from_api(f"Benchmark City {i}", start_date, end_date, "benchmark-key")
+    if engine == 'open-meteo':
+        return lambda i: app.fetch_open_meteo_data(place(i), start_date, end_date)
+    return lambda i: app.fetch_open_meteo_batch(
+        [place(i * batch_size + j) for j in range(batch_size)], start_date, end_date
+    )
+
+def run_benchmark(app, fetch, fetches, concurrency):
+    """
+    Run fetch(0..fetches-1) on a thread pool.
+
+    Returns:
+        (wall time in seconds, per-fetch latencies in seconds, number of fetches with an error)
+    """
+    def timed(i):
+        started = time.perf_counter()
+        data, error = fetch(i)
+        return time.perf_counter() - started, data is None or error is not None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(fetches)))
+    wall = time.perf_counter() - started
+    latencies = np.array([latency for latency, _ in results])
+    failures = sum(failed for _, failed in results)
+    return wall, latencies, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the provider fetch engines against the fake provider server")
+    parser.add_argument('--engine', choices=['open-meteo', 'open-meteo-batch', 'weatherapi'], default='open-meteo')
+    parser.add_argument('--fetches', type=int, default=100, help="Number of fetch calls")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent fetch calls (sessions)")
+    parser.add_argument('--days', type=int, default=30, help="Days per fetch")
+    parser.add_argument('--batch-size', type=int, default=50, help="Locations per open-meteo-batch fetch")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.02, help="Fake server base latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.02, help="Fake server extra random latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--server-rate-limit', type=float, default=None, help="Fake server requests per second before HTTP 429")
+    parser.add_argument('--burst', type=int, default=10, help="Burst size of the fake server's rate limit")
+    args = parser.parse_args()
+
+    app = load_app()
+    server = start_server(port=0, seed=args.seed, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, rate_limit=args.server_rate_limit, burst=args.burst)
+    host, port = server.server_address[:2]
+    app.FAKE_PROVIDER_URL = f"http://{host}:{port}"
+    app.PROVIDER_TRAFFIC_MODE = 'live'
+
+    end_date = np.datetime64('2024-06-30')
+    start_date = str(end_date - np.timedelta64(args.days - 1, 'D'))
+    fetch = make_fetch(app, args.engine, start_date, str(end_date), args.batch_size)
+    try:
+        wall, latencies, failures = run_benchmark(app, fetch, args.fetches, args.concurrency)
+    finally:
+        server.shutdown()
+
+    stats = server.config['stats']
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    print(f"engine={args.engine} fetches={args.fetches} concurrency={args.concurrency} days={args.days}")
+    print(f"wall time      {wall:8.2f} s")
+    print(f"throughput     {args.fetches / wall:8.2f} fetches/s  {stats['requests'] / wall:8.2f} requests/s")
+    print(f"latency p50    {p50 * 1000:8.1f} ms")
+    print(f"latency p90    {p90 * 1000:8.1f} ms")
+    print(f"latency p99    {p99 * 1000:8.1f} ms")
+    print(f"latency max    {latencies.max() * 1000:8.1f} ms")
+    print(f"failed fetches {failures:8d}")
+    print(f"server         {stats['requests']} requests, {stats['throttled']} throttled (429), {stats['errors']} errors (500)")
+    print(app.rate_limiter_stats().to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Local fake weather provider server for offline testing and benchmarking.
+
+Imitates the endpoints the dashboard uses (WeatherAPI history/forecast, Open-Meteo
+forecast, archive and geocoding, OpenWeather geocoding/current/timemachine and WeatherBit daily
+history) with deterministic synthetic data. Latency, error rate and 429 throttling are
+configurable.
+
+Usage:
+    python fake_weather_server.py --port 8765 --latency 0.05 --error-rate 0.01 --rate-limit 20
+    RAINFALL_FAKE_PROVIDER_URL=http://127.0.0.1:8765 streamlit run Rainfall_Prediction_.py
+    python benchmark_providers.py --engine open-meteo --latency 0.05   (starts its own server)
+
+Requests arrive as /<provider host>/<path>?<query>, e.g.
+/api.open-meteo.com/v1/forecast?latitude=12.9&longitude=77.6&daily=...
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import numpy as np
+import pandas as pd
+
+# Utility function to derive a stable random generator from request attributes
+def seeded_rng(seed, *parts):
+    digest = hashlib.sha1(repr((seed,) + parts).encode()).digest()
+    return np.random.default_rng(int.from_bytes(digest[:8], 'little'))
+
+def synthetic_day(seed, place, date):
+    """
+    Return deterministic daily weather for a place and date.
+
+    Args:
+        seed: Server seed
+        place: Location name or coordinate string
+        date: 'YYYY-MM-DD' string
+
+    Returns:
+        Dictionary with temperature, humidity, pressure, wind_speed and precipitation
+    """
+    rng = seeded_rng(seed, str(place).lower(), date)
+    day_of_year = pd.Timestamp(date).dayofyear
+    season = np.sin(2 * np.pi * (day_of_year - 80) / 365)
+    rain = rng.gamma(0.6, 6.0) if rng.random() < 0.35 + 0.25 * season else 0.0
+    return {
+        'temperature': round(24 + 5 * season + rng.normal(0, 1.5), 1),
+        'humidity': round(float(np.clip(65 + 15 * season + rng.normal(0, 5), 10, 100)), 1),
+        'pressure': round(1012 - 4 * season + rng.normal(0, 2), 1),
+        'wind_speed': round(abs(10 + rng.normal(0, 4)), 1),
+        'precipitation': round(float(rain), 1)
+    }
+
+def date_strings(start, end):
+    return [d.strftime('%Y-%m-%d') for d in pd.date_range(start, end, freq='D')]
+
+def coordinates_for(seed, name):
+    rng = seeded_rng(seed, 'geo', str(name).lower())
+    return round(float(rng.uniform(-60, 60)), 4), round(float(rng.uniform(-180, 180)), 4)
+
+# Endpoint handlers: (query dict, seed) -> JSON-serializable payload
+def weatherapi_history(query, seed):
+    dates = date_strings(query['dt'], query.get('end_dt', query['dt']))
+    hour = int(query.get('hour', 12))
+    forecastday = []
+    for date in dates:
+        day = synthetic_day(seed, query['q'], date)
+        forecastday.append({
+            'date': date,
+            'day': {
+                'avgtemp_c': day['temperature'],
+                'maxtemp_c': day['temperature'] + 4,
+                'mintemp_c': day['temperature'] - 4,
+                'avghumidity': day['humidity'],
+                'maxwind_kph': day['wind_speed'],
+                'totalprecip_mm': day['precipitation'],
+                'condition': {'text': 'Rain' if day['precipitation'] > 0 else 'Clear'}
+            },
+            'hour': [{
+                'time': f"{date} {hour:02d}:00",
+                'temp_c': day['temperature'],
+                'humidity': day['humidity'],
+                'wind_kph': day['wind_speed'],
+                'precip_mm': round(day['precipitation'] / 24, 2)
+            }]
+        })
+    return {'location': {'name': query['q']}, 'forecast': {'forecastday': forecastday}}
+
+def weatherapi_forecast(query, seed):
+    today = datetime.now().date()
+    days = int(query.get('days', 3))
+    query = dict(query, dt=str(today), end_dt=str(today + timedelta(days=days - 1)))
+    return weatherapi_history(query, seed)
+
+def open_meteo_geocoding(query, seed):
+    lat, lon = coordinates_for(seed, query['name'])
+    return {'results': [{'name': query['name'], 'latitude': lat, 'longitude': lon}]}
+
+# Open-Meteo variable name -> synthetic_day field (daily and hourly names)
+OPEN_METEO_FIELDS = {
+    'temperature_2m_mean': 'temperature', 'temperature_2m': 'temperature',
+    'temperature_2m_max': 'temperature', 'temperature_2m_min': 'temperature',
+    'relative_humidity_2m_mean': 'humidity', 'relativehumidity_2m': 'humidity',
+    'pressure_msl_mean': 'pressure', 'pressure_msl': 'pressure',
+    'wind_speed_10m_mean': 'wind_speed', 'windspeed_10m': 'wind_speed', 'windspeed_10m_max': 'wind_speed',
+    'precipitation_sum': 'precipitation', 'precipitation': 'precipitation'
+}
+OPEN_METEO_OFFSETS = {'temperature_2m_max': 4, 'temperature_2m_min': -4}
+
+def open_meteo_forecast(query, seed):
+    hours = range(24)
+    if 'start_hour' in query:
+        start, end = pd.Timestamp(query['start_hour']), pd.Timestamp(query['end_hour'])
+        dates = date_strings(start.normalize(), end.normalize())
+        if len(dates) == 1:
+            hours = range(start.hour, end.hour + 1)
+    elif 'start_date' in query:
+        dates = date_strings(query['start_date'], query['end_date'])
+    else:
+        today = datetime.now().date()
+        dates = date_strings(today, today + timedelta(days=int(query.get('forecast_days', 7)) - 1))
+    
+    resolution = 'daily' if 'daily' in query else 'hourly'
+    variables = query[resolution].split(',')
+    results = []
+    for lat, lon in zip(query['latitude'].split(','), query['longitude'].split(',')):
+        place = f"{float(lat):.4f},{float(lon):.4f}"
+        days = [synthetic_day(seed, place, date) for date in dates]
+        if resolution == 'daily':
+            block = {'time': dates}
+            for variable in variables:
+                field = OPEN_METEO_FIELDS.get(variable)
+                block[variable] = [
+                    None if field is None else round(day[field] + OPEN_METEO_OFFSETS.get(variable, 0), 1)
+                    for day in days
+                ]
+        else:
+            block = {'time': [f"{date}T{hour:02d}:00" for date in dates for hour in hours]}
+            for variable in variables:
+                field = OPEN_METEO_FIELDS.get(variable)
+                block[variable] = [
+                    None if field is None else (round(day[field] / 24, 2) if field == 'precipitation' else day[field])
+                    for day in days for hour in hours
+                ]
+        results.append({'latitude': float(lat), 'longitude': float(lon), resolution: block})
+    # A single coordinate returns an object, several a list
+    return results[0] if len(results) == 1 else results
+
+def openweather_geocoding(query, seed):
+    lat, lon = coordinates_for(seed, query['q'])
+    return [{'name': query['q'], 'lat': lat, 'lon': lon}]
+
+def openweather_current(query, seed):
+    day = synthetic_day(seed, query.get('q', ''), str(datetime.now().date()))
+    return {'main': {'temp': day['temperature'], 'humidity': day['humidity'], 'pressure': day['pressure']},
+            'wind': {'speed': day['wind_speed']}, 'weather': [{'description': 'synthetic'}]}
+
+def openweather_timemachine(query, seed):
+    start = datetime.fromtimestamp(int(query['dt']))
+    place = f"{float(query['lat']):.4f},{float(query['lon']):.4f}"
+    hourly = []
+    for hour in range(24):
+        moment = start + timedelta(hours=hour)
+        day = synthetic_day(seed, place, moment.strftime('%Y-%m-%d'))
+        entry = {
+            'dt': int(moment.timestamp()),
+            'temp': day['temperature'],
+            'humidity': day['humidity'],
+            'pressure': day['pressure'],
+            'wind_speed': day['wind_speed'],
+            'weather': [{'description': 'synthetic'}]
+        }
+        if day['precipitation'] > 0:
+            entry['rain'] = {'1h': round(day['precipitation'] / 24, 2)}
+        hourly.append(entry)
+    return {'lat': float(query['lat']), 'lon': float(query['lon']), 'hourly': hourly, 'data': hourly}
+
+def weatherbit_history(query, seed):
+    data = []
+    # WeatherBit's end_date is exclusive
+    for date in date_strings(query['start_date'], query['end_date'])[:-1] or [query['start_date']]:
+        day = synthetic_day(seed, query['city'], date)
+        data.append({
+            'datetime': date,
+            'temp': day['temperature'],
+            'max_temp': day['temperature'] + 4,
+            'min_temp': day['temperature'] - 4,
+            'rh': day['humidity'],
+            'pres': day['pressure'],
+            'wind_spd': day['wind_speed'],
+            'precip': day['precipitation'],
+            'weather': {'description': 'synthetic'}
+        })
+    return {'city_name': query['city'], 'data': data}
+
+ROUTES = {
+    'api.weatherapi.com/v1/history.json': weatherapi_history,
+    'api.weatherapi.com/v1/forecast.json': weatherapi_forecast,
+    'api.open-meteo.com/v1/forecast': open_meteo_forecast,
+    'archive-api.open-meteo.com/v1/archive': open_meteo_forecast,
+    'geocoding-api.open-meteo.com/v1/search': open_meteo_geocoding,
+    'api.openweathermap.org/geo/1.0/direct': openweather_geocoding,
+    'api.openweathermap.org/data/2.5/weather': openweather_current,
+    'api.openweathermap.org/data/3.0/onecall/timemachine': openweather_timemachine,
+    'api.weatherbit.io/v2.0/history/daily': weatherbit_history
+}
+
+def make_handler(config):
+    """
+    Build the request handler class for a server configuration.
+
+    Args:
+        config: Dictionary with seed, latency, jitter, error_rate, rate_limit and burst
+    """
+    lock = threading.Lock()
+    bucket = {'tokens': float(config['burst']), 'updated': time.monotonic()}
+    stats = {'requests': 0, 'throttled': 0, 'errors': 0}
+    config['stats'] = stats
+    
+    def take_token():
+        # Token bucket over all clients; None disables throttling
+        if not config['rate_limit']:
+            return True
+        with lock:
+            now = time.monotonic()
+            bucket['tokens'] = min(config['burst'], bucket['tokens'] + (now - bucket['updated']) * config['rate_limit'])
+            bucket['updated'] = now
+            if bucket['tokens'] >= 1:
+                bucket['tokens'] -= 1
+                return True
+            return False
+    
+    class FakeProviderHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            if config['verbose']:
+                super().log_message(format, *args)
+        
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            route = parts.path.lstrip('/')
+            query = dict(parse_qsl(parts.query))
+            with lock:
+                stats['requests'] += 1
+                request_number = stats['requests']
+            
+            # Simulated network and server latency (deterministic per request number)
+            rng = random.Random(f"{config['seed']}:{request_number}")
+            delay = config['latency'] + rng.uniform(0, config['jitter'])
+            if delay > 0:
+                time.sleep(delay)
+            
+            if route == '_stats':
+                return self.send_json(200, dict(stats))
+            if not take_token():
+                with lock:
+                    stats['throttled'] += 1
+                return self.send_json(429, {'error': 'Too many requests'}, {'Retry-After': '1'})
+            if rng.random() < config['error_rate']:
+                with lock:
+                    stats['errors'] += 1
+                return self.send_json(500, {'error': 'Injected server error'})
+            
+            handler = ROUTES.get(route)
+            if handler is None:
+                return self.send_json(404, {'error': f"Unknown endpoint: {route}"})
+            try:
+                return self.send_json(200, handler(query, config['seed']))
+            except (KeyError, ValueError) as e:
+                return self.send_json(400, {'error': f"Bad request: {e}"})
+    
+    return FakeProviderHandler
+
+def start_server(host='127.0.0.1', port=8765, seed=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit=None, burst=10, verbose=False):
+    """
+    Start the fake provider server in a background thread.
+
+    Returns:
+        The running ThreadingHTTPServer (call shutdown() to stop it); its
+        config['stats'] counts requests, throttled (429) and injected errors
+    """
+    config = {
+        'seed': seed, 'latency': latency, 'jitter': jitter, 'error_rate': error_rate,
+        'rate_limit': rate_limit, 'burst': burst, 'verbose': verbose
+    }
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake weather provider server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0, help="Seed for synthetic weather and injected faults")
+    parser.add_argument('--latency', type=float, default=0.0, help="Base latency per request in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra uniform random latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Allowed requests per second before HTTP 429")
+    parser.add_argument('--burst', type=int, default=10, help="Burst size of the rate limit")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+    
+    server = start_server(args.host, args.port, args.seed, args.latency, args.jitter, args.error_rate,
+                          args.rate_limit, args.burst, args.verbose)
+    print(f"Fake weather providers listening on http://{args.host}:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import importlib.util
+import logging
+import os
+import warnings
+
+import pytest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Rainfall_Prediction_.py")
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    The dashboard script imported as a module.
+
+    Streamlit runs in bare mode here: the page-level st.* calls at import time are
+    no-ops and main() is not called.
+    """
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        spec = importlib.util.spec_from_file_location("rainfall_app", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def fake_server():
+    """
+    Start fake provider servers (fake_weather_server.start_server) on free ports.
+
+    Returns a function taking start_server's keyword arguments and returning
+    (server, base_url); every server started is shut down after the test.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "fake_weather_server", os.path.join(os.path.dirname(APP_PATH), "fake_weather_server.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    servers = []
+
+    def start(**config):
+        server = module.start_server(port=0, **config)
+        servers.append(server)
+        host, port = server.server_address[:2]
+        return server, f"http://{host}:{port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,13 @@
+import ast
+from collections import Counter
+
+from conftest import APP_PATH
+
+
+def test_each_function_is_defined_once_before_main_runs():
+    with open(APP_PATH, encoding="utf-8") as source:
+        tree = ast.parse(source.read())
+    names = Counter(node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.ClassDef)))
+    assert [name for name, count in names.items() if count > 1] == []
+    # main() runs at the end of the script; definitions after it would only shadow the live ones on import
+    assert isinstance(tree.body[-1], ast.If) and "__name__" in ast.unparse(tree.body[-1].test)
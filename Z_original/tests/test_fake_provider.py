@@ -0,0 +1,142 @@
+import time
+
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def offline(app, monkeypatch, tmp_path):
+    """Send provider traffic to a fake server or fixtures in tmp_path, with fresh shared caches."""
+    monkeypatch.setattr(app, "PROVIDER_FIXTURES_DIR", str(tmp_path / "fixtures"))
+    monkeypatch.setattr(app, "FAKE_PROVIDER_URL", None)
+    monkeypatch.setattr(app, "PROVIDER_TRAFFIC_MODE", "live")
+    app.get_rate_limiters.clear()
+    app.get_geocode_cache.clear()
+    yield monkeypatch
+    app.get_rate_limiters.clear()
+    app.get_geocode_cache.clear()
+
+
+def test_record_then_replay_without_keys_or_network(app, offline, fake_server):
+    server, base_url = fake_server()
+    offline.setattr(app, "FAKE_PROVIDER_URL", base_url)
+    offline.setattr(app, "PROVIDER_TRAFFIC_MODE", "record")
+    recorded_wa, error = app.fetch_weather_data_from_api("Bengaluru", "2024-03-01", "2024-03-05", "record-key")
+    assert error is None
+    recorded_om, error = app.fetch_open_meteo_data("Bengaluru", "2024-03-01", "2024-03-05")
+    assert error is None
+    requests_made = server.config["stats"]["requests"]
+
+    # Replay with no server, a different key and an empty geocoding cache
+    server.shutdown()
+    app.get_geocode_cache.clear()
+    offline.setattr(app, "FAKE_PROVIDER_URL", None)
+    offline.setattr(app, "PROVIDER_TRAFFIC_MODE", "replay")
+    replayed_wa, error = app.fetch_weather_data_from_api("Bengaluru", "2024-03-01", "2024-03-05", "another-key")
+    assert error is None
+    replayed_om, error = app.fetch_open_meteo_data("Bengaluru", "2024-03-01", "2024-03-05")
+    assert error is None
+
+    pd.testing.assert_frame_equal(replayed_wa, recorded_wa)
+    pd.testing.assert_frame_equal(replayed_om, recorded_om)
+    assert len(recorded_wa) == 5 and recorded_wa.attrs["placeholder_dates"] == []
+    assert server.config["stats"]["requests"] == requests_made
+
+
+def test_fixtures_never_contain_api_keys(app, offline, fake_server, tmp_path):
+    server, base_url = fake_server()
+    offline.setattr(app, "FAKE_PROVIDER_URL", base_url)
+    offline.setattr(app, "PROVIDER_TRAFFIC_MODE", "record")
+    app.fetch_weather_data_from_api("Bengaluru", "2024-03-01", "2024-03-02", "secret-key-123")
+    fixtures = list((tmp_path / "fixtures").iterdir())
+    assert fixtures
+    assert not any("secret-key-123" in fixture.read_text() for fixture in fixtures)
+
+
+def test_server_429_retry_after_is_honored(app, offline, fake_server):
+    offline.setattr(app, "PROVIDER_RATE_LIMITS", {"test": (100.0, 10)})
+    app.get_rate_limiters.clear()
+    server, base_url = fake_server(rate_limit=2.0, burst=1)
+    offline.setattr(app, "FAKE_PROVIDER_URL", base_url)
+    url = "https://api.open-meteo.com/v1/forecast?latitude=1&longitude=2&daily=precipitation_sum"
+
+    assert app.rate_limited_get("test", url).status_code == 200
+    start = time.monotonic()
+    response = app.rate_limited_get("test", url)
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 200
+    assert server.config["stats"]["throttled"] == 1
+    # The server sends Retry-After: 1; the bucket must hold the retry back that long
+    assert elapsed >= 0.95
+    bucket = app.get_rate_limiters()["test"]
+    assert bucket["throttled"] == 1
+    assert bucket["rate"] < 100.0
+
+
+def test_injected_errors_are_reported_not_raised(app, offline, fake_server):
+    server, base_url = fake_server(error_rate=1.0)
+    offline.setattr(app, "FAKE_PROVIDER_URL", base_url)
+    data, error = app.fetch_open_meteo_data("12.97,77.59", "2024-03-01", "2024-03-03")
+    assert data is None
+    assert error == "Open-Meteo API error: 500"
+    assert server.config["stats"]["errors"] == server.config["stats"]["requests"] == 2
+
+
+def test_partial_error_rate_is_deterministic(app, offline, fake_server):
+    counts = []
+    for _ in range(2):
+        server, base_url = fake_server(error_rate=0.3, seed=7)
+        offline.setattr(app, "FAKE_PROVIDER_URL", base_url)
+        statuses = [
+            app.provider_request(f"https://api.open-meteo.com/v1/forecast?latitude={i}&longitude=0&daily=precipitation_sum").status_code
+            for i in range(40)
+        ]
+        counts.append(statuses)
+        assert statuses.count(500) == server.config["stats"]["errors"]
+    assert counts[0] == counts[1]
+    assert 0 < counts[0].count(500) < 40
+
+
+def test_replayed_429_does_not_throttle_live_bucket(app, offline, tmp_path):
+    url = "https://api.open-meteo.com/v1/forecast?latitude=1&longitude=2&daily=precipitation_sum"
+    throttled = app.requests.Response()
+    throttled.status_code = 429
+    throttled.headers["Retry-After"] = "30"
+    throttled._content = b'{"error": "Too many requests"}'
+    app.record_response(url, throttled)
+
+    offline.setattr(app, "PROVIDER_TRAFFIC_MODE", "replay")
+    assert app.rate_limited_get("open-meteo", url).status_code == 429
+    bucket = app.get_rate_limiters()["open-meteo"]
+    assert bucket["throttled"] == 0
+    assert bucket["blocked_until"] == 0.0
+    assert bucket["rate"] == bucket["max_rate"]
+
+
+@pytest.mark.parametrize("start, end, hourly_values", [
+    ("2024-03-01", "2024-03-01", 1),
+    ("2024-03-01", "2024-03-03", 72),
+])
+def test_hourly_fallback_requests_only_the_current_hour_of_a_single_day(app, offline, fake_server, start, end, hourly_values):
+    server, base_url = fake_server()
+    offline.setattr(app, "FAKE_PROVIDER_URL", base_url)
+    hourly_responses = []
+    live_get = app.single_flight_get
+
+    def without_daily(provider, url, **kwargs):
+        # Make the daily aggregates unavailable so the hourly fallback runs
+        if "daily=" in url:
+            response = app.requests.Response()
+            response.status_code = 503
+            return response
+        response = live_get(provider, url, **kwargs)
+        hourly_responses.append(response)
+        return response
+
+    offline.setattr(app, "single_flight_get", without_daily)
+    data, error = app.fetch_open_meteo_data("12.97,77.59", start, end)
+    assert error is None
+    assert len(hourly_responses) == 1
+    assert len(hourly_responses[0].json()["hourly"]["time"]) == hourly_values
+    assert len(data) == len(pd.date_range(start, end))
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import make_pipeline
+
+
+@pytest.fixture(scope="module")
+def forest_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = X[:, 0] * 3 + rng.normal(size=300)
+    model = RandomForestRegressor(n_estimators=15, max_depth=5, random_state=0).fit(X, y)
+    return model, X[:40]
+
+
+def test_quantile_column(app):
+    assert app.quantile_column("precipitation", 0.1) == "precipitation_p10"
+    assert app.quantile_column("precipitation", 0.5) == "precipitation_p50"
+    assert app.quantile_column("precipitation", 0.9) == "precipitation_p90"
+
+
+def test_tree_predictions_match_estimators(app, forest_data):
+    model, X = forest_data
+    expected = np.column_stack([tree.predict(X) for tree in model.estimators_])
+    np.testing.assert_allclose(app.forest_tree_predictions(model, X), expected)
+
+
+def test_quantiles_are_ordered(app, forest_data):
+    model, X = forest_data
+    bands = app.forest_quantile_predictions(model, X, app.FORECAST_QUANTILES)
+    assert bands.shape == (len(app.FORECAST_QUANTILES), len(X))
+    assert np.all(bands[0] <= bands[1]) and np.all(bands[1] <= bands[2])
+
+
+def test_quantiles_through_pipeline(app, forest_data):
+    model, X = forest_data
+    pipeline = make_pipeline(SimpleImputer(strategy="mean"), model)
+    pipeline[0].fit(X)
+    np.testing.assert_allclose(
+        app.forest_quantile_predictions(pipeline, X),
+        app.forest_quantile_predictions(model, X)
+    )
+
+
+def test_smooth_predictions_along_last_axis(app):
+    predictions = np.array([[0.0, 10.0, 10.0], [10.0, 0.0, 0.0]])
+    smoothed = app.smooth_predictions(predictions)
+    np.testing.assert_allclose(smoothed[0], [0.0, 7.0, 9.1])
+    np.testing.assert_allclose(smoothed[1], [10.0, 3.0, 0.9])
+
+
+@pytest.fixture(scope="module")
+def forest_forecast(app):
+    data = app.load_sample_data()
+    if "Location" in data.columns:
+        data = data[data["Location"] == data["Location"].iloc[0]].drop(columns="Location")
+    features = app.create_features(data)
+    X_train, _, y_train, _, scaler, feature_cols, imputer = app.preprocess_data(features)
+    model = RandomForestRegressor(n_estimators=20, max_depth=5, random_state=0).fit(X_train, y_train)
+    forecast = app.generate_forecast(
+        data, model, periods=14, forecast_days=14, scaler=scaler, feature_cols=feature_cols,
+        imputer=imputer, quantiles=app.FORECAST_QUANTILES, random_state=0
+    )
+    return data, forecast
+
+
+def plotted_traces(app, monkeypatch, historical, forecast):
+    figures = []
+    monkeypatch.setattr(app.st, "plotly_chart", lambda fig, **kwargs: figures.append(fig))
+    app.plot_historical_and_forecast(historical, forecast, "precipitation")
+    assert len(figures) == 1
+    return {trace.name: trace for trace in figures[0].data}
+
+
+def test_forecast_has_ordered_quantile_columns(app, forest_forecast):
+    _, forecast = forest_forecast
+    p10, p50, p90 = (forecast[app.quantile_column("precipitation", q)] for q in app.FORECAST_QUANTILES)
+    assert len(forecast) == 14
+    assert (p10 <= p50).all() and (p50 <= p90).all()
+
+
+def test_quantile_band_is_plotted(app, forest_forecast, monkeypatch):
+    data, forecast = forest_forecast
+    traces = plotted_traces(app, monkeypatch, data.iloc[-60:], forecast)
+    upper, lower = traces["precipitation_p90"], traces["precipitation_p10"]
+    np.testing.assert_allclose(upper.y, forecast["precipitation_p90"])
+    np.testing.assert_allclose(lower.y, forecast["precipitation_p10"])
+    assert lower.fill == "tonexty"
+    assert {"Historical Data", "precipitation_p90", "precipitation_p10"} <= set(traces)
+
+
+def test_no_band_without_quantiles(app, forest_forecast, monkeypatch):
+    data, forecast = forest_forecast
+    point_forecast = forecast.drop(columns=[app.quantile_column("precipitation", q) for q in app.FORECAST_QUANTILES])
+    traces = plotted_traces(app, monkeypatch, data.iloc[-60:], point_forecast)
+    assert "precipitation_p10" not in traces and "precipitation_p90" not in traces
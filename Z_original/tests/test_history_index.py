@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def history():
+    # Stations interleaved and out of date order, as uploads often are
+    return pd.DataFrame({
+        "date": pd.to_datetime([
+            "2024-01-03", "2024-01-01", "2024-01-02", "2024-01-05", "2024-01-01", "2024-01-04",
+        ]),
+        "Location": ["B", "A", "A", "A", "B", "B"],
+        "precipitation": [3.0, 1.0, 2.0, 5.0, 10.0, 4.0],
+    })
+
+
+def test_index_groups_stations_in_date_order(app, history):
+    index = app.build_history_index(history)
+    assert app.history_locations(index) == ["A", "B"]
+    assert index["offsets"] == {"A": (0, 3), "B": (3, 6)}
+    assert history.iloc[index["positions"]]["precipitation"].tolist() == [1.0, 2.0, 5.0, 10.0, 3.0, 4.0]
+
+
+def test_window_is_inclusive(app, history):
+    index = app.build_history_index(history)
+    window = app.history_window(history, index, "B", "2024-01-03", "2024-01-04")
+    assert window["precipitation"].tolist() == [3.0, 4.0]
+    assert app.history_window(history, index, "A", start="2024-01-02")["precipitation"].tolist() == [2.0, 5.0]
+    assert app.history_window(history, index, "C").empty
+
+
+def test_latest_returns_most_recent_rows(app, history):
+    index = app.build_history_index(history)
+    assert app.history_latest(history, index, "A", 2)["precipitation"].tolist() == [2.0, 5.0]
+    assert app.history_latest(history, index, "B", 10)["precipitation"].tolist() == [10.0, 3.0, 4.0]
+    assert app.history_latest(history, index, "C", 2).empty
+
+
+def test_has_checks_one_station(app, history):
+    index = app.build_history_index(history)
+    assert app.history_has(index, "A", "2024-01-05")
+    assert not app.history_has(index, "B", "2024-01-05")
+    assert not app.history_has(index, "A", "2024-01-03")
+    assert not app.history_has(index, "C", "2024-01-01")
+
+
+def test_index_without_location_column(app):
+    data = pd.DataFrame({"precipitation": [2.0, 1.0]}, index=pd.to_datetime(["2024-01-02", "2024-01-01"]))
+    index = app.build_history_index(data)
+    assert app.history_locations(index) == [None]
+    assert app.history_latest(data, index, None, 1)["precipitation"].tolist() == [2.0]
+    assert app.history_has(index, None, "2024-01-01")
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+ORIGIN = pd.Timestamp("2024-01-01")
+
+
+def holes_from(days, n_days=20):
+    holes = np.zeros(n_days, dtype=bool)
+    holes[list(days)] = True
+    return holes
+
+
+def observations(app, location, dates, value=1.0):
+    frame = pd.DataFrame({"Location": location, "date": pd.to_datetime(dates)})
+    for column in app.HISTORY_COLUMNS:
+        frame[column] = value
+    return frame
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "history.sqlite")
+
+
+def test_no_holes_no_ranges(app):
+    assert app.plan_gap_ranges(np.zeros(10, dtype=bool), ORIGIN) == []
+
+
+def test_contiguous_holes_form_one_range(app):
+    assert app.plan_gap_ranges(holes_from(range(3, 8)), ORIGIN) == [("2024-01-04", "2024-01-08")]
+
+
+def test_bridge_joins_nearby_holes(app):
+    holes = holes_from([1, 2, 5, 6, 15])
+    assert app.plan_gap_ranges(holes, ORIGIN, max_bridge_days=0) == [
+        ("2024-01-02", "2024-01-03"), ("2024-01-06", "2024-01-07"), ("2024-01-16", "2024-01-16")
+    ]
+    assert app.plan_gap_ranges(holes, ORIGIN, max_bridge_days=2) == [
+        ("2024-01-02", "2024-01-07"), ("2024-01-16", "2024-01-16")
+    ]
+
+
+def test_ranges_respect_max_length(app):
+    ranges = app.plan_gap_ranges(holes_from(range(20)), ORIGIN, max_range_days=7)
+    assert ranges == [
+        ("2024-01-01", "2024-01-07"), ("2024-01-08", "2024-01-14"), ("2024-01-15", "2024-01-20")
+    ]
+
+
+def test_availability_index_marks_observed_and_placeholder_days(app, store_path):
+    app.append_observations("open-meteo", observations(app, "A", ["2024-01-02", "2024-01-03"]), store_path)
+    app.append_observations(
+        "open-meteo", observations(app, "A", ["2024-01-05"]), store_path, placeholder_dates={"2024-01-05"}
+    )
+    index = app.build_availability_index("open-meteo", ["A", "B"], "2024-01-01", "2024-01-06", store_path)
+    assert list(np.flatnonzero(index["A"]["observed"])) == [1, 2]
+    assert list(np.flatnonzero(index["A"]["placeholder"])) == [4]
+    assert not index["B"]["observed"].any()
+
+
+def test_sync_plan_groups_locations_and_treats_placeholders_as_holes(app, store_path):
+    app.append_observations("open-meteo", observations(app, "A", pd.date_range("2024-01-01", "2024-01-20")), store_path)
+    app.append_observations(
+        "open-meteo", observations(app, "A", ["2024-01-21"]), store_path, placeholder_dates={"2024-01-21"}
+    )
+    plan = app.plan_history_sync("open-meteo", ["A", "B"], "2024-01-01", "2024-01-22", store_path)
+    assert plan == {
+        ("2024-01-21", "2024-01-22"): ["A"],
+        ("2024-01-01", "2024-01-22"): ["B"],
+    }
+
+
+def test_real_observation_replaces_placeholder_but_not_observation(app, store_path):
+    app.append_observations(
+        "weatherapi", observations(app, "A", ["2024-01-01"], 0.0), store_path, placeholder_dates={"2024-01-01"}
+    )
+    app.append_observations("weatherapi", observations(app, "A", ["2024-01-02"], 2.0), store_path)
+    assert app.append_observations("weatherapi", observations(app, "A", ["2024-01-01", "2024-01-02"], 5.0), store_path) == 1
+    stored = app.load_history_store("weatherapi", path=store_path).set_index("date")["precipitation"]
+    assert stored.loc["2024-01-01"] == 5.0
+    assert stored.loc["2024-01-02"] == 2.0
+
+
+def test_load_hides_placeholders_by_default(app, store_path):
+    app.append_observations(
+        "weatherapi", observations(app, "A", ["2024-01-01"]), store_path, placeholder_dates={"2024-01-01"}
+    )
+    assert app.load_history_store("weatherapi", path=store_path).empty
+    assert len(app.load_history_store("weatherapi", path=store_path, include_placeholders=True)) == 1
+
+
+def test_sync_never_fetches_today(app, store_path, monkeypatch):
+    requested = []
+    monkeypatch.setattr(app, "fetch_open_meteo_batch", lambda locations, start, end: requested.append((start, end)) or (None, None))
+    today = pd.Timestamp.now().normalize()
+    app.sync_history_store("open-meteo", ["A"], today - pd.Timedelta(days=2), today, path=store_path)
+    assert requested == [((today - pd.Timedelta(days=2)).strftime("%Y-%m-%d"), (today - pd.Timedelta(days=1)).strftime("%Y-%m-%d"))]
+
+
+def test_open_meteo_windows_split_at_forecast_horizon(app):
+    today = pd.Timestamp("2024-06-30")
+    first_forecast_day = today - pd.Timedelta(days=app.OPEN_METEO_FORECAST_PAST_DAYS)
+    assert app.plan_open_meteo_windows("2023-01-01", "2023-01-31", today) == [
+        (app.OPEN_METEO_ARCHIVE_URL, "2023-01-01", "2023-01-31")
+    ]
+    assert app.plan_open_meteo_windows("2024-06-01", "2024-06-29", today) == [
+        (app.OPEN_METEO_BASE_URL, "2024-06-01", "2024-06-29")
+    ]
+    assert app.plan_open_meteo_windows("2024-01-01", "2024-06-29", today) == [
+        (app.OPEN_METEO_ARCHIVE_URL, "2024-01-01", (first_forecast_day - pd.Timedelta(days=1)).strftime("%Y-%m-%d")),
+        (app.OPEN_METEO_BASE_URL, first_forecast_day.strftime("%Y-%m-%d"), "2024-06-29"),
+    ]
+
+
+def test_gap_older_than_forecast_window_is_filled_from_archive(app, store_path, fake_server, monkeypatch):
+    server, base_url = fake_server()
+    monkeypatch.setattr(app, "FAKE_PROVIDER_URL", base_url)
+    monkeypatch.setattr(app, "PROVIDER_TRAFFIC_MODE", "live")
+    requested = []
+    live_get = app.single_flight_get
+    monkeypatch.setattr(app, "single_flight_get", lambda provider, url, **kwargs: requested.append(url) or live_get(provider, url, **kwargs))
+
+    today = pd.Timestamp.now().normalize()
+    start = today - pd.Timedelta(days=app.OPEN_METEO_FORECAST_PAST_DAYS + 60)
+    end = today - pd.Timedelta(days=app.OPEN_METEO_FORECAST_PAST_DAYS + 1)
+    new_rows, n_ranges, errors = app.sync_history_store("open-meteo", ["12.97,77.59"], start, end, path=store_path)
+
+    assert (new_rows, n_ranges, errors) == (60, 1, [])
+    assert len(requested) == 1 and requested[0].startswith(app.OPEN_METEO_ARCHIVE_URL)
+    # The old gap is filled, so the next sync plans nothing
+    assert app.plan_history_sync("open-meteo", ["12.97,77.59"], start, end, store_path) == {}
+    assert app.sync_history_store("open-meteo", ["12.97,77.59"], start, end, path=store_path) == (0, 0, [])
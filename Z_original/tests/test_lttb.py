@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+
+def test_lttb_keeps_short_series(app):
+    assert list(app.lttb_downsample(np.arange(5), np.arange(5), 10)) == [0, 1, 2, 3, 4]
+
+
+def test_lttb_selects_budget_with_endpoints(app):
+    x = np.arange(10_000)
+    y = np.sin(x / 100.0)
+    idx = app.lttb_downsample(x, y, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_spike(app):
+    y = np.zeros(5_000)
+    y[2_345] = 100.0
+    idx = app.lttb_downsample(np.arange(len(y)), y, 50)
+    assert 2_345 in idx
+
+
+def test_lttb_accepts_datetimes(app):
+    dates = pd.date_range("2020-01-01", periods=3_000, freq="D").values
+    idx = app.lttb_downsample(dates, np.random.default_rng(0).normal(size=3_000), 100)
+    assert len(idx) == 100
+
+
+def test_downsample_series_drops_missing_values(app):
+    dates = pd.Series(pd.date_range("2020-01-01", periods=1_000, freq="D"))
+    values = pd.Series(np.arange(1_000, dtype=float))
+    values.iloc[::10] = np.nan
+    down_dates, down_values = app.downsample_series(dates, values, max_points=100)
+    assert len(down_values) == 100
+    assert not down_values.isna().any()
+    assert len(down_dates) == len(down_values)
+
+
+def test_make_line_trace_switches_to_webgl(app):
+    dates = pd.Series(pd.date_range("2020-01-01", periods=5_000, freq="h"))
+    values = pd.Series(np.arange(5_000, dtype=float))
+    assert type(app.make_line_trace(dates, values, max_points=100)).__name__ == "Scatter"
+    assert type(app.make_line_trace(dates, values, max_points=None)).__name__ == "Scattergl"
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+import requests
+
+
+@pytest.fixture
+def limiter(app, monkeypatch):
+    """A fresh token bucket for a 'test' provider at 20 requests/s with a burst of 5."""
+    monkeypatch.setattr(app, "PROVIDER_RATE_LIMITS", {"test": (20.0, 5)})
+    app.get_rate_limiters.clear()
+    yield app.get_rate_limiters()["test"]
+    app.get_rate_limiters.clear()
+
+
+def make_response(status_code, retry_after=None):
+    response = requests.Response()
+    response.status_code = status_code
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return response
+
+
+def test_burst_is_served_immediately(app, limiter):
+    start = time.monotonic()
+    for _ in range(5):
+        app.acquire_rate_token("test")
+    assert time.monotonic() - start < 0.05
+
+
+def test_empty_bucket_waits_for_refill(app, limiter):
+    for _ in range(5):
+        app.acquire_rate_token("test")
+    start = time.monotonic()
+    app.acquire_rate_token("test")
+    assert time.monotonic() - start >= 0.03
+
+
+def test_unknown_provider_is_not_limited(app, limiter):
+    start = time.monotonic()
+    for _ in range(50):
+        app.acquire_rate_token("unlimited")
+    assert time.monotonic() - start < 0.05
+
+
+def test_429_blocks_and_halves_rate(app, limiter):
+    app.record_rate_limit_response("test", make_response(429, retry_after="0.1"))
+    assert limiter["rate"] == 10.0
+    assert limiter["throttled"] == 1
+    start = time.monotonic()
+    app.acquire_rate_token("test")
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_recovers_up_to_maximum(app, limiter):
+    app.record_rate_limit_response("test", make_response(429, retry_after="0"))
+    for _ in range(20):
+        app.record_rate_limit_response("test", make_response(200))
+    assert limiter["rate"] == limiter["max_rate"]
+    assert limiter["backoff"] == 0.0
+
+
+def test_rate_never_drops_below_minimum_fraction(app, limiter):
+    for _ in range(10):
+        app.record_rate_limit_response("test", make_response(429, retry_after="0"))
+    assert limiter["rate"] == pytest.approx(limiter["max_rate"] * app.RATE_LIMIT_MIN_FRACTION)
+
+
+def test_rate_limited_get_retries_429(app, limiter, monkeypatch):
+    responses = [make_response(429, retry_after="0"), make_response(200)]
+    calls = []
+
+    def fake_request(url, **kwargs):
+        calls.append(url)
+        return responses.pop(0)
+
+    monkeypatch.setattr(app, "provider_request", fake_request)
+    response = app.rate_limited_get("test", "https://example.invalid/data")
+    assert response.status_code == 200
+    assert len(calls) == 2
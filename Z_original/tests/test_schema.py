@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+def signature_of(app, frame):
+    return tuple((col, app.dtype_class(dtype)) for col, dtype in frame.dtypes.items())
+
+
+def test_dtype_class(app):
+    frame = pd.DataFrame({
+        "d": pd.to_datetime(["2024-01-01"]),
+        "b": [True],
+        "f": [1.5],
+        "i": [1],
+        "s": ["x"],
+    })
+    assert [app.dtype_class(dtype) for dtype in frame.dtypes] == ["datetime", "bool", "float", "int", "other"]
+
+
+def test_unit_suffixed_columns_are_renamed(app):
+    schema = app.resolve_schema((("temperature (°C)", "float"), ("humidity (%)", "other")))
+    assert schema["rename"] == {"temperature (°C)": "temperature", "humidity (%)": "humidity"}
+    assert schema["coerce"] == ["humidity"]
+
+
+def test_no_rename_onto_existing_column(app):
+    schema = app.resolve_schema((("temperature", "float"), ("temperature (°C)", "float")))
+    assert schema["rename"] == {}
+
+
+def test_integers_coerced_only_in_compact_mode(app):
+    signature = (("pressure", "int"), ("wind_speed", "float"))
+    assert app.resolve_schema(signature)["coerce"] == []
+    assert app.resolve_schema(signature, compact=True)["coerce"] == ["pressure"]
+
+
+def test_date_and_location_columns_are_not_coerced(app):
+    signature = (("date", "other"), ("Location", "other"), ("precipitation", "other"))
+    assert app.resolve_schema(signature)["coerce"] == ["precipitation"]
+
+
+def test_normalize_schema_leaves_input_unmodified(app):
+    data = pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-02"],
+        "Location": ["A", "B"],
+        "precipitation (mm)": ["1.5", "bad"],
+        "humidity": [70, 80],
+    })
+    before = data.copy()
+    normalized = app.normalize_schema(data, compact=True)
+    pd.testing.assert_frame_equal(data, before)
+    assert list(normalized.columns) == ["date", "Location", "precipitation", "humidity"]
+    assert normalized["precipitation"].dtype == np.float32
+    assert np.isnan(normalized["precipitation"].iloc[1])
+    assert normalized["humidity"].dtype == np.float32
+    assert normalized["date"].tolist() == ["2024-01-01", "2024-01-02"]
+
+
+def test_normalize_schema_keeps_numeric_columns(app):
+    data = pd.DataFrame({"temperature": [20.5, 21.0], "pressure": [1013, 1012]})
+    normalized = app.normalize_schema(data)
+    assert normalized["temperature"].dtype == np.float64
+    assert normalized["pressure"].dtype == np.int64
+
+
+def test_add_units_to_columns(app):
+    frame = pd.DataFrame(columns=["temperature", "precipitation", "precipitation (mm)", "other"])
+    assert list(app.add_units_to_columns(frame).columns) == [
+        "temperature (°C)", "precipitation", "precipitation (mm)", "other"
+    ]
+    assert list(frame.columns) == ["temperature", "precipitation", "precipitation (mm)", "other"]
@@ -0,0 +1,67 @@
+import threading
+import time
+
+
+class Interrupted(BaseException):
+    """Stands in for Streamlit's RerunException/StopException."""
+
+
+def leader_and_waiter(app, key, leader_fn, waiter_fn):
+    """Run leader_fn as the in-flight call while a second caller with waiter_fn waits for it."""
+    results = []
+
+    def leader():
+        waiter.start()
+        # Give the waiter time to queue behind the in-flight call
+        time.sleep(0.2)
+        return leader_fn()
+
+    def wait():
+        try:
+            results.append(app.single_flight(key, waiter_fn))
+        except Exception as e:
+            results.append(e)
+
+    waiter = threading.Thread(target=wait)
+    try:
+        leader_result = app.single_flight(key, leader)
+    except BaseException as e:
+        leader_result = e
+    waiter.join(5)
+    return leader_result, results
+
+
+def test_concurrent_callers_share_one_call(app):
+    calls = []
+    leader_result, results = leader_and_waiter(
+        app, ("test", "shared"), lambda: calls.append("leader") or ("data", None), lambda: calls.append("waiter")
+    )
+    assert leader_result == ("data", None)
+    assert results == [("data", None)]
+    assert calls == ["leader"]
+
+
+def test_leader_exception_is_raised_to_waiters(app):
+    error = ValueError("provider down")
+
+    def fail():
+        raise error
+
+    leader_result, results = leader_and_waiter(app, ("test", "error"), fail, lambda: ("data", None))
+    assert leader_result is error
+    assert results == [error]
+
+
+def test_interrupted_leader_lets_waiters_run_the_call(app):
+    def interrupt():
+        raise Interrupted()
+
+    leader_result, results = leader_and_waiter(app, ("test", "interrupted"), interrupt, lambda: ("data", None))
+    assert isinstance(leader_result, Interrupted)
+    assert results == [("data", None)]
+    assert ("test", "interrupted") not in app.get_single_flight_registry()["calls"]
+
+
+def test_call_is_not_cached_after_completion(app):
+    assert app.single_flight(("test", "fresh"), lambda: 1) == 1
+    assert app.single_flight(("test", "fresh"), lambda: 2) == 2
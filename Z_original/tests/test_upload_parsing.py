@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+
+def csv_bytes(*lines):
+    return "\n".join(lines).encode("utf-8")
+
+
+def test_parses_csv_and_detects_roles(app):
+    content = csv_bytes(
+        "Date,Rainfall,Temperature_max,humidity,pressure,wind_speed",
+        "02/01/2024,1.0,20,70,1010,3",
+        "01/01/2024,0.5,21,71,1011,4",
+    )
+    result = app.parse_uploaded_bytes("weather.csv", content)
+    assert result["error"] is None
+    assert result["roles"] == {
+        "date": "Date",
+        "precipitation": "Rainfall",
+        "temperature": "Temperature_max",
+        "humidity": "humidity (%)",
+        "pressure": "pressure (hPa)",
+        "wind_speed": "wind_speed (m/s)",
+    }
+    data = result["data"]
+    assert list(data.index) == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02")]
+    assert data["precipitation"].tolist() == [0.5, 1.0]
+    assert result["schema"]["precipitation"] == "float"
+    assert result["schema"]["temperature"] == "int"
+    assert ("success", "Using 'Rainfall' as precipitation data.") in result["messages"]
+    assert ("success", "Using 'Temperature_max' as temperature data.") in result["messages"]
+
+
+def test_raw_frame_keeps_uploaded_values_with_units(app):
+    content = csv_bytes("date,precipitation,temperature", "2024-01-01,1.0,20")
+    result = app.parse_uploaded_bytes("weather.csv", content)
+    assert list(result["raw"].columns) == ["date", "precipitation (mm)", "temperature (°C)"]
+    assert result["raw"]["date"].tolist() == ["2024-01-01"]
+
+
+def test_missing_measurements_are_synthesized(app):
+    content = csv_bytes("date,precipitation", "2024-01-01,1.0", "2024-01-02,2.0")
+    result = app.parse_uploaded_bytes("weather.csv", content)
+    for col in ["temperature", "humidity", "pressure", "wind_speed"]:
+        assert result["roles"][col] is None
+        assert ("info", f"Generated synthetic '{col}' data.") in result["messages"]
+        assert result["data"][col].notna().all()
+
+
+def test_synthetic_date_column_warning(app):
+    content = csv_bytes("station,rain", "north,1.0", "north,2.0")
+    result = app.parse_uploaded_bytes("weather.csv", content)
+    assert result["error"] is None
+    assert ("warning", "No date column found. Creating a synthetic date column.") in result["messages"]
+    assert result["data"].index[0] == pd.Timestamp("2023-01-01")
+
+
+@pytest.mark.parametrize("file_name, content, error", [
+    ("weather.parquet", b"x", "Unsupported file format: parquet."),
+    ("weather.csv", csv_bytes("date,precipitation"), "Uploaded file contains no data"),
+])
+def test_failures_are_returned_not_raised(app, file_name, content, error):
+    result = app.parse_uploaded_bytes(file_name, content)
+    assert result["data"] is None
+    assert result["error"].startswith(error)
+    assert result["schema"] == {}
+
+
+def test_parsing_does_not_write_to_the_page(app, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("parse_uploaded_bytes wrote to the page")
+    for name in ["success", "info", "warning", "error"]:
+        monkeypatch.setattr(app.st, name, fail)
+    result = app.parse_uploaded_bytes("weather.csv", csv_bytes("date,rain", "2024-01-01,1.0"))
+    assert result["error"] is None